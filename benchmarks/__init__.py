@@ -0,0 +1,8 @@
+"""
+Benchmarks of pytplot's readers, storage and plotting.  They write their own test data, so each
+module can be run from the top of the repository, for example:
+
+    python -m benchmarks.cdf_to_tplot
+
+They are not run by pytest.  Each benchmark function also takes smaller sizes for a quick check.
+"""
@@ -0,0 +1,70 @@
+import pytplot
+import time
+import numpy as np
+from bokeh.embed import file_html
+from bokeh.resources import CDN
+from tests.test_bokeh_plots import _figure, _glyph_data
+
+
+def benchmark_spec_quads(num_times=15626, num_bins=65):
+    """
+    Times building the bokeh spectrogram of (num_times - 1) x (num_bins - 1) quads, a million by default.
+    """
+    times = 1.5e9 + np.arange(num_times) * 4.
+    pytplot.store_data('bench_spec', data={'x': times, 'y': np.random.rand(num_times, num_bins) + 0.01,
+                                           'v': np.logspace(0, 3, num_bins)})
+    pytplot.options('bench_spec', 'spec', 1)
+    pytplot.ylim('bench_spec', 1, 1000)
+    pytplot.xlim(times[0], times[-1])
+
+    t0 = time.perf_counter()
+    data = _glyph_data(_figure('bench_spec', width=num_times))
+    elapsed = time.perf_counter() - t0
+    print(f"{len(data['x'])} quads: {elapsed:.3f} s")
+    pytplot.del_data('bench_spec')
+
+
+def benchmark_spec_image(num_times=1000000, num_bins=64):
+    """
+    Compares the time to build and the HTML size of a num_times x num_bins spectrogram drawn with quads and with
+    an image, for a plot of the default window size.
+    """
+    times = 1.5e9 + np.arange(num_times) * 4.
+    pytplot.store_data('bench_spec', data={'x': times, 'y': np.random.rand(num_times, num_bins) + 0.01,
+                                           'v': np.logspace(0, 3, num_bins)})
+    pytplot.options('bench_spec', 'spec', 1)
+    pytplot.options('bench_spec', 'ylog', 1)
+    pytplot.ylim('bench_spec', 1, 1000)
+    pytplot.xlim(times[0], times[-1])
+
+    for plotter in ['bkTVarFigureSpec', 'bkTVarFigureSpecImage']:
+        t0 = time.perf_counter()
+        figure = _figure('bench_spec', width=pytplot.tplot_opt_glob['window_size'][0], plotter=plotter)
+        html = file_html(figure.fig, CDN)
+        elapsed = time.perf_counter() - t0
+        print(f"{plotter}: {elapsed:.3f} s, {len(html) / 2**20:.2f} MiB of HTML")
+    pytplot.del_data('bench_spec')
+
+
+def benchmark_line_decimation(num_points=10000000):
+    """
+    Compares the time to build and the HTML size of a line of num_points points plotted with each decimation
+    method, and of a line of a tenth of the points plotted without decimation.
+    """
+    for method, size in [(False, num_points // 10), ('minmax', num_points), ('lttb', num_points)]:
+        times = 1.5e9 + np.arange(size) * 0.01
+        pytplot.store_data('bench_line', data={'x': times, 'y': np.cumsum(np.random.randn(size))})
+        pytplot.options('bench_line', 'decimate', method)
+        pytplot.xlim(times[0], times[-1])
+        t0 = time.perf_counter()
+        figure = _figure('bench_line', width=pytplot.tplot_opt_glob['window_size'][0], plotter='bkTVarFigure1D')
+        html = file_html(figure.fig, CDN)
+        elapsed = time.perf_counter() - t0
+        print(f"{size} points, decimate={method}: {elapsed:.3f} s, {len(html) / 2**20:.2f} MiB of HTML")
+    pytplot.del_data('bench_line')
+
+
+if __name__ == '__main__':
+    benchmark_spec_quads()
+    benchmark_spec_image()
+    benchmark_line_decimation()
@@ -0,0 +1,111 @@
+import pytplot
+import os
+import shutil
+import tempfile
+import time
+import cdflib
+import numpy as np
+from tests.test_cdf_to_tplot import _write_test_cdf, _write_test_cdfs
+
+
+def benchmark_cdf_workers(num_files=288, num_records=300, max_workers=16):
+    """
+    Times reading a day of num_files five minute files with 1 up to max_workers workers.
+    """
+    directory = tempfile.mkdtemp()
+    filenames = _write_test_cdfs(directory, num_files, num_records)
+    workers = 1
+    while workers <= max_workers:
+        for use_processes in [False, True]:
+            t0 = time.perf_counter()
+            pytplot.cdf_to_tplot(list(filenames), workers=workers, use_processes=use_processes)
+            elapsed = time.perf_counter() - t0
+            print(f"{workers:3d} {'processes' if use_processes else 'threads':>9}: {elapsed:.2f} s")
+        workers *= 2
+    shutil.rmtree(directory)
+
+
+def benchmark_cdf_many_files(num_files=500, num_records=20):
+    """
+    Reads a quarter, half and all of num_files small files.  The time per file should stay
+    about the same as the number of files grows.
+    """
+    directory = tempfile.mkdtemp()
+    filenames = _write_test_cdfs(directory, num_files, num_records)
+    for count in [num_files // 4, num_files // 2, num_files]:
+        t0 = time.perf_counter()
+        pytplot.cdf_to_tplot(filenames[:count])
+        elapsed = time.perf_counter() - t0
+        assert len(pytplot.data_quants['flux'].time) == count * num_records
+        print(f"{count:5d} files: {elapsed:.2f} s, {elapsed / count * 1000:.2f} ms per file")
+    shutil.rmtree(directory)
+
+
+def benchmark_mask_invalid(num_times=200000, num_bins=128):
+    """
+    Compares masking the FILLVAL of a num_times x num_bins float32 spectrogram with the old
+    compare-twice pattern, and FILLVAL plus VALIDMIN/VALIDMAX with _mask_invalid.
+    """
+    from pytplot.importers.cdf_to_tplot import _mask_invalid
+    values = np.random.rand(num_times, num_bins).astype(np.float32)
+    values[::13, ::7] = -1e31
+    fillval = np.array([-1e31], dtype=np.float32)
+
+    ydata = values.copy()
+    t0 = time.perf_counter()
+    if ydata[ydata == fillval].size != 0:
+        ydata[ydata == fillval] = np.nan
+    old_elapsed = time.perf_counter() - t0
+    masked = values.copy()
+    t0 = time.perf_counter()
+    masked = _mask_invalid(masked, fillval)
+    fill_elapsed = time.perf_counter() - t0
+    assert np.array_equal(ydata, masked, equal_nan=True)
+    masked = values.copy()
+    t0 = time.perf_counter()
+    masked = _mask_invalid(masked, fillval, np.float32(0), np.float32(1))
+    valid_elapsed = time.perf_counter() - t0
+
+    assert np.array_equal(ydata, masked, equal_nan=True)
+    print(f"{num_times} x {num_bins} float32: FILLVAL twice {old_elapsed:.3f} s, _mask_invalid FILLVAL "
+          f"{fill_elapsed:.3f} s ({old_elapsed / fill_elapsed:.1f}x), with VALIDMIN/VALIDMAX {valid_elapsed:.3f} s")
+
+
+def benchmark_cdf_trange(num_records=86400, num_bins=128):
+    """
+    Reads a one second resolution day of data, and then one hour and one minute of it.
+    """
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'day.cdf')
+    _write_test_cdf(filename, 0, num_records, num_bins)
+    for trange in [None, ['2017-06-19/12:00', '2017-06-19/13:00'], ['2017-06-19/12:00', '2017-06-19/12:01']]:
+        t0 = time.perf_counter()
+        pytplot.cdf_to_tplot(filename, trange=trange)
+        elapsed = time.perf_counter() - t0
+        print(f"{len(pytplot.data_quants['flux'].time):6d} records: {elapsed:.3f} s")
+    shutil.rmtree(directory)
+
+
+def benchmark_epoch_conversion(num_times=1000000):
+    """
+    Compares converting num_times TT2000 epochs to unix times with cdflib and with cdf_to_tplot's converter.
+    """
+    from pytplot.importers.cdf_to_tplot import _epochs_to_unix, cdfepoch
+    tt2000 = np.arange(num_times, dtype=np.int64) * 10**8
+    tt2000 += cdflib.epochs.CDFepoch.compute_tt2000([2017, 6, 19, 0, 0, 0, 0, 0, 0])
+    t0 = time.perf_counter()
+    expected = np.array(cdfepoch.unixtime(tt2000))
+    cdflib_elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    unix_times = _epochs_to_unix(tt2000)
+    elapsed = time.perf_counter() - t0
+    assert np.allclose(unix_times, expected, rtol=0, atol=1e-5)
+    print(f"{num_times} epochs: cdflib {cdflib_elapsed:.3f} s, vectorized {elapsed:.4f} s")
+
+
+if __name__ == '__main__':
+    benchmark_cdf_workers()
+    benchmark_cdf_many_files()
+    benchmark_cdf_trange()
+    benchmark_mask_invalid()
+    benchmark_epoch_conversion()
@@ -0,0 +1,41 @@
+import pytplot
+import os
+import resource
+import time
+import numpy as np
+import dask.array as da
+
+
+def _peak_rss():
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def benchmark_chunked_data(total_bytes=None, num_bins=128, chunks=100000):
+    """
+    Stores, analyses and plots the last chunk of a chunked spectrogram of total_bytes
+    (by default 10 times the physical memory), and prints the peak memory used.
+    """
+    if total_bytes is None:
+        total_bytes = 10 * os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    num_times = int(total_bytes // (8 * num_bins))
+    values = da.random.random((num_times, num_bins), chunks=(chunks, num_bins))
+
+    t0 = time.perf_counter()
+    pytplot.store_data('bench_chunked', data={'x': np.arange(num_times, dtype=np.float64), 'y': values},
+                       chunks=chunks)
+    pytplot.clip('bench_chunked', 0.1, 0.9, 'bench_chunked_clip')
+    stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['bench_chunked_clip'])
+    pytplot.xlim(num_times - chunks, num_times - 1)
+    with pytplot.tplot_utilities.loaded_time_window('bench_chunked_clip'):
+        window = pytplot.data_quants['bench_chunked_clip'].values
+    elapsed = time.perf_counter() - t0
+
+    assert stats['finite_count'] > 0 and window.shape == (chunks, num_bins)
+    print(f"{total_bytes / 2**30:.2f} GiB chunked: {elapsed:.1f} s, "
+          f"peak memory {_peak_rss() / 2**30:.2f} GiB")
+    pytplot.del_data(['bench_chunked', 'bench_chunked_clip'])
+
+
+if __name__ == '__main__':
+    benchmark_chunked_data()
@@ -0,0 +1,63 @@
+import pytplot
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from tests.test_netcdf_to_tplot import _write_test_netcdf
+
+
+def benchmark_netcdf_merge(num_files=30, num_records=43200):
+    """
+    Reads a month of daily 2 second GOES like files one file at a time, merging each into the tplot variables
+    with xr.concat, and then all at once with netcdf_to_tplot.
+    """
+    import xarray as xr
+    directory = tempfile.mkdtemp()
+    filenames = [os.path.join(directory, 'day' + str(i) + '.nc') for i in range(num_files)]
+    for i, filename in enumerate(filenames):
+        _write_test_netcdf(filename, num_records, units='seconds since 2017-06-01 00:00:00', first=86400 * i, step=2.)
+
+    t0 = time.perf_counter()
+    merged = {}
+    for filename in filenames:
+        for name in pytplot.netcdf_to_tplot(filename):
+            merged[name] = xr.concat([merged[name], pytplot.data_quants[name]], dim='time').sortby('time') \
+                if name in merged else pytplot.data_quants[name]
+    concat_elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    names = pytplot.netcdf_to_tplot(filenames)
+    elapsed = time.perf_counter() - t0
+
+    assert all(np.array_equal(merged[name].values, pytplot.data_quants[name].values, equal_nan=True) for name in names)
+    print(f"{num_files} files: merging each file {concat_elapsed:.2f} s, all at once {elapsed:.2f} s")
+    shutil.rmtree(directory)
+
+
+def benchmark_netcdf_times(num_records=1000000):
+    """
+    Compares converting num_records netCDF times to unix times a date at a time and with their units.
+    """
+    import calendar
+    from netCDF4 import Dataset, num2date
+    from pytplot.importers.netcdf_to_tplot import change_time_to_unix_time
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'times.nc')
+    _write_test_netcdf(filename, num_records, units='milliseconds since 1970-01-01 00:00:00.0 UTC',
+                       first=1497830400000.)
+
+    with Dataset(filename) as file:
+        t0 = time.perf_counter()
+        dates = num2date(file['time'][:], units=file['time'].units)
+        [calendar.timegm(date.timetuple()) for date in dates]
+        dates_elapsed = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        change_time_to_unix_time(file['time'])
+        elapsed = time.perf_counter() - t0
+    print(f"{num_records} times: a date at a time {dates_elapsed:.3f} s, with the units {elapsed:.4f} s")
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    benchmark_netcdf_times()
+    benchmark_netcdf_merge()
@@ -0,0 +1,41 @@
+import pytplot
+import time
+import numpy as np
+import pandas as pd
+from pytplot.store_data import _check_spec_bins_ordering
+
+
+def benchmark_spec_bins_ordering(n=1000000, num_bins=64):
+    """
+    Times the spec_bins ordering analysis on n records of time varying bins.
+    """
+    bins = np.tile(np.logspace(0, 4, num_bins), (n, 1))
+    bins[:n // 2, :num_bins // 4] = np.nan
+    t0 = time.perf_counter()
+    _check_spec_bins_ordering(np.arange(n), bins)
+    elapsed = time.perf_counter() - t0
+    print(f"spec_bins ordering: {n} x {num_bins} bins in {elapsed:.3f} s")
+
+
+def benchmark_time_ingestion(n=10000000):
+    """
+    Stores n timestamps of each supported input kind and prints the throughput.
+    """
+    start = np.datetime64('2017-06-19T00:00:00', 'ns')
+    times64 = start + np.arange(n) * np.timedelta64(10, 'ms')
+    inputs = {'datetime64': times64,
+              'DatetimeIndex': pd.DatetimeIndex(times64, tz='UTC'),
+              'datetime': list(pd.DatetimeIndex(times64, tz='UTC').to_pydatetime()),
+              'string': list(np.datetime_as_string(times64, unit='ms'))}
+    y = np.zeros(n)
+    for kind, times in inputs.items():
+        t0 = time.perf_counter()
+        pytplot.store_data('bench_' + kind, data={'x': times, 'y': y})
+        elapsed = time.perf_counter() - t0
+        print(f"{kind:>14}: {n / elapsed / 1e6:8.2f} M timestamps/s")
+        pytplot.del_data('bench_' + kind)
+
+
+if __name__ == '__main__':
+    benchmark_time_ingestion()
+    benchmark_spec_bins_ordering()
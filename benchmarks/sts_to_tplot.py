@@ -0,0 +1,74 @@
+import pytplot
+import datetime
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from tests.test_sts_to_tplot import _write_test_sts
+
+
+def _read_sts_lines(filename):
+    # Reads an STS file a line at a time into lists of strings, the way sts_to_tplot used to
+    with open(filename, 'r') as f:
+        lines = f.readlines()
+    end_headers = [l for l, line in enumerate(lines) if 'END_OBJECT' in line][-1]
+    data = [line.strip().split() for line in lines[end_headers + 1:]]
+    columns = [[float(d[h]) for d in data] for h in range(len(data[0]))]
+    times = [datetime.datetime(int(yr), 1, 1, int(hr), int(mn), int(s), int(ms) * 1000, tzinfo=datetime.timezone.utc)
+             + datetime.timedelta(int(dy) - 1) for yr, dy, hr, mn, s, ms, *_ in data]
+    return columns, times
+
+
+def benchmark_sts_read(num_records=86400):
+    """
+    Compares reading a day of 1 Hz MAVEN MAG like STS data a line at a time and with sts_to_tplot.
+    """
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'day.sts')
+    _write_test_sts(filename, 1497830400.0, num_records)
+
+    t0 = time.perf_counter()
+    _read_sts_lines(filename)
+    lines_elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sts_dict = pytplot.sts_to_tplot(filename, read_only=True)
+    elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    pytplot.sts_to_tplot(filename, merge=False)
+    tplot_elapsed = time.perf_counter() - t0
+
+    assert len(sts_dict['time_unix']) == num_records
+    print(f"{num_records} records: line by line {lines_elapsed:.3f} s, columnar {elapsed:.3f} s, "
+          f"into tplot variables {tplot_elapsed:.3f} s")
+    shutil.rmtree(directory)
+
+
+def benchmark_sts_files(num_files=30, num_records=86400, workers=4):
+    """
+    Reads num_files days of STS data one at a time and with workers threads, and prints the peak memory
+    allocated while reading them compared to the size of the tplot variables.
+    """
+    directory = tempfile.mkdtemp()
+    filenames = [os.path.join(directory, 'day' + str(i) + '.sts') for i in range(num_files)]
+    for i, filename in enumerate(filenames):
+        _write_test_sts(filename, 1497830400.0 + 86400 * i, num_records)
+
+    for num_workers in [1, workers]:
+        t0 = time.perf_counter()
+        pytplot.sts_to_tplot(list(filenames), merge=False, workers=num_workers)
+        elapsed = time.perf_counter() - t0
+        # Tracing the allocations slows the reading down, so measure the memory separately
+        tracemalloc.start()
+        names = pytplot.sts_to_tplot(list(filenames), merge=False, workers=num_workers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        data_bytes = sum(pytplot.data_quants[name].nbytes for name in names)
+        print(f"{num_files} files, {num_workers} workers: {elapsed:.2f} s, "
+              f"peak memory {peak / data_bytes:.2f} times the {data_bytes / 2**20:.0f} MiB of data")
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    benchmark_sts_read()
+    benchmark_sts_files()
@@ -0,0 +1,37 @@
+import pytplot
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import numpy as np
+
+
+def benchmark_tplot_restore(num_times=2000000, num_bins=128):
+    """
+    Compares restoring a num_times x num_bins spectrogram from a pickle and from a tplot_save directory.
+    """
+    directory = tempfile.mkdtemp()
+    pytplot.store_data('bench_saved', data={'x': np.arange(num_times, dtype=np.float64),
+                                            'y': np.random.rand(num_times, num_bins), 'v': np.arange(num_bins)})
+    with open(os.path.join(directory, 'bench.pickle'), 'wb') as f:
+        pickle.dump([1, pytplot.data_quants['bench_saved'], pytplot.tplot_opt_glob], f)
+    pytplot.tplot_save('bench_saved', filename=os.path.join(directory, 'bench.pytplot'))
+    pytplot.del_data('bench_saved')
+
+    t0 = time.perf_counter()
+    pytplot.tplot_restore(os.path.join(directory, 'bench.pickle'), allow_pickle=True)
+    pickle_elapsed = time.perf_counter() - t0
+    pytplot.del_data('bench_saved')
+    t0 = time.perf_counter()
+    pytplot.tplot_restore(os.path.join(directory, 'bench.pytplot'))
+    mapped_elapsed = time.perf_counter() - t0
+
+    print(f"{num_times * num_bins * 8 / 2**30:.2f} GiB: pickle {pickle_elapsed:.3f} s, "
+          f"memory mapped {mapped_elapsed:.3f} s")
+    pytplot.del_data('bench_saved')
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    benchmark_tplot_restore()
@@ -0,0 +1,55 @@
+import pytplot
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import numpy as np
+from pytplot.exporters.tplot_ascii import tplot_ascii
+
+
+def _directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, dirs, files in os.walk(path) for f in files)
+
+
+def benchmark_tplot_save_zarr(num_times=1000000, num_bins=64):
+    """
+    Compares the write and read throughput and the size on disk of a num_times x num_bins spectrogram
+    saved with tplot_save_zarr, pickle and tplot_ascii.
+    """
+    directory = tempfile.mkdtemp()
+    values = np.round(np.random.lognormal(size=(num_times, num_bins)), 2)
+    pytplot.store_data('bench_zarr', data={'x': np.arange(num_times, dtype=np.float64), 'y': values,
+                                           'v': np.logspace(0, 4, num_bins)})
+    megabytes = values.nbytes / 2**20
+
+    def save_pickle(path):
+        with open(path, 'wb') as f:
+            pickle.dump([1, pytplot.data_quants['bench_zarr'], pytplot.tplot_opt_glob], f)
+
+    def restore_pickle(path):
+        pytplot.tplot_restore(path, allow_pickle=True)
+
+    formats = {'zarr': (lambda path: pytplot.tplot_save_zarr('bench_zarr', path), pytplot.tplot_restore_zarr),
+               'pickle': (save_pickle, restore_pickle),
+               'csv': (lambda path: tplot_ascii('bench_zarr', filename=path), None)}
+    for kind, (save, restore) in formats.items():
+        path = os.path.join(directory, 'bench_' + kind)
+        t0 = time.perf_counter()
+        save(path)
+        write_elapsed = time.perf_counter() - t0
+        size = _directory_size(path + '.csv' if kind == 'csv' else path)
+        line = f"{kind:>7}: write {megabytes / write_elapsed:8.1f} MB/s"
+        if restore is not None:
+            t0 = time.perf_counter()
+            restore(path)
+            line += f", read {megabytes / (time.perf_counter() - t0):8.1f} MB/s"
+        print(line + f", {size / 2**20:.1f} MB on disk")
+    pytplot.del_data('bench_zarr')
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    benchmark_tplot_save_zarr()
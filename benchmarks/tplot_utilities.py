@@ -0,0 +1,56 @@
+import pytplot
+import time
+import numpy as np
+import xarray as xr
+from pytplot.tplot_utilities import finite_min_max, get_heatmap_color, get_heatmap_rgba
+from tests.test_tplot_utilities import _heatmap_color_loop, _masked_min_max
+
+
+def benchmark_finite_min_max(num_times=100000, num_bins=128):
+    """
+    Compares the z range of a num_times x num_bins spectrogram computed with
+    finite_min_max against the old mask-then-nanmin pattern.
+    """
+    values = np.random.lognormal(size=(num_times, num_bins))
+    values[::7, ::5] = np.nan
+    values[::11, ::3] = np.inf
+    dataset = xr.DataArray(values, dims=['time', 'v_dim'])
+
+    t0 = time.perf_counter()
+    old = _masked_min_max(dataset)
+    old_elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = finite_min_max(values)
+    new_elapsed = time.perf_counter() - t0
+
+    assert np.allclose([old[0], old[1], old[2]], [new[0], new[1], new[2]])
+    print(f"{num_times} x {num_bins}: masked nanmin/nanmax {old_elapsed:.3f} s, "
+          f"finite_min_max {new_elapsed:.3f} s ({old_elapsed / new_elapsed:.1f}x)")
+
+
+def benchmark_heatmap_color(num_values=1000000):
+    """
+    Compares picking the colors of num_values values one at a time and with get_heatmap_color.
+    """
+    color_map = pytplot.tplot_utilities.return_bokeh_colormap('magma')
+    values = np.random.lognormal(size=num_values)
+    values[::7] = np.nan
+
+    t0 = time.perf_counter()
+    old = _heatmap_color_loop(color_map, 0.1, 10., values)
+    old_elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = get_heatmap_color(color_map, 0.1, 10., values)
+    new_elapsed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    get_heatmap_rgba(color_map, 0.1, 10., values)
+    rgba_elapsed = time.perf_counter() - t0
+
+    assert old == new
+    print(f"{num_values} values: one at a time {old_elapsed:.3f} s, get_heatmap_color {new_elapsed:.3f} s, "
+          f"get_heatmap_rgba {rgba_elapsed:.3f} s")
+
+
+if __name__ == '__main__':
+    benchmark_finite_min_max()
+    benchmark_heatmap_color()
@@ -17,16 +17,18 @@ from bokeh.models.formatters import DatetimeTickFormatter
 from bokeh.models.markers import X
 
 
-dttf = DatetimeTickFormatter(microseconds=["%H:%M:%S"],                        
-                             milliseconds=["%H:%M:%S"],
-                             seconds=["%H: %M:%S"],
-                             minsec=["%H:%M:%S"],
-                             minutes=["%H:%M:%S"],
-                             hourmin=["%H:%M:%S"],
-                             hours=["%H:%M"],
-                             days=["%F"],
-                             months=["%F"],
-                             years=["%F"])
+def _datetime_tick_formatter():
+    # Each axis gets its own formatter, since a bokeh model can only be in one document
+    return DatetimeTickFormatter(microseconds=["%H:%M:%S"],
+                                 milliseconds=["%H:%M:%S"],
+                                 seconds=["%H: %M:%S"],
+                                 minsec=["%H:%M:%S"],
+                                 minutes=["%H:%M:%S"],
+                                 hourmin=["%H:%M:%S"],
+                                 hours=["%H:%M"],
+                                 days=["%F"],
+                                 months=["%F"],
+                                 years=["%F"])
 
 
 class TVarFigure1D(object):
@@ -45,6 +47,7 @@ class TVarFigure1D(object):
         self.lineglyphs = []
         self.linenum = 0
         self.interactive_plot = None
+        self.x_range = None
 
         self.fig = Figure(x_axis_type='datetime', 
                           tools=pytplot.tplot_opt_glob['tools'],
@@ -101,12 +104,29 @@ class TVarFigure1D(object):
         self._addhoverlines()
         self._addlegend()
     
+    def redraw(self, x_range):
+        """
+        Draws the lines again for the time range x_range, in unix seconds, into a new bokeh figure with the size
+        of this one, and returns it.  Only the lines are drawn, and this figure is left as it is.
+        """
+        fig, lineglyphs, linenum = self.fig, self.lineglyphs, self.linenum
+        self.x_range = list(x_range)
+        self.fig = Figure(x_axis_type='datetime', y_axis_type=self._getyaxistype(),
+                          plot_width=fig.plot_width, plot_height=fig.plot_height)
+        self.lineglyphs = []
+        self.linenum = 0
+        try:
+            self._visdata()
+            return self.fig
+        finally:
+            self.fig, self.lineglyphs, self.linenum = fig, lineglyphs, linenum
+
     def _format(self):
         # Formatting stuff
         self.fig.grid.grid_line_color = None
         self.fig.axis.major_tick_line_color = None
         self.fig.axis.major_label_standoff = 0
-        self.fig.xaxis.formatter = dttf
+        self.fig.xaxis.formatter = _datetime_tick_formatter()
         self.fig.title = None
         self.fig.toolbar.active_drag = 'auto'
         if not self.show_xaxis:
@@ -130,9 +150,10 @@ class TVarFigure1D(object):
                 pytplot.lim_info['xfull'] = tplot_x_range
                 pytplot.lim_info['xlast'] = tplot_x_range
         
+        # The range the data is drawn for, in unix seconds
+        self.x_range = list(pytplot.tplot_opt_glob['x_range'])
         # Bokeh uses milliseconds since epoch for some reason
-        x_range = Range1d(int(pytplot.tplot_opt_glob['x_range'][0]) * 1000.0,
-                          int(pytplot.tplot_opt_glob['x_range'][1]) * 1000.0)
+        x_range = Range1d(int(self.x_range[0]) * 1000.0, int(self.x_range[1]) * 1000.0)
         self.fig.x_range = x_range
     
     def _setyrange(self):
@@ -176,7 +197,7 @@ class TVarFigure1D(object):
         self.fig.renderers.extend([roi_box])
 
     def _setxaxis(self):
-        xaxis1 = DatetimeAxis(major_label_text_font_size='0pt', formatter=dttf)
+        xaxis1 = DatetimeAxis(major_label_text_font_size='0pt', formatter=_datetime_tick_formatter())
         xaxis1.visible = False
         self.fig.add_layout(xaxis1, 'above')
         
@@ -213,14 +234,6 @@ class TVarFigure1D(object):
             if 'linestyle' in pytplot.data_quants[self.tvar_name].attrs['plot_options']['extras']:
                 line_style = pytplot.data_quants[self.tvar_name].attrs['plot_options']['extras']['linestyle']
                 
-            # Get a list of formatted times
-            corrected_time = [] 
-            for x in dataset.coords['time'].values:
-                corrected_time.append(tplot_utilities.int_to_str(x))
-                
-            # Bokeh uses milliseconds since epoch for some reason
-            x = dataset.coords['time'].values * 1000.0
-
             # Add region of interest (roi) lines if applicable
             if 'roi_lines' in pytplot.tplot_opt_glob.keys():
                 self._set_roi_lines(dataset)
@@ -236,6 +249,17 @@ class TVarFigure1D(object):
                 if self._getyaxistype() == 'log':
                     y.loc[y <= 0] = np.NaN
 
+                # Only send the points that can be seen at the width of the plot to the browser
+                keep = self._decimate(y.index.values, y.values)
+                if keep is not None:
+                    y = y.iloc[keep]
+
+                # Get a list of formatted times
+                corrected_time = tplot_utilities.times_to_str(y.index.values)
+
+                # Bokeh uses milliseconds since epoch for some reason
+                x = y.index.values * 1000.0
+
                 if 'line_style' in plot_options['line_opt']:
                     if plot_options['line_opt']['line_style'] == 'scatter':
                         Glyph = X
@@ -309,6 +333,28 @@ class TVarFigure1D(object):
                 self.lineglyphs.append(self.fig.add_glyph(line_source, line))
                 self.linenum += 1
 
+    def _decimate(self, times, values):
+        # Returns the indices of the points of a line to plot, or None to plot all of them.  The times before,
+        # within and after the x range are each reduced to about 4 points per pixel of the plot, if they have more.
+        method = pytplot.data_quants[self.tvar_name].attrs['plot_options']['extras'].get('decimate', 'minmax')
+        num_pixels = max(int(self.fig.plot_width), 1)
+        if not method or len(times) <= 4 * num_pixels:
+            return None
+        if np.any(np.diff(times) < 0):
+            return None
+        bounds = np.searchsorted(times, self.x_range)
+        keep = []
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(times)]):
+            if stop - start <= 4 * num_pixels:
+                keep.append(np.arange(start, stop))
+            elif method == 'lttb':
+                keep.append(start + tplot_utilities.decimate_lttb(times[start:stop], values[start:stop],
+                                                                  4 * num_pixels))
+            else:
+                keep.append(start + tplot_utilities.decimate_minmax(times[start:stop], values[start:stop],
+                                                                    num_pixels))
+        return np.concatenate(keep)
+
     def _addhoverlines(self):
         # Add tools
         hover = HoverTool()
@@ -128,19 +128,13 @@ class TVarFigureMap(object):
             self.zmin = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][0]
             self.zmax = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][1]
         else:
-            dataset_temp = pytplot.data_quants[self.tvar_name].where(pytplot.data_quants[self.tvar_name] != np.inf)
-            dataset_temp = dataset_temp.where(pytplot.data_quants[self.tvar_name] != -np.inf)
-            self.zmax = np.float(dataset_temp.max(skipna=True).values)
-            self.zmin = np.float(dataset_temp.min(skipna=True).values)
+            stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants[self.tvar_name])
+            self.zmax = float(stats['max'])
+            self.zmin = float(stats['min'])
             
             # Cannot have a 0 minimum in a log scale
             if self.zscale == 'log':
-                df = pytplot.tplot_utilities.convert_tplotxarray_to_pandas_dataframe(self.tvar_name, no_spec_bins=True)
-                zmin_list = []
-                for column in df.columns:
-                    series = df[column]
-                    zmin_list.append(series.iloc[series.to_numpy().nonzero()[0]].min())
-                self.zmin = min(zmin_list)
+                self.zmin = float(stats['min_positive'])
         
     def _setminborder(self):
         self.fig.min_border_bottom = pytplot.tplot_opt_glob['min_border_bottom']
@@ -242,13 +236,12 @@ class TVarFigureMap(object):
                     t_tvar = np.delete(t_tvar, 0)
                     data = np.delete(data, 0)
 
-                colors = []
-                colors.extend(pytplot.tplot_utilities.get_heatmap_color(
+                colors = pytplot.tplot_utilities.get_heatmap_color(
                     color_map=self.colors[cm_index % len(self.colors)],
                     min_val=self.zmin,
                     max_val=self.zmax,
-                    values=data.tolist(),
-                    zscale=self.zscale))
+                    values=data,
+                    zscale=self.zscale)
 
                 circle_source = ColumnDataSource(data=dict(x=x, 
                                                            y=y, 
@@ -5,7 +5,6 @@
 
 from __future__ import division
 import numpy as np
-import pandas as pd
 import math
 from bokeh.plotting.figure import Figure
 from bokeh.models import (CustomJS, LogColorMapper, LogTicker, LinearColorMapper, 
@@ -13,6 +12,7 @@ from bokeh.models import (CustomJS, LogColorMapper, LogTicker, LinearColorMapper
                           Range1d, Span, Title, BoxAnnotation)
 from bokeh.models.tools import BoxZoomTool
 from bokeh.models.formatters import BasicTickFormatter
+from bokeh.core.property.validation import validate
 
 import pytplot
 from .CustomModels.colorbarsidetitle import ColorBarSideTitle
@@ -20,16 +20,18 @@ from pytplot import tplot_utilities
 from bokeh.models.formatters import DatetimeTickFormatter
 
 
-dttf = DatetimeTickFormatter(microseconds=["%H:%M:%S"],                        
-                             milliseconds=["%H:%M:%S"],
-                             seconds=["%H:%M:%S"],
-                             minsec=["%H:%M:%S"],
-                             minutes=["%H:%M:%S"],
-                             hourmin=["%H:%M:%S"],
-                             hours=["%H:%M"],
-                             days=["%F"],
-                             months=["%F"],
-                             years=["%F"])
+def _datetime_tick_formatter():
+    # Each axis gets its own formatter, since a bokeh model can only be in one document
+    return DatetimeTickFormatter(microseconds=["%H:%M:%S"],
+                                 milliseconds=["%H:%M:%S"],
+                                 seconds=["%H:%M:%S"],
+                                 minsec=["%H:%M:%S"],
+                                 minutes=["%H:%M:%S"],
+                                 hourmin=["%H:%M:%S"],
+                                 hours=["%H:%M"],
+                                 days=["%F"],
+                                 months=["%F"],
+                                 years=["%F"])
 
 
 class TVarFigureSpec(object):
@@ -51,7 +53,9 @@ class TVarFigureSpec(object):
         self.zmin = 0
         self.zmax = 1
         self.callback = None
+        self.color_mapper = None
         self.slice_plot = None
+        self.x_range = None
         self.fig = Figure(x_axis_type='datetime', 
                           tools=pytplot.tplot_opt_glob['tools'],
                           y_axis_type=self._getyaxistype())
@@ -109,12 +113,29 @@ class TVarFigureSpec(object):
         self._addhoverlines()
         self._addlegend()
         
+    def redraw(self, x_range):
+        """
+        Draws the spectrogram again for the time range x_range, in unix seconds, into a new bokeh figure with the
+        size of this one, and returns it.  Only the data is drawn, with the colors of this figure, and this figure
+        (and its slice plot) is left as it is.
+        """
+        fig, slice_plot, callback, colors = self.fig, self.slice_plot, self.callback, self.colors
+        self.x_range = list(x_range)
+        self.fig = Figure(x_axis_type='datetime', y_axis_type=self._getyaxistype(),
+                          plot_width=fig.plot_width, plot_height=fig.plot_height)
+        self.colors = []
+        try:
+            self._visdata()
+            return self.fig
+        finally:
+            self.fig, self.slice_plot, self.callback, self.colors = fig, slice_plot, callback, colors
+
     def _format(self):
         # Formatting stuff
         self.fig.grid.grid_line_color = None
         self.fig.axis.major_tick_line_color = None
         self.fig.axis.major_label_standoff = 0
-        self.fig.xaxis.formatter = dttf
+        self.fig.xaxis.formatter = _datetime_tick_formatter()
         self.fig.title = None
         self.fig.toolbar.active_drag = 'auto'
         if not self.show_xaxis:
@@ -130,9 +151,10 @@ class TVarFigureSpec(object):
             pytplot.tplot_opt_glob['x_range'] = [np.nanmin(pytplot.data_quants[self.tvar_name].coords['time'].values),
                                                  np.nanmax(pytplot.data_quants[self.tvar_name].coords['time'].values)]
 
+        # The range the data is drawn for, in unix seconds
+        self.x_range = list(pytplot.tplot_opt_glob['x_range'])
         # Bokeh uses milliseconds since epoch for some reason
-        x_range = Range1d(int(pytplot.tplot_opt_glob['x_range'][0]) * 1000.0,
-                          int(pytplot.tplot_opt_glob['x_range'][1]) * 1000.0)
+        x_range = Range1d(int(self.x_range[0]) * 1000.0, int(self.x_range[1]) * 1000.0)
         if self.show_xaxis:
             pytplot.lim_info['xfull'] = x_range
             pytplot.lim_info['xlast'] = x_range
@@ -154,19 +176,13 @@ class TVarFigureSpec(object):
             self.zmin = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][0]
             self.zmax = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][1]
         else:
-            dataset_temp = pytplot.data_quants[self.tvar_name].where(pytplot.data_quants[self.tvar_name] != np.inf)
-            dataset_temp = dataset_temp.where(pytplot.data_quants[self.tvar_name] != -np.inf)
-            self.zmax = np.float(dataset_temp.max(skipna=True).values)
-            self.zmin = np.float(dataset_temp.min(skipna=True).values)
+            stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants[self.tvar_name])
+            self.zmax = float(stats['max'])
+            self.zmin = float(stats['min'])
 
             # Cannot have a 0 minimum in a log scale
             if self.zscale == 'log':
-                df = pytplot.tplot_utilities.convert_tplotxarray_to_pandas_dataframe(self.tvar_name, no_spec_bins=True)
-                zmin_list = []
-                for column in df.columns:
-                    series = df[column]
-                    zmin_list.append(series.iloc[series.to_numpy().nonzero()[0]].min())
-                self.zmin = min(zmin_list)
+                self.zmin = float(stats['min_positive'])
         
     def _setminborder(self):
         self.fig.min_border_bottom = pytplot.tplot_opt_glob['min_border_bottom']
@@ -198,7 +214,7 @@ class TVarFigureSpec(object):
         self.fig.renderers.extend([roi_box])
             
     def _setxaxis(self):
-        xaxis1 = DatetimeAxis(major_label_text_font_size='0pt', formatter=dttf)
+        xaxis1 = DatetimeAxis(major_label_text_font_size='0pt', formatter=_datetime_tick_formatter())
         xaxis1.visible = False
         self.fig.add_layout(xaxis1, 'above')
         
@@ -232,98 +248,66 @@ class TVarFigureSpec(object):
     def _visdata(self):
         self._setcolors()
         
-        x = pytplot.data_quants[self.tvar_name].coords['time'].values.tolist()
+        times = pytplot.data_quants[self.tvar_name].coords['time'].values
         # Add region of interest (roi) lines if applicable
         if 'roi_lines' in pytplot.tplot_opt_glob.keys():
-            self._set_roi_lines(x)
-        temp = [a for a in x if (a <= (pytplot.tplot_opt_glob['x_range'][1]) and a >= (pytplot.tplot_opt_glob['x_range'][0]))]
-        x = temp
+            self._set_roi_lines(times)
+        indices = np.nonzero((times <= self.x_range[1]) & (times >= self.x_range[0]))[0]
     
         # Sometimes X will be huge, we'll need to cut down so that each x will stay about 1 pixel in size
         step_size = 1
-        num_rect_displayed = len(x)
+        num_rect_displayed = len(indices)
         if self.fig.plot_width < num_rect_displayed:
             step_size = int(math.floor(num_rect_displayed/self.fig.plot_width))
-            x[:] = x[0::step_size]
-
+            indices = indices[0::step_size]
+        x = times[indices]
 
         # Determine bin sizes
+        values = np.asarray(pytplot.data_quants[self.tvar_name].values)
         if 'spec_bins' in pytplot.data_quants[self.tvar_name].coords:
-            df, bins = pytplot.tplot_utilities.convert_tplotxarray_to_pandas_dataframe(self.tvar_name)
-            bins_vary = len(pytplot.data_quants[self.tvar_name].coords['spec_bins'].shape) > 1
+            bins = np.asarray(pytplot.data_quants[self.tvar_name].coords['spec_bins'].values)
+            bins_vary = bins.ndim > 1
             bins_increasing = pytplot.data_quants[self.tvar_name].attrs['plot_options']['spec_bins_ascending']
         else:
-            df = pytplot.tplot_utilities.convert_tplotxarray_to_pandas_dataframe(self.tvar_name, no_spec_bins=True)
-            bins = pd.DataFrame(np.arange(len(pytplot.data_quants[self.tvar_name][0]))).transpose()
+            bins = np.arange(values.shape[1])
             bins_vary = False
             bins_increasing = True
         # Get length of arrays
         size_x = len(x)
-        size_y = len(bins.columns)
-        
-        # These arrays will be populated with data for the rectangle glyphs
-        color = []
-        bottom = []
-        top = []
-        left = []
-        right = []
-        value = []
-        corrected_time = []
-        
-        # left, right, and time do not depend on the values in spec_bins
-        for j in range(size_x-1):
-            left.append(x[j]*1000.0)
-            right.append(x[j+1]*1000.0)
-            corrected_time.append(tplot_utilities.int_to_str(x[j]))
-            
-        left = left * (size_y-1)
-        right = right * (size_y-1)
-        corrected_time = corrected_time * (size_y-1)
-        
-        # Handle the case of time-varying bin sizes
-        if bins_vary:
-            temp_bins = bins.loc[x[0:size_x-1]]
-        else:
-            temp_bins = bins.loc[0]
+        size_y = bins.shape[-1]
 
+        # Each rectangle spans from one time to the next, and from one bin to the next, in bin major order
         if bins_increasing:
-            bin_index_range = range(0, size_y-1, 1)
+            bin_index = np.arange(0, size_y-1, 1)
+            top_index = bin_index + 1
         else:
-            bin_index_range = range(size_y-1, 0, -1)
+            bin_index = np.arange(size_y-1, 0, -1)
+            top_index = bin_index - 1
+        rows = indices[0:max(size_x-1, 0)]
+        left = np.tile(x[0:size_x-1]*1000.0, len(bin_index))
+        right = np.tile(x[1:size_x]*1000.0, len(bin_index))
+        value = values[rows][:, bin_index].T.ravel()
+
+        # Handle the case of time-varying bin sizes
+        if bins_vary:
+            bottom = bins[rows][:, bin_index].T.ravel()
+            top = bins[rows][:, top_index].T.ravel()
+        else:
+            bottom = np.repeat(bins[bin_index], len(rows))
+            top = np.repeat(bins[top_index], len(rows))
 
-        for i in bin_index_range:
-            temp = df[i][x[0:size_x-1]].tolist()
-            value.extend(temp)
-            color.extend(tplot_utilities.get_heatmap_color(color_map=self.colors[0], 
-                                                           min_val=self.zmin, 
-                                                           max_val=self.zmax, 
-                                                           values=temp, 
-                                                           zscale=self.zscale))
-            
-            # Handle the case of time-varying bin sizes
-            if bins_vary:
-                bottom.extend(temp_bins[i].tolist())
-                if bins_increasing:
-                    top.extend(temp_bins[i+1].tolist())
-                else:
-                    top.extend(temp_bins[i-1].tolist())
-            else:
-                bottom.extend([temp_bins[i]]*(size_x-1))
-                if bins_increasing:
-                    top.extend([temp_bins[i+1]]*(size_x-1))
-                else:
-                    top.extend([temp_bins[i-1]]*(size_x-1))
-        
         # Here is where we add all of the rectangles to the plot
-        cds = ColumnDataSource(data=dict(x=left,
-                                         y=bottom,
-                                         right=right, 
-                                         top=top,
-                                         z=color,
-                                         value=value, 
-                                         corrected_time=corrected_time))
-        
-        self.fig.quad(bottom='y', left='x', right='right', top='top', color='z', source=cds)
+        # The columns are numpy arrays, which bokeh sends to the browser as binary, and the browser
+        # colors the rectangles by their values.  Checking every element of the columns takes much longer
+        # than making them, and they are numpy arrays of numbers anyway.
+        with validate(False):
+            cds = ColumnDataSource(data=dict(x=left,
+                                             y=bottom,
+                                             right=right,
+                                             top=top,
+                                             value=value))
+        color = {'field': 'value', 'transform': self._getcolormapper()}
+        self.fig.quad(bottom='y', left='x', right='right', top='top', fill_color=color, line_color=color, source=cds)
             
         if self.slice:
             if 'y_axis_type' in pytplot.data_quants[self.tvar_name].attrs['plot_options']['yaxis_opt']:
@@ -337,7 +321,7 @@ class TVarFigureSpec(object):
                                                     pytplot.data_quants[self.tvar_name].attrs['plot_options']['yaxis_opt']['y_range'][1]),
                                            y_axis_type=y_slice_log)
             self.slice_plot.min_border_left = 100
-            spec_bins = bins
+            spec_bins = bins[0] if bins_vary else bins
             flux = [0]*len(spec_bins)
             slice_line_source = ColumnDataSource(data=dict(x=spec_bins, y=flux))
             self.slice_plot.line('x', 'y', source=slice_line_source)
@@ -367,27 +351,33 @@ class TVarFigureSpec(object):
     def _addhoverlines(self):
         # Add tools
         hover = HoverTool(callback=self.callback)
-        hover.tooltips = [("Time", "@corrected_time"), ("Energy", "@y"), ("Value", "@value")]
+        hover.tooltips = [("Time", "@x{%F %T}"), ("Energy", "@y"), ("Value", "@value")]
+        hover.formatters = {'@x': 'datetime'}
         self.fig.add_tools(hover)
         
+    def _getcolormapper(self):
+        # The same color mapper colors the rectangles and the color bar.  Like get_heatmap_color, values
+        # below the z range and NaNs are white, and values above it get the top color.
+        if self.color_mapper is None:
+            if self.zscale == 'log':
+                mapper = LogColorMapper
+            else:
+                mapper = LinearColorMapper
+            self.color_mapper = mapper(palette=self.colors[0], low=self.zmin, high=self.zmax,
+                                       low_color='#ffffff', nan_color='#ffffff')
+        return self.color_mapper
+
     def _addlegend(self):
         # Add the color bar
-        if 'z_axis_type' in pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']:
-            if pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_axis_type'] == 'log':
-                color_mapper = LogColorMapper(palette=self.colors[0], low=self.zmin, high=self.zmax)
-                color_bar = ColorBarSideTitle(color_mapper=color_mapper, ticker=LogTicker(), border_line_color=None,
-                                              location=(0, 0))
-                color_bar.formatter = BasicTickFormatter(precision=2)
-            else:
-                color_mapper = LinearColorMapper(palette=self.colors[0], low=self.zmin, high=self.zmax)
-                color_bar = ColorBarSideTitle(color_mapper=color_mapper, ticker=BasicTicker(), border_line_color=None,
-                                              location=(0, 0))
-                color_bar.formatter = BasicTickFormatter(precision=4)
-        else:
-            color_mapper = LogColorMapper(palette=self.colors[0], low=self.zmin, high=self.zmax)
+        color_mapper = self._getcolormapper()
+        if self.zscale == 'log':
             color_bar = ColorBarSideTitle(color_mapper=color_mapper, ticker=LogTicker(), border_line_color=None,
                                           location=(0, 0))
             color_bar.formatter = BasicTickFormatter(precision=2)
+        else:
+            color_bar = ColorBarSideTitle(color_mapper=color_mapper, ticker=BasicTicker(), border_line_color=None,
+                                          location=(0, 0))
+            color_bar.formatter = BasicTickFormatter(precision=4)
         color_bar.width = 10
         color_bar.major_label_text_align = 'left'
         color_bar.label_standoff = 5
@@ -0,0 +1,139 @@
+# Copyright 2018 Regents of the University of Colorado. All Rights Reserved.
+# Released under the MIT license.
+# This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
+# Verify current version before use at: https://github.com/MAVENSDC/PyTplot
+
+import numpy as np
+from bokeh.models import HoverTool
+
+import pytplot
+from .TVarFigureSpec import TVarFigureSpec
+
+# Whether it has been printed that slice plots are drawn with rectangles, which is only printed once
+_slice_warned = False
+
+
+class TVarFigureSpecImage(TVarFigureSpec):
+    """
+    A spectrogram drawn as a single image instead of a rectangle for every time and bin.  The data is resampled
+    onto the pixels of the plot, so the size of the HTML file only depends on the window size.  Select it for a
+    variable with pytplot.options(name, 'plotter', 'bkTVarFigureSpecImage').  The slice plot needs the rectangles,
+    so with slice=True the spectrogram is drawn with them anyway, and a message saying so is printed the first
+    time this happens.
+    """
+
+    def _visdata(self):
+        if self.slice:
+            global _slice_warned
+            if not _slice_warned:
+                print("The slice plot can't be drawn from a spectrogram image, so " + self.tvar_name +
+                      " is drawn with rectangles instead.  This can make the plot much larger and slower.")
+                _slice_warned = True
+            return super()._visdata()
+        self._setcolors()
+
+        tvar = pytplot.data_quants[self.tvar_name]
+        times = tvar.coords['time'].values
+        # Add region of interest (roi) lines if applicable
+        if 'roi_lines' in pytplot.tplot_opt_glob.keys():
+            self._set_roi_lines(times)
+
+        if 'spec_bins' in tvar.coords:
+            bins = np.asarray(tvar.coords['spec_bins'].values)
+            bins_increasing = tvar.attrs['plot_options']['spec_bins_ascending']
+        else:
+            bins = np.arange(tvar.shape[1])
+            bins_increasing = True
+        bins_monotonic = pytplot.tplot_utilities.spec_bins_monotonic(tvar)
+
+        x_range = self.x_range
+        y_range = self._image_yrange(bins)
+        ylog = self._getyaxistype() == 'log'
+        image = _spec_image(times, tvar, bins, bins_increasing, x_range, y_range, ylog,
+                            int(self.fig.plot_width), int(self.fig.plot_height), bins_monotonic)
+
+        self.fig.image(image=[image], x=x_range[0]*1000.0, y=y_range[0], dw=(x_range[1]-x_range[0])*1000.0,
+                       dh=y_range[1]-y_range[0], color_mapper=self._getcolormapper())
+
+    def _image_yrange(self, bins):
+        # The image covers the y range of the plot, or all of the bins if it can't be drawn on the y axis
+        y_range = pytplot.data_quants[self.tvar_name].attrs['plot_options']['yaxis_opt'].get('y_range')
+        if y_range is None or (self._getyaxistype() == 'log' and min(y_range) <= 0):
+            positive = bins[bins > 0] if self._getyaxistype() == 'log' else bins
+            y_range = [np.nanmin(positive), np.nanmax(positive)]
+        return [min(y_range), max(y_range)]
+
+    def _addhoverlines(self):
+        if self.slice:
+            return super()._addhoverlines()
+        hover = HoverTool()
+        hover.tooltips = [("Time", "$x{%F %T}"), ("Energy", "$y"), ("Value", "@image")]
+        hover.formatters = {'$x': 'datetime'}
+        self.fig.add_tools(hover)
+
+
+def _spec_image(times, values, bins, bins_increasing, x_range, y_range, ylog, width, height, bins_monotonic=True):
+    """
+    Resamples a spectrogram onto a height x width grid of pixels covering x_range and y_range, evenly spaced in
+    log10(y) when ylog is set.  Each pixel gets the value of the time and bin whose rectangle contains its center,
+    the rectangles spanning from one time to the next and from one bin to the next.  Pixels outside of the data
+    are NaN.  Only the records shown in a pixel are read from values, which can be a DataArray.  The bins of the
+    records where bins_monotonic (one bool per record, or one for all of them) is False are sorted first.
+    """
+    width = max(width, 1)
+    height = max(height, 1)
+    x_pixels = x_range[0] + (np.arange(width) + 0.5) * (x_range[1] - x_range[0]) / width
+    if ylog:
+        y_low, y_high = np.log10(y_range[0]), np.log10(y_range[1])
+    else:
+        y_low, y_high = y_range
+    y_pixels = y_low + (np.arange(height) + 0.5) * (y_high - y_low) / height
+    if ylog:
+        y_pixels = 10 ** y_pixels
+
+    # The record of each column of pixels, the last time only ends the rectangles before it
+    records = np.searchsorted(times, x_pixels, side='right') - 1
+    columns = np.nonzero((records >= 0) & (records < len(times) - 1))[0]
+    records = records[columns]
+    image = np.full((height, width), np.nan, dtype=np.float32)
+    if len(columns) == 0:
+        return image
+
+    # Each record is only read once, however many pixels it covers
+    unique_records, value_rows = np.unique(records, return_inverse=True)
+    record_values = np.asarray(values[unique_records], dtype=np.float32)
+    if bins.ndim > 1:
+        record_bins = bins[unique_records]
+        bin_rows = value_rows
+    else:
+        record_bins = bins[np.newaxis, :]
+        bin_rows = np.zeros(len(records), dtype=int)
+    # Sort the bins in increasing order, the rectangle between two bins has the value of the lower one
+    if not bins_increasing:
+        record_bins = record_bins[:, ::-1]
+        record_values = record_values[:, ::-1]
+    # Usually every record is in order already, otherwise only the records out of order are sorted
+    monotonic = np.broadcast_to(bins_monotonic, (len(times),))
+    if not monotonic[unique_records].all():
+        if bins.ndim > 1:
+            unsorted = np.flatnonzero(~monotonic[unique_records])
+            order = np.argsort(record_bins[unsorted], axis=1)
+            record_bins = record_bins.copy()
+            record_bins[unsorted] = np.take_along_axis(record_bins[unsorted], order, axis=1)
+            record_values[unsorted] = np.take_along_axis(record_values[unsorted], order, axis=1)
+        else:
+            order = np.argsort(record_bins[0])
+            record_bins = record_bins[:, order]
+            record_values = record_values[:, order]
+
+    # Time varying bins usually only take a few different values, so look up the rows of each of them once
+    bin_sets, bin_set_index = np.unique(record_bins, axis=0, return_inverse=True)
+    bin_set_rows = np.empty((len(bin_sets), height), dtype=int)
+    for i, bin_set in enumerate(bin_sets):
+        bin_set_rows[i] = np.searchsorted(bin_set, y_pixels, side='right') - 1
+    rows = bin_set_rows[bin_set_index.ravel()[bin_rows]]
+    inside = (rows >= 0) & (rows < bins.shape[-1] - 1)
+
+    pixel_values = record_values[value_rows[:, np.newaxis], np.clip(rows, 0, bins.shape[-1] - 1)]
+    image[:, columns] = np.where(inside, pixel_values, np.nan).T
+    return image
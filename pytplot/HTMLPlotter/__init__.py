@@ -7,4 +7,6 @@ from .TVarFigure1D import TVarFigure1D
 from .TVarFigureMap import TVarFigureMap
 from .TVarFigureAlt import TVarFigureAlt
 from .TVarFigureSpec import TVarFigureSpec
-from .generate import generate_stack
\ No newline at end of file
+from .TVarFigureSpecImage import TVarFigureSpecImage
+from .generate import generate_stack
+from .server import serve_stack
\ No newline at end of file
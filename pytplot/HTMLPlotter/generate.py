@@ -18,6 +18,20 @@ def generate_stack(name,
                    combine_axes=True,
                    slice=True,
                    vert_spacing=25):
+    # Chunked variables are only computed over the plotted time range
+    with pytplot.tplot_utilities.loaded_time_window(name, var_label):
+        return _generate_stack(name, var_label=var_label, auto_color=auto_color, combine_axes=combine_axes,
+                               slice=slice, vert_spacing=vert_spacing)
+
+
+def _generate_stack(name, 
+                    var_label=None,
+                    auto_color=True, 
+                    combine_axes=True,
+                    slice=True,
+                    vert_spacing=25,
+                    figures=None):
+    # The TVarFigure objects of the plots are appended to figures, if given
     
     doc.curdoc().clear()
     num_plots = len(name)
@@ -60,6 +74,8 @@ def generate_stack(name,
         axis_types.append(new_fig.getaxistype())
         
         new_fig.buildfigure()
+        if figures is not None:
+            figures.append(new_fig)
 
         # Change background color to black if option for it is set - CHECK ONCE WE'VE UPGRADED OUR BOKEH THAT THIS IS
         # THE RIGHT WAY TO DO THIS
@@ -125,6 +141,7 @@ def generate_stack(name,
 
 
 def _get_figure_class(tvar_name, auto_color=True, slice=False, show_xaxis=True):
+    pytplot.tplot_utilities.set_default_y_range(tvar_name)
     if 'plotter' in pytplot.data_quants[tvar_name].attrs['plot_options']['extras'] \
             and pytplot.data_quants[tvar_name].attrs['plot_options']['extras']['plotter'] in pytplot.bokeh_plotters:
         cls = pytplot.bokeh_plotters[pytplot.data_quants[tvar_name].attrs['plot_options']['extras']['plotter']]
@@ -0,0 +1,107 @@
+# Copyright 2018 Regents of the University of Colorado. All Rights Reserved.
+# Released under the MIT license.
+# This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
+# Verify current version before use at: https://github.com/MAVENSDC/PyTplot
+
+import pytplot
+from bokeh.models import GlyphRenderer
+from bokeh.models.glyphs import Image
+from .generate import _generate_stack
+
+
+def serve_stack(name, var_label=None, auto_color=True, combine_axes=True, slice=False, port=5006, show=True):
+    """
+    Runs a local bokeh server showing the plots of the tplot variables in name.  When the time range is zoomed
+    or panned in the browser, the plots are redrawn from data_quants for the visible time range, so that only
+    about as much data as the plots have pixels is ever sent to the browser.  This blocks until the server is
+    stopped.
+
+    Parameters:
+        name : list of str
+            The tplot variables to plot.
+        var_label : str/list, optional
+            Variables whose values are shown as extra x axes.
+        port : int, optional
+            The port of the server.
+        show : bool, optional
+            If True, the plots are opened in a web browser.
+
+    Returns:
+        None
+    """
+    from bokeh.application import Application
+    from bokeh.application.handlers import FunctionHandler
+    from bokeh.server.server import Server
+
+    def make_document(doc):
+        build_document(doc, name, var_label=var_label, auto_color=auto_color, combine_axes=combine_axes,
+                       slice=slice)
+
+    server = Server({'/': Application(FunctionHandler(make_document))}, port=port)
+    server.start()
+    print("Serving the plots at http://localhost:" + str(server.port) + "/")
+    if show:
+        server.io_loop.add_callback(server.show, '/')
+    server.io_loop.start()
+
+
+def build_document(doc, name, var_label=None, auto_color=True, combine_axes=True, slice=False, delay=100):
+    """
+    Adds the plots of the tplot variables in name to a bokeh server document, with callbacks redrawing the time
+    plots for the visible time range when it changes.  Changes are gathered for delay milliseconds before the
+    plots are redrawn, so that dragging the plots doesn't redraw them at every step.
+
+    Returns:
+        The list of TVarFigure objects of the plots.
+    """
+    figures = []
+    with pytplot.tplot_utilities.loaded_time_window(name, var_label):
+        layout = _generate_stack(name, var_label=var_label, auto_color=auto_color, combine_axes=combine_axes,
+                                 slice=slice, figures=figures)
+    doc.add_root(layout)
+
+    time_figures = [figure for figure in figures if figure.getaxistype()[0] == 'time']
+    pending = []
+
+    def redraw():
+        pending.clear()
+        x_range = time_figures[-1].fig.x_range
+        update_figures(time_figures, [x_range.start / 1000.0, x_range.end / 1000.0], name, var_label)
+
+    def on_range_change(attr, old, new):
+        if not pending:
+            pending.append(doc.add_timeout_callback(redraw, delay))
+
+    x_ranges = []
+    for figure in time_figures:
+        if all(figure.fig.x_range is not x_range for x_range in x_ranges):
+            x_ranges.append(figure.fig.x_range)
+    for x_range in x_ranges:
+        x_range.on_change('start', on_range_change)
+        x_range.on_change('end', on_range_change)
+    return figures
+
+
+def update_figures(figures, x_range, name, var_label=None):
+    """
+    Redraws the data of the TVarFigure objects in figures for the time range x_range, in unix seconds.  Each
+    figure draws its data again for that time range, decimated to its size, and the data is copied into the
+    glyphs of the figure, leaving everything else (the ranges, tools and color bars) as it is.  Neither
+    tplot_opt_glob nor lim_info are changed, so sessions showing different time ranges don't interfere.
+    """
+    with pytplot.tplot_utilities.loaded_time_window(name, var_label, x_range=x_range):
+        for figure in figures:
+            _copy_glyph_data(figure.redraw(x_range), figure.fig)
+
+
+def _copy_glyph_data(source_fig, target_fig):
+    # The glyphs are matched in the order they were drawn, which must give the same kinds of glyphs
+    source_renderers = [r for r in source_fig.renderers if isinstance(r, GlyphRenderer)]
+    target_renderers = [r for r in target_fig.renderers if isinstance(r, GlyphRenderer)]
+    if [type(r.glyph) for r in source_renderers] != [type(r.glyph) for r in target_renderers]:
+        print("The redrawn glyphs don't match the glyphs of the plot, so it can't be updated.")
+        return
+    for source, target in zip(source_renderers, target_renderers):
+        target.data_source.data = dict(source.data_source.data)
+        if isinstance(source.glyph, Image):
+            target.glyph.update(x=source.glyph.x, y=source.glyph.y, dw=source.glyph.dw, dh=source.glyph.dh)
@@ -23,7 +23,8 @@ class UpdatingImage(pg.ImageItem):
     _MAX_IMAGE_WIDTH = 10000
     _MAX_IMAGE_HEIGHT = 2000
     
-    def __init__(self, data, spec_bins, ascending_descending, ytype, ztype, lut, ymin, ymax, zmin, zmax):
+    def __init__(self, data, spec_bins, ascending_descending, ytype, ztype, lut, ymin, ymax, zmin, zmax,
+                 bins_monotonic=None):
 
 
         pg.ImageItem.__init__(self)
@@ -64,9 +65,17 @@ class UpdatingImage(pg.ImageItem):
                 yp = np.linspace(minbin, maxbin, 100)
 
             data_reformatted = []
-            y_sort = np.argsort(self.bin_sizes.iloc[0].tolist())
+            # The bins of records in order only need to be searched from the other end when descending,
+            # records out of order (or all of them if that isn't known) are sorted
+            if bins_monotonic is None:
+                bins_monotonic = np.zeros(len(self.bin_sizes), dtype=bool)
+            in_order = None if self.bins_inc else np.arange(len(self.bin_sizes.columns))[::-1]
+
+            def bin_sorter(i):
+                return in_order if bins_monotonic[i] else np.argsort(self.bin_sizes.iloc[i].values)
+
             prev_bins = self.bin_sizes.iloc[0]
-            prev_closest_ys = np.searchsorted(self.bin_sizes.iloc[0], yp, sorter=y_sort)
+            prev_closest_ys = np.searchsorted(self.bin_sizes.iloc[0], yp, sorter=bin_sorter(0))
             prev_closest_ys[prev_closest_ys > (len(self.bin_sizes.iloc[0]) - 1)] = len(self.bin_sizes.iloc[0]) - 1
 
             # Loop through every X value and inspect the spec_bins.
@@ -75,7 +84,7 @@ class UpdatingImage(pg.ImageItem):
                     closest_ys = prev_closest_ys
                 else:
                     prev_bins = self.bin_sizes.iloc[i]
-                    closest_ys = np.searchsorted(self.bin_sizes.iloc[i], yp, sorter=y_sort)
+                    closest_ys = np.searchsorted(self.bin_sizes.iloc[i], yp, sorter=bin_sorter(i))
                     closest_ys[closest_ys > (len(self.bin_sizes.iloc[i])-1)] = len(self.bin_sizes.iloc[i]) - 1
                     prev_closest_ys = closest_ys
                 temp_data = self.data.iloc[i][closest_ys].values
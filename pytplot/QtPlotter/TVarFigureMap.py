@@ -145,14 +145,14 @@ class TVarFigureMap(pg.GraphicsLayout):
                 data = np.delete(data, 0)
 
             for column_name in dataset.columns:
-                values = data.tolist()
-                colors = pytplot.tplot_utilities.get_heatmap_color(color_map=
-                                                                   self.colormap[cm_index % len(self.colormap)],
-                                                                   min_val=self.zmin, max_val=self.zmax, values=values,
-                                                                   zscale=self.zscale)
-                brushes = []
-                for color in colors:
-                    brushes.append(pg.mkBrush(color))
+                # Only make a brush for each color of the colormap, and pick the brush of every point from them
+                color_map = self.colormap[cm_index % len(self.colormap)]
+                palette = pytplot.tplot_utilities.get_heatmap_palette(color_map)
+                palette_brushes = np.empty(len(palette), dtype=object)
+                palette_brushes[:] = [pg.mkBrush(color) for color in palette]
+                indices = pytplot.tplot_utilities.get_heatmap_indices(data, self.zmin, self.zmax, len(color_map),
+                                                                      zscale=self.zscale)
+                brushes = palette_brushes[indices].tolist()
                 self.curves.append(self.plotwindow.scatterPlot(lon.tolist(), lat.tolist(),
                                                                pen=pg.mkPen(None), brush=brushes, size=4))
                 cm_index += 1
@@ -307,13 +307,12 @@ class TVarFigureMap(pg.GraphicsLayout):
             self.zmin = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][0]
             self.zmax = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][1]
         else:
-            dataset_temp = pytplot.data_quants[self.tvar_name].where(pytplot.data_quants[self.tvar_name] != np.inf)
-            dataset_temp = dataset_temp.where(dataset_temp != -np.inf)
+            stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants[self.tvar_name])
+            self.zmax = stats['max']
+            self.zmin = stats['min']
             # Cannot have a 0 minimum in a log scale
             if self.zscale == 'log':
-                dataset_temp = dataset_temp.where(dataset_temp > 0)
-            self.zmax = dataset_temp.max().max().values
-            self.zmin = dataset_temp.min().min().values
+                self.zmin = stats['min_positive']
 
     def _addtimebars(self):
         # grab tbardict
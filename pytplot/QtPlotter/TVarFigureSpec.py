@@ -169,7 +169,8 @@ class TVarFigureSpec(pg.GraphicsLayout):
                                  self.ymin,
                                  self.ymax,
                                  self.zmin,
-                                 self.zmax)
+                                 self.zmax,
+                                 pytplot.tplot_utilities.spec_bins_monotonic(pytplot.data_quants[self.tvar_name]))
         self.plotwindow.addItem(specplot)
 
     def _setyaxistype(self):
@@ -351,13 +352,12 @@ class TVarFigureSpec(pg.GraphicsLayout):
             self.zmin = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][0]
             self.zmax = pytplot.data_quants[self.tvar_name].attrs['plot_options']['zaxis_opt']['z_range'][1]
         else:
-            dataset_temp = pytplot.data_quants[self.tvar_name].where(pytplot.data_quants[self.tvar_name] != np.inf)
-            dataset_temp = dataset_temp.where(dataset_temp != -np.inf)
+            stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants[self.tvar_name])
+            self.zmax = stats['max']
+            self.zmin = stats['min']
             # Cannot have a 0 minimum in a log scale
             if self.zscale == 'log':
-                dataset_temp = dataset_temp.where(dataset_temp > 0)
-            self.zmax = dataset_temp.max().max().values
-            self.zmin = dataset_temp.min().min().values
+                self.zmin = stats['min_positive']
 
     def _addtimebars(self):
         # find number of times to plot
@@ -15,6 +15,15 @@ def generate_stack(name,
                    var_label=None,
                    combine_axes=True,
                    vert_spacing=25):
+    # Chunked variables are only computed over the plotted time range
+    with pytplot.tplot_utilities.loaded_time_window(name, var_label):
+        return _generate_stack(name, var_label=var_label, combine_axes=combine_axes, vert_spacing=vert_spacing)
+
+
+def _generate_stack(name,
+                    var_label=None,
+                    combine_axes=True,
+                    vert_spacing=25):
     new_stack = pg.GraphicsLayoutWidget()
     # Variables needed for pyqtgraph plots
     xaxis_thickness = 35
@@ -124,6 +133,7 @@ def _set_pyqtgraph_title(layout):
 
 
 def _get_figure_class(tvar_name, show_xaxis=True):
+    pytplot.tplot_utilities.set_default_y_range(tvar_name)
     if 'plotter' in pytplot.data_quants[tvar_name].attrs['plot_options']['extras'] \
             and pytplot.data_quants[tvar_name].attrs['plot_options']['extras']['plotter'] in \
             pytplot.qt_plotters:
@@ -121,7 +121,8 @@ if using_graphics:
 bokeh_plotters = {'bkTVarFigure1D': HTMLPlotter.TVarFigure1D,
                   'bkTVarFigureMap': HTMLPlotter.TVarFigureMap,
                   'bkTVarFigureAlt': HTMLPlotter.TVarFigureAlt,
-                  'bkTVarFigureSpec': HTMLPlotter.TVarFigureSpec}
+                  'bkTVarFigureSpec': HTMLPlotter.TVarFigureSpec,
+                  'bkTVarFigureSpecImage': HTMLPlotter.TVarFigureSpecImage}
 
 from .store_data import store_data
 from .tplot import tplot
@@ -131,8 +132,10 @@ from .ylim import ylim
 from .zlim import zlim
 from .tlimit import tlimit
 from pytplot.exporters.tplot_save import tplot_save
+from pytplot.exporters.tplot_save_zarr import tplot_save_zarr
 from .tplot_names import tplot_names
 from pytplot.importers.tplot_restore import tplot_restore
+from pytplot.importers.tplot_restore_zarr import tplot_restore_zarr
 from .get_timespan import get_timespan
 from .tplot_options import tplot_options
 from .tplot_rename import tplot_rename
@@ -3,25 +3,33 @@
 # This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
 # Verify current version before use at: https://github.com/MAVENSDC/PyTplot
 
-import pickle
+import os
+import numpy as np
 from pytplot import data_quants, tplot_opt_glob
+from pytplot.tplot_utilities import attrs_to_json, is_dask_array
+
+# Arrays in a variable's binary file start on multiples of this many bytes
+_ALIGNMENT = 64
+
 
 def tplot_save(names, filename=None):
     """
-    This function will save tplot variables into a single file by using the python "pickle" function.
-    This file can then be "restored" using tplot_restore.  This is useful if you want to end the pytplot session,
-    but save all of your data/options.  All variables and plot options can be read back into tplot with the 
-    "tplot_restore" command.  
-    
+    This function will save tplot variables into a ".pytplot" directory.  Each variable's data and coordinates
+    are written as raw binary arrays into one file per variable, and the plot options, metadata and the
+    layout of the binary files are written to a JSON file, "tplot.json".
+    This directory can then be "restored" using tplot_restore.  This is useful if you want to end the pytplot session,
+    but save all of your data/options.  All variables and plot options can be read back into tplot with the
+    "tplot_restore" command, which memory maps the arrays instead of reading them.
+
     Parameters:
         names : str/list
-            A string or a list of strings of the tplot variables you would like saved.  
+            A string or a list of strings of the tplot variables you would like saved.
         filename : str, optional
-            The filename where you want to save the file.  
-            
+            The directory where you want to save the variables.
+
     Returns:
         None
-    
+
     Examples:
         >>> # Save a single tplot variable
         >>> import pytplot
@@ -36,29 +44,85 @@ def tplot_save(names, filename=None):
         names = list(data_quants.keys())[names-1]
     if not isinstance(names, list):
         names = [names]
-    
+
     #Check that we have all available data
     for name in names:
+        if name not in data_quants.keys():
+            print("That name is currently not in pytplot")
+            return
         for oplot_name in data_quants[name].attrs['plot_options']['overplots']:
             if oplot_name not in names:
                 names.append(oplot_name)
-    
-    #Pickle it up
-    to_pickle =[]
-    for name in names:    
-        if name not in data_quants.keys():
-            print("That name is currently not in pytplot") 
-            return
-        to_pickle.append(data_quants[name])
-    
-    num_quants = len(to_pickle)
-    to_pickle = [num_quants] + to_pickle
-    temp_tplot_opt_glob = tplot_opt_glob
-    to_pickle.append(temp_tplot_opt_glob)
-    
+
     if filename==None:
         filename='var_'+'-'.join(names)+'.pytplot'
-    
-    pickle.dump(to_pickle, open(filename, "wb"))
-    
-    return
\ No newline at end of file
+    if os.path.isfile(filename):
+        print(filename + " is an existing file, tplot_save now writes a directory.")
+        return
+    os.makedirs(filename, exist_ok=True)
+
+    variables = []
+    for i, name in enumerate(names):
+        variable = _write_variable(data_quants[name], os.path.join(filename, 'var' + str(i) + '.bin'))
+        variable['name'] = name
+        variables.append(variable)
+
+    _replace_file(os.path.join(filename, 'tplot.json'),
+                  lambda f: f.write(attrs_to_json({'format': 'pytplot', 'version': 1, 'tplot_opt_glob': tplot_opt_glob,
+                                                   'variables': variables}, indent=1).encode('utf-8')))
+
+    # Remove the files of any extra variables from an earlier save to this directory
+    i = len(names)
+    while os.path.isfile(os.path.join(filename, 'var' + str(i) + '.bin')):
+        os.remove(os.path.join(filename, 'var' + str(i) + '.bin'))
+        i += 1
+    return
+
+
+def _write_variable(tvar, path):
+    """
+    Writes the data and coordinates of tvar back to back into the binary file at path, and
+    returns the description of where each array is.
+    """
+    arrays = [('data', tvar.dims, tvar.data)]
+    for coord_name, coord in tvar.coords.items():
+        arrays.append((coord_name, coord.dims, coord.data))
+
+    layout = {}
+    offset = 0
+    for key, dims, values in arrays:
+        dtype = np.dtype(values.dtype)
+        if dtype.kind not in 'biufcmM':
+            print("Cannot save the non-numeric " + key + " array of " + str(tvar.name))
+            continue
+        layout[key] = {'dims': list(dims), 'dtype': dtype.newbyteorder('<').str,
+                       'shape': list(values.shape), 'offset': offset}
+        offset += -(-int(np.prod(values.shape)) * dtype.itemsize // _ALIGNMENT) * _ALIGNMENT
+
+    def write(f):
+        f.truncate(offset)
+        for key, dims, values in arrays:
+            if key not in layout or np.prod(values.shape) == 0:
+                continue
+            mapped = np.memmap(f, dtype=layout[key]['dtype'], mode='r+', offset=layout[key]['offset'],
+                               shape=tuple(values.shape))
+            if is_dask_array(values):
+                import dask.array as da
+                da.store(values, mapped, lock=True)
+            else:
+                mapped[...] = values
+            mapped.flush()
+            del mapped
+
+    _replace_file(path, write)
+    return {'file': os.path.basename(path), 'arrays': layout,
+            'attrs': tvar.attrs}
+
+
+def _replace_file(path, write):
+    # Write a new file and swap it in, so that variables still memory mapped from
+    # an earlier save of this path keep their (now unlinked) data
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w+b') as f:
+        write(f)
+    os.replace(temp_path, path)
@@ -0,0 +1,116 @@
+# Copyright 2018 Regents of the University of Colorado. All Rights Reserved.
+# Released under the MIT license.
+# This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
+# Verify current version before use at: https://github.com/MAVENSDC/PyTplot
+
+from urllib.parse import quote
+import numpy as np
+from pytplot import data_quants, tplot_opt_glob
+from pytplot.tplot_utilities import attrs_to_json, attrs_from_json, is_dask_array
+
+
+def tplot_save_zarr(names, filename, chunks=100000, compressor='default', append=False):
+    """
+    This function will save tplot variables into a zarr store, a directory of compressed chunks of data.
+    Each variable is written into its own group, with its data and its time varying coordinates (spec_bins, v, v1-v3)
+    chunked along time, and its plot options stored as JSON.  The store can be read back into tplot with the
+    "tplot_restore_zarr" command, and the data of new time ranges can be appended to it later.
+
+    .. note::
+        This requires the zarr package.
+
+    Parameters:
+        names : str/list
+            A string or a list of strings of the tplot variables you would like saved.
+        filename : str
+            The directory of the zarr store.
+        chunks : int, optional
+            The number of time records in each chunk.  Chunked (dask backed) variables keep their own chunks.
+        compressor : numcodecs compressor, optional
+            The compressor of the chunks, for example numcodecs.Blosc(cname='zstd', clevel=5).  By default zarr's
+            default compressor is used.  Set to None to store the chunks uncompressed.
+        append : bool, optional
+            If True, the records of variables that are already in the store are appended to it along time,
+            instead of replacing it.  The appended times should come after the stored ones.
+
+    Returns:
+        None
+
+    Examples:
+        >>> # Save a variable, and then add the next day of data to the store
+        >>> import pytplot
+        >>> pytplot.store_data("Variable1", data={'x':[1,2,3,4,5], 'y':[1,2,3,4,5]})
+        >>> pytplot.tplot_save_zarr('Variable1', filename='C:/temp/variables.zarr')
+        >>> pytplot.store_data("Variable1", data={'x':[6,7,8], 'y':[6,7,8]})
+        >>> pytplot.tplot_save_zarr('Variable1', filename='C:/temp/variables.zarr', append=True)
+
+    """
+    try:
+        import zarr
+    except ImportError:
+        print("zarr must be installed to use tplot_save_zarr.")
+        return
+
+    if not isinstance(names, list):
+        names = [names]
+    for name in names:
+        if name not in data_quants.keys():
+            print("That name is currently not in pytplot")
+            return
+
+    root = zarr.open_group(filename, mode='a')
+    for name in names:
+        group = quote(name, safe='')
+        if append and group in root:
+            _append_variable(root, filename, group, data_quants[name])
+        else:
+            _write_variable(filename, group, data_quants[name], chunks, compressor)
+        # A list of [name, group] pairs, since zarr sorts the keys of its attributes
+        variables = root.attrs.get('variables', [])
+        if [name, group] not in variables:
+            root.attrs['variables'] = variables + [[name, group]]
+    root.attrs['tplot_opt_glob'] = attrs_to_json(tplot_opt_glob)
+    return
+
+
+def _to_dataset(tvar):
+    dataset = tvar.to_dataset(name='data')
+    dataset['data'].attrs = {}
+    dataset.attrs = {}
+    return dataset
+
+
+def _encoding(dataset, chunks, compressor):
+    encoding = {}
+    for key, variable in dataset.variables.items():
+        encoding[key] = {}
+        if compressor != 'default':
+            encoding[key]['compressor'] = compressor
+        if 'time' in variable.dims and not is_dask_array(variable.data):
+            encoding[key]['chunks'] = tuple(min(chunks, size) if dim == 'time' else size
+                                            for dim, size in zip(variable.dims, variable.shape))
+    return encoding
+
+
+def _write_variable(filename, group, tvar, chunks, compressor):
+    dataset = _to_dataset(tvar)
+    dataset.attrs['tplot_attrs'] = attrs_to_json(tvar.attrs)
+    dataset.to_zarr(filename, group=group, mode='w', encoding=_encoding(dataset, chunks, compressor))
+
+
+def _append_variable(root, filename, group, tvar):
+    # Only the time varying arrays grow, the others are already in the store
+    attrs = attrs_from_json(root[group].attrs['tplot_attrs'])
+    dataset = _to_dataset(tvar)
+    dataset = dataset.drop_vars([key for key, variable in dataset.variables.items() if 'time' not in variable.dims])
+
+    # Widen the saved time range to cover the new records
+    trange = attrs['plot_options']['trange']
+    attrs['plot_options']['trange'] = [min(trange[0], float(tvar.coords['time'].min())),
+                                       max(trange[1], float(tvar.coords['time'].max()))]
+    monotonic = attrs['plot_options'].get('spec_bins_monotonic')
+    if isinstance(monotonic, np.ndarray):
+        new_monotonic = np.broadcast_to(tvar.attrs['plot_options'].get('spec_bins_monotonic', True), tvar.shape[:1])
+        attrs['plot_options']['spec_bins_monotonic'] = np.concatenate((monotonic, new_monotonic))
+    dataset.attrs['tplot_attrs'] = attrs_to_json(attrs)
+    dataset.to_zarr(filename, group=group, append_dim='time')
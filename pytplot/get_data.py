@@ -20,7 +20,7 @@ def get_data(name, xarray=False, metadata=False):
          
     Returns: tuple of data/dimensions/metadata stored in pytplot
         time_val : numpy array of seconds since 1970
-        data_val : n-dimensional array of data
+        data_val : n-dimensional array of data (a dask array, not yet computed, for chunked variables)
         spec_bins_val (if exists) : spectral bins if the plot is a spectrogram
         v1_val (if exists) : numpy array of v1 dimension coordinates
         v2_val {if exists} : numpy array of v2 dimension coordinates
@@ -13,19 +13,67 @@ try:
 except:
     from cdflib.epochs import CDFepoch as cdfepoch
 
+import hashlib
+import json
+import os
+import pathlib
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
 import xarray as xr
 from pytplot.store_data import store_data
 from pytplot.tplot import tplot
 from pytplot.options import options
 from pytplot import data_quants
+from pytplot.tplot_utilities import is_dask_array, time_to_unix
 import copy
 
+# The metadata of the CDF files read so far (variable lists, attributes, variable inquiries
+# and epoch bounds), by file name.  An entry is only used while the file's modification time
+# and size are unchanged.
+_catalog_cache = {}
+# Where the catalog of each file is also saved (as JSON), so that it is kept from one session to the
+# next.  Only used if the PYTPLOT_CATALOG_DIR environment variable is set, otherwise the catalogs are
+# only kept in memory.  Saved catalogs older than _CATALOG_MAX_AGE seconds are removed, and then the
+# oldest ones until the rest take up at most _CATALOG_MAX_BYTES.
+_catalog_dir = os.environ.get('PYTPLOT_CATALOG_DIR') or None
+_CATALOG_MAX_AGE = 30 * 24 * 3600
+_CATALOG_MAX_BYTES = 64 * 2**20
+
+# Unix times decoded from the epoch variables of CDF files, keyed by the file, the epoch variable,
+# center_measurement and the record range, least recently used first.  The oldest are dropped
+# once the times take up more than _EPOCH_CACHE_BYTES.
+_epoch_cache = OrderedDict()
+_epoch_cache_lock = threading.Lock()
+_EPOCH_CACHE_BYTES = 256 * 2**20
+
+# Seconds from 0000-01-01 (the start of CDF_EPOCH and CDF_EPOCH16) to 1970-01-01
+_EPOCH_TO_UNIX = 62167219200
+# The UTC dates where leap seconds were added, and TAI-UTC (in seconds) from then on
+_LEAP_SECONDS = [((1972, 1), 10), ((1972, 7), 11), ((1973, 1), 12), ((1974, 1), 13), ((1975, 1), 14),
+                 ((1976, 1), 15), ((1977, 1), 16), ((1978, 1), 17), ((1979, 1), 18), ((1980, 1), 19),
+                 ((1981, 7), 20), ((1982, 7), 21), ((1983, 7), 22), ((1985, 7), 23), ((1988, 1), 24),
+                 ((1990, 1), 25), ((1991, 1), 26), ((1992, 7), 27), ((1993, 7), 28), ((1994, 7), 29),
+                 ((1996, 1), 30), ((1997, 7), 31), ((1999, 1), 32), ((2006, 1), 33), ((2009, 1), 34),
+                 ((2012, 7), 35), ((2015, 7), 36), ((2017, 1), 37)]
+# The same dates as unix times and as CDF_TIME_TT2000 values (nanoseconds since J2000, which is
+# 2000-01-01T11:58:55.816 UTC, when TAI-UTC was 32 seconds), and the nanoseconds to add to a
+# CDF_TIME_TT2000 value after each date to get nanoseconds since 1970
+_LEAP_UNIX_NS = np.array(['%04d-%02d-01' % date for date, _ in _LEAP_SECONDS], dtype='M8[ns]').astype(np.int64)
+_LEAP_TT2000_OFFSETS = np.array([(946727936 - (tai_utc - 32)) * 10**9 - 184000000 for _, tai_utc in _LEAP_SECONDS])
+_LEAP_TT2000 = _LEAP_UNIX_NS - _LEAP_TT2000_OFFSETS
+# Past this (in 2262) the unix times no longer fit into 64 bit nanoseconds
+_TT2000_MAX = np.iinfo(np.int64).max - 10**18
+
 
 def cdf_to_tplot(filenames, varformat=None, get_support_data=False,
                  prefix='', suffix='', plot=False, merge=False,
-                 center_measurement=False, notplot=False, varnames=[]):
+                 center_measurement=False, notplot=False, varnames=[], chunks=None,
+                 workers=1, use_processes=False, trange=None, mask_invalid=False):
     """
     This function will automatically create tplot variables from CDF files.  In general, the files should be
     ISTP compliant for this importer to work.  Each variable is read into a new tplot variable (a.k.a an xarray DataArray),
@@ -71,13 +119,31 @@ def cdf_to_tplot(filenames, varformat=None, get_support_data=False,
             access to multi-dimensional data products)
         varnames: list
             Load these variables only. If [] or ['*'], then load everything.
+        chunks: int
+            If set (and dask is installed), the record varying data is not read into memory here.  Instead
+            each file is read lazily in blocks of this many records, and the tplot variables are backed by
+            dask arrays chunked along time.  By default, all data is read in immediately.
+        workers: int
+            The number of files to read at the same time.  The files are still put together in time
+            order, so the result is the same as reading them one at a time.  By default, 1.
+        use_processes: bool
+            If True, the files are read in a pool of worker processes instead of threads.  This avoids
+            python's global interpreter lock, but the data has to be copied back from each process.
+        trange: list of 2 floats/str
+            If set, only the records between these two times (unix seconds or time strings) are read.
+            Files that are entirely outside of the time range are skipped after reading their first
+            and last times.  By default, all records are read.
+        mask_invalid: bool/list of str
+            If True, the values of every variable that are equal to its FILLVAL attribute or outside of its
+            VALIDMIN/VALIDMAX attributes are replaced with NaN, and integer data is converted to floats for this.
+            This can also be a list of the CDF variables to do this for.  By default, only the FILLVAL of float
+            data is replaced.
 
     Returns:
         List of tplot variables created (unless notplot keyword is used).
     """
 
     stored_variables = []
-    epoch_cache = {}
     output_table = {}
     metadata = {}
     
@@ -100,204 +166,36 @@ def cdf_to_tplot(filenames, varformat=None, get_support_data=False,
     if get_support_data:
         var_type.append('support_data')
 
+    if chunks is not None:
+        try:
+            import dask.array
+        except ImportError:
+            print("dask is not installed, reading the data into memory.")
+            chunks = None
+
     varformat = varformat.replace("*", ".*")
     var_regex = re.compile(varformat)
     filenames.sort()
-    for filename in filenames:
-        cdf_file = cdflib.CDF(filename)
-        cdf_info = cdf_file.cdf_info()
-        all_cdf_variables = cdf_info['rVariables'] + cdf_info['zVariables']
-        # User defined variables.
-        if len(varnames) > 0:
-            load_cdf_variables = [value for value in varnames if value in all_cdf_variables]
-        else:
-            load_cdf_variables = all_cdf_variables
-
-        try:
-            gatt = cdf_file.globalattsget()
-        except:
-            gatt={}
-
-        for var in load_cdf_variables:
-            if not re.match(var_regex, var):
-                continue
-            var_atts = cdf_file.varattsget(var)
-
-            if 'VAR_TYPE' not in var_atts:
-                continue
-
-            if var_atts['VAR_TYPE'] in var_type:
-                var_atts = cdf_file.varattsget(var)
-                var_properties = cdf_file.varinq(var)
-                if "DEPEND_TIME" in var_atts:
-                    x_axis_var = var_atts["DEPEND_TIME"]
-                elif "DEPEND_0" in var_atts:
-                    x_axis_var = var_atts["DEPEND_0"]
-                else:
-                    if var_atts['VAR_TYPE'].lower() == 'data':
-                        print("Cannot find x axis.")
-                        print("No attribute named DEPEND_TIME or DEPEND_0 in \
-                          variable " + var)
-                    continue
-                data_type_description \
-                    = cdf_file.varinq(x_axis_var)['Data_Type_Description']
-
-                # Find data name and if it is already in stored variables
-                if 'TPLOT_NAME' in var_atts:
-                    var_name = prefix + var_atts['TPLOT_NAME'] + suffix
-                else:
-                    var_name = prefix + var + suffix
-
-                if epoch_cache.get(filename+x_axis_var) is None:
-                    delta_plus_var = 0.0
-                    delta_minus_var = 0.0
-                    delta_time = 0.0
-
-                    # Skip variables with ValueErrors. 
-                    try:
-                        xdata = cdf_file.varget(x_axis_var)
-                        epoch_var_atts = cdf_file.varattsget(x_axis_var)
-                    except ValueError:
-                        print("Value error for variable: " + var_name)
-                        continue
-
-                    # check for DELTA_PLUS_VAR/DELTA_MINUS_VAR attributes
-                    if center_measurement:
-                        if 'DELTA_PLUS_VAR' in epoch_var_atts:
-                            delta_plus_var = cdf_file.varget(epoch_var_atts['DELTA_PLUS_VAR'])
-                            delta_plus_var_att = cdf_file.varattsget(epoch_var_atts['DELTA_PLUS_VAR'])
-
-                            # check if a conversion to seconds is required
-                            if 'SI_CONVERSION' in delta_plus_var_att:
-                                si_conv = delta_plus_var_att['SI_CONVERSION']
-                                delta_plus_var = delta_plus_var.astype(float)*np.float(si_conv.split('>')[0])
-                            elif 'SI_CONV' in delta_plus_var_att:
-                                si_conv = delta_plus_var_att['SI_CONV']
-                                delta_plus_var = delta_plus_var.astype(float)*np.float(si_conv.split('>')[0])
-
-                        if 'DELTA_MINUS_VAR' in epoch_var_atts:
-                            delta_minus_var = cdf_file.varget(epoch_var_atts['DELTA_MINUS_VAR'])
-                            delta_minus_var_att = cdf_file.varattsget(epoch_var_atts['DELTA_MINUS_VAR'])
-
-                            # check if a conversion to seconds is required
-                            if 'SI_CONVERSION' in delta_minus_var_att:
-                                si_conv = delta_minus_var_att['SI_CONVERSION']
-                                delta_minus_var = delta_minus_var.astype(float)*np.float(si_conv.split('>')[0])
-                            elif 'SI_CONV' in delta_minus_var_att:
-                                si_conv = delta_minus_var_att['SI_CONV']
-                                delta_minus_var = delta_minus_var.astype(float)*np.float(si_conv.split('>')[0])
-
-                        # sometimes these are specified as arrays
-                        if isinstance(delta_plus_var, np.ndarray) and isinstance(delta_minus_var, np.ndarray):
-                            delta_time = (delta_plus_var-delta_minus_var)/2.0
-                        else: # and sometimes constants
-                            if delta_plus_var != 0.0 or delta_minus_var != 0.0:
-                                delta_time = (delta_plus_var-delta_minus_var)/2.0
-
-                if epoch_cache.get(filename + x_axis_var) is None:
-                    if ('CDF_TIME' in data_type_description) or \
-                            ('CDF_EPOCH' in data_type_description):
-                        xdata = cdfepoch.unixtime(xdata)
-                        epoch_cache[filename+x_axis_var] = np.array(xdata)+delta_time
-                else:
-                    xdata = epoch_cache[filename + x_axis_var]
-
-                try:
-                    ydata = cdf_file.varget(var)
-                except:
-                    continue
-
-                if ydata is None:
-                    continue
-                if "FILLVAL" in var_atts:
-                    if (var_properties['Data_Type_Description'] ==
-                            'CDF_FLOAT' or
-                            var_properties['Data_Type_Description'] ==
-                            'CDF_REAL4' or
-                            var_properties['Data_Type_Description'] ==
-                            'CDF_DOUBLE' or
-                            var_properties['Data_Type_Description'] ==
-                            'CDF_REAL8'):
-
-                        if ydata[ydata == var_atts["FILLVAL"]].size != 0:
-                            ydata[ydata == var_atts["FILLVAL"]] = np.nan
-
-                tplot_data = {'x': xdata, 'y': ydata}
-
-
-                # Data may depend on other data in the CDF.
-                depend_1 = None
-                depend_2 = None
-                depend_3 = None
-                if "DEPEND_1" in var_atts:
-                    if var_atts["DEPEND_1"] in all_cdf_variables:
-                        depend_1 = np.array(cdf_file.varget(var_atts["DEPEND_1"]))
-                        # Ignore the depend types if they are strings
-                        if depend_1.dtype.type is np.str_:
-                            depend_1 = None
-                if "DEPEND_2" in var_atts:
-                    if var_atts["DEPEND_2"] in all_cdf_variables:
-                        depend_2 = np.array(cdf_file.varget(var_atts["DEPEND_2"]))
-                        # Ignore the depend types if they are strings
-                        if depend_2.dtype.type is np.str_:
-                            depend_2 = None
-                if "DEPEND_3" in var_atts:
-                    if var_atts["DEPEND_3"] in all_cdf_variables:
-                        depend_3 = np.array(cdf_file.varget(var_atts["DEPEND_3"]))
-                        # Ignore the depend types if they are strings
-                        if depend_3.dtype.type is np.str_:
-                            depend_3 = None
-
-                nontime_varying_depends = []
-
-                if depend_1 is not None and depend_2 is not None and depend_3 is not None:
-                    tplot_data['v1'] = depend_1
-                    tplot_data['v2'] = depend_2
-                    tplot_data['v3'] = depend_3
-
-                    if len(depend_1.shape) == 1:
-                        nontime_varying_depends.append('v1')
-                    if len(depend_2.shape) == 1:
-                        nontime_varying_depends.append('v2')
-                    if len(depend_3.shape) == 1:
-                        nontime_varying_depends.append('v3')
-
-                elif depend_1 is not None and depend_2 is not None:
-                    tplot_data['v1'] = depend_1
-                    tplot_data['v2'] = depend_2
-                    if len(depend_1.shape) == 1:
-                        nontime_varying_depends.append('v1')
-                    if len(depend_2.shape) == 1:
-                        nontime_varying_depends.append('v2')
-                elif depend_1 is not None:
-                    tplot_data['v'] = depend_1
-                    if len(depend_1.shape) == 1:
-                        nontime_varying_depends.append('v')
-                elif depend_2 is not None:
-                    tplot_data['v'] = depend_2
-                    if len(depend_2.shape) == 1:
-                        nontime_varying_depends.append('v')
-
-                metadata[var_name] = {'display_type': var_atts.get("DISPLAY_TYPE", "time_series"),
-                                      'scale_type': var_atts.get("SCALE_TYP", "linear"),
-                                      'var_attrs': var_atts, 'file_name': filename, 'global_attrs': gatt}
-
-                # Check if the variable already exists in the for loop output
-                if var_name not in output_table:
-                    output_table[var_name] = tplot_data
-                else:
-                    # If it does, loop though the existing variable's x,y,v,v2,v3,etc
-                    var_data = output_table[var_name]
-                    for output_var in var_data:
-                        if output_var not in nontime_varying_depends:
-                            if np.asarray(tplot_data[output_var]).ndim == 0 and np.equal(tplot_data[output_var], None):
-                                # If there is nothing in the new variable, then pass
-                                pass
-                            elif np.asarray(var_data[output_var]).ndim == 0 and np.equal(var_data[output_var], None):
-                                # If there is nothing in the old variable, then replace
-                                var_data[output_var] = tplot_data[output_var]
-                            else:  # If they both have something, then concatenate
-                                var_data[output_var] = np.concatenate((var_data[output_var], tplot_data[output_var]))
+    if trange is not None:
+        trange = time_to_unix(list(trange))
+    read_args = (var_regex, var_type, varnames, prefix, suffix, center_measurement, chunks, trange, mask_invalid)
+    if workers > 1 and len(filenames) > 1:
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool(max_workers=workers) as executor:
+            file_results = list(executor.map(_read_cdf_file, filenames, *[repeat(arg) for arg in read_args]))
+    else:
+        file_results = [_read_cdf_file(filename, *read_args) for filename in filenames]
+    _prune_catalogs()
+
+    # Put the files together in time order, whichever finished reading first
+    for file_table, file_metadata in file_results:
+        for var_name, (records, nontime_varying_depends) in file_table.items():
+            _add_to_table(output_table, var_name, records, nontime_varying_depends)
+            metadata[var_name] = file_metadata[var_name]
+    # Now that the size of every variable is known, join each one's records with a single copy
+    output_table = {var_name: {output_var: _join_records(records[output_var], output_var in nontime_varying_depends)
+                               for output_var in records}
+                    for var_name, (records, nontime_varying_depends) in output_table.items()}
 
     if notplot:
         return output_table
@@ -315,7 +213,7 @@ def cdf_to_tplot(filenames, varformat=None, get_support_data=False,
                 attr_dict["CDF"]["VATT"] = metadata[var_name]['var_attrs']
                 attr_dict["CDF"]["GATT"] = metadata[var_name]['global_attrs']
                 attr_dict["CDF"]["FILENAME"] = metadata[var_name]['file_name']
-            store_data(var_name, data=output_table[var_name], attr_dict=attr_dict)
+            store_data(var_name, data=output_table[var_name], attr_dict=attr_dict, chunks=chunks)
         except ValueError:
             continue
 
@@ -343,3 +241,608 @@ def cdf_to_tplot(filenames, varformat=None, get_support_data=False,
         tplot(stored_variables)
 
     return stored_variables
+
+
+def _read_cdf_file(filename, var_regex, var_type, varnames, prefix, suffix, center_measurement, chunks, trange,
+                   mask_invalid):
+    """
+    Reads the variables of one CDF file for cdf_to_tplot, and returns their tplot data and metadata.
+    """
+    # The records [start, stop) inside trange of each x axis variable, None for all of them
+    records_cache = {}
+    output_table = {}
+    metadata = {}
+    cdf_file = _CatalogedCDF(filename)
+    cdf_info = cdf_file.cdf_info()
+    all_cdf_variables = cdf_info['rVariables'] + cdf_info['zVariables']
+    # User defined variables.
+    if len(varnames) > 0:
+        load_cdf_variables = [value for value in varnames if value in all_cdf_variables]
+    else:
+        load_cdf_variables = all_cdf_variables
+
+    try:
+        gatt = cdf_file.globalattsget()
+    except:
+        gatt={}
+
+    for var in load_cdf_variables:
+        if not re.match(var_regex, var):
+            continue
+        var_atts = cdf_file.varattsget(var)
+
+        if 'VAR_TYPE' not in var_atts:
+            continue
+
+        if var_atts['VAR_TYPE'] in var_type:
+            var_properties = cdf_file.varinq(var)
+            if "DEPEND_TIME" in var_atts:
+                x_axis_var = var_atts["DEPEND_TIME"]
+            elif "DEPEND_0" in var_atts:
+                x_axis_var = var_atts["DEPEND_0"]
+            else:
+                if var_atts['VAR_TYPE'].lower() == 'data':
+                    print("Cannot find x axis.")
+                    print("No attribute named DEPEND_TIME or DEPEND_0 in \
+                      variable " + var)
+                continue
+            data_type_description \
+                = cdf_file.varinq(x_axis_var)['Data_Type_Description']
+
+            # Find data name and if it is already in stored variables
+            if 'TPLOT_NAME' in var_atts:
+                var_name = prefix + var_atts['TPLOT_NAME'] + suffix
+            else:
+                var_name = prefix + var + suffix
+
+            is_epoch = ('CDF_TIME' in data_type_description) or ('CDF_EPOCH' in data_type_description)
+            if trange is not None and x_axis_var not in records_cache:
+                records_cache[x_axis_var] = _record_range(cdf_file, x_axis_var, is_epoch, trange)
+            records = records_cache.get(x_axis_var)
+            if records is not None and records[0] == records[1]:
+                # Nothing in the time range
+                continue
+
+            xdata = _unix_times(cdf_file, x_axis_var, is_epoch, center_measurement, records)
+            if xdata is None:
+                print("Value error for variable: " + var_name)
+                continue
+
+            # The (FILLVAL, VALIDMIN, VALIDMAX) to replace with NaN
+            invalid = None
+            if mask_invalid is True or (isinstance(mask_invalid, list) and var in mask_invalid):
+                invalid = (var_atts.get("FILLVAL"), var_atts.get("VALIDMIN"), var_atts.get("VALIDMAX"))
+            elif "FILLVAL" in var_atts:
+                if (var_properties['Data_Type_Description'] ==
+                        'CDF_FLOAT' or
+                        var_properties['Data_Type_Description'] ==
+                        'CDF_REAL4' or
+                        var_properties['Data_Type_Description'] ==
+                        'CDF_DOUBLE' or
+                        var_properties['Data_Type_Description'] ==
+                        'CDF_REAL8'):
+                    invalid = (var_atts["FILLVAL"], None, None)
+
+            try:
+                if chunks is not None and var_properties['Rec_Vary'] and var_properties['Last_Rec'] >= 0:
+                    ydata = _lazy_varget(cdf_file, filename, var, var_properties, invalid, chunks, records)
+                else:
+                    ydata = _varget(cdf_file, var, records)
+            except:
+                continue
+
+            if ydata is None:
+                continue
+            if invalid is not None and not is_dask_array(ydata):
+                ydata = _mask_invalid(ydata, *invalid)
+
+            tplot_data = {'x': xdata, 'y': ydata}
+
+
+            # Data may depend on other data in the CDF.
+            depend_1 = None
+            depend_2 = None
+            depend_3 = None
+            if "DEPEND_1" in var_atts:
+                if var_atts["DEPEND_1"] in all_cdf_variables:
+                    depend_1 = np.array(_varget(cdf_file, var_atts["DEPEND_1"], records))
+                    # Ignore the depend types if they are strings
+                    if depend_1.dtype.type is np.str_:
+                        depend_1 = None
+            if "DEPEND_2" in var_atts:
+                if var_atts["DEPEND_2"] in all_cdf_variables:
+                    depend_2 = np.array(_varget(cdf_file, var_atts["DEPEND_2"], records))
+                    # Ignore the depend types if they are strings
+                    if depend_2.dtype.type is np.str_:
+                        depend_2 = None
+            if "DEPEND_3" in var_atts:
+                if var_atts["DEPEND_3"] in all_cdf_variables:
+                    depend_3 = np.array(_varget(cdf_file, var_atts["DEPEND_3"], records))
+                    # Ignore the depend types if they are strings
+                    if depend_3.dtype.type is np.str_:
+                        depend_3 = None
+
+            nontime_varying_depends = []
+
+            if depend_1 is not None and depend_2 is not None and depend_3 is not None:
+                tplot_data['v1'] = depend_1
+                tplot_data['v2'] = depend_2
+                tplot_data['v3'] = depend_3
+
+                if len(depend_1.shape) == 1:
+                    nontime_varying_depends.append('v1')
+                if len(depend_2.shape) == 1:
+                    nontime_varying_depends.append('v2')
+                if len(depend_3.shape) == 1:
+                    nontime_varying_depends.append('v3')
+
+            elif depend_1 is not None and depend_2 is not None:
+                tplot_data['v1'] = depend_1
+                tplot_data['v2'] = depend_2
+                if len(depend_1.shape) == 1:
+                    nontime_varying_depends.append('v1')
+                if len(depend_2.shape) == 1:
+                    nontime_varying_depends.append('v2')
+            elif depend_1 is not None:
+                tplot_data['v'] = depend_1
+                if len(depend_1.shape) == 1:
+                    nontime_varying_depends.append('v')
+            elif depend_2 is not None:
+                tplot_data['v'] = depend_2
+                if len(depend_2.shape) == 1:
+                    nontime_varying_depends.append('v')
+
+            metadata[var_name] = {'display_type': var_atts.get("DISPLAY_TYPE", "time_series"),
+                                  'scale_type': var_atts.get("SCALE_TYP", "linear"),
+                                  'var_attrs': var_atts, 'file_name': filename, 'global_attrs': gatt}
+
+            _add_to_table(output_table, var_name, {output_var: [tplot_data[output_var]] for output_var in tplot_data},
+                          nontime_varying_depends)
+
+    cdf_file.save()
+    return output_table, metadata
+
+
+class _CatalogedCDF(object):
+    """
+    Stands in for a cdflib.CDF in _read_cdf_file.  The file's metadata comes from _catalog_cache,
+    or from the catalog saved in _catalog_dir (if set), when the file hasn't changed since it was cataloged,
+    and the file is only opened when something that isn't cached (like the data) is read.  Files
+    read in worker processes (use_processes=True) are cataloged in that process, and through
+    _catalog_dir for the next reads.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        stat = os.stat(filename)
+        key = (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+        if _catalog_cache.get(key[0], {}).get('key') != key:
+            _catalog_cache[key[0]] = _load_catalog(key)
+        self.catalog = _catalog_cache[key[0]]
+        self.changed = False
+        self._cdf = None
+
+    def cached(self, item, read):
+        if item not in self.catalog:
+            self.catalog[item] = read()
+            self.changed = True
+        return self.catalog[item]
+
+    def save(self):
+        # Only written when something new was cataloged
+        if self.changed:
+            _save_catalog(self.catalog)
+            self.changed = False
+
+    @property
+    def cdf(self):
+        if self._cdf is None:
+            self._cdf = cdflib.CDF(self.filename)
+        return self._cdf
+
+    def cdf_info(self):
+        return self.cached('cdf_info', lambda: self.cdf.cdf_info())
+
+    def globalattsget(self):
+        return self.cached('globalattsget', lambda: self.cdf.globalattsget())
+
+    def varattsget(self, var):
+        # A copy, since the attributes end up in the tplot variable's attrs
+        return dict(self.cached(('varattsget', var), lambda: self.cdf.varattsget(var)))
+
+    def varinq(self, var):
+        return self.cached(('varinq', var), lambda: self.cdf.varinq(var))
+
+    def varget(self, *args, **kwargs):
+        return self.cdf.varget(*args, **kwargs)
+
+
+def _catalog_path(path):
+    return os.path.join(_catalog_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+
+
+def _to_json(value):
+    # JSON only has str keys, lists and a few scalar types, so the rest of what cdflib returns
+    # is written as a one item dict naming its type
+    if isinstance(value, dict):
+        return {'dict': [[_to_json(k), _to_json(v)] for k, v in value.items()]}
+    if isinstance(value, tuple):
+        return {'tuple': [_to_json(v) for v in value]}
+    if isinstance(value, list):
+        return [_to_json(v) for v in value]
+    if isinstance(value, (np.ndarray, np.generic)) and value.dtype.kind in 'biufU':
+        return {'ndarray' if isinstance(value, np.ndarray) else 'scalar': value.tolist(), 'dtype': value.dtype.str}
+    if isinstance(value, pathlib.PurePath):
+        return {'path': str(value)}
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    raise TypeError('Cannot save a ' + type(value).__name__ + ' in a CDF catalog')
+
+
+def _from_json(value):
+    if isinstance(value, list):
+        return [_from_json(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if 'dict' in value:
+        return {_from_json(k): _from_json(v) for k, v in value['dict']}
+    if 'tuple' in value:
+        return tuple(_from_json(v) for v in value['tuple'])
+    if 'ndarray' in value:
+        return np.array(value['ndarray'], dtype=value['dtype'])
+    if 'scalar' in value:
+        return np.array(value['scalar'], dtype=value['dtype'])[()]
+    return pathlib.Path(value['path'])
+
+
+def _load_catalog(key):
+    # The saved catalog of the file in key, or a new one if it wasn't saved or the file has changed since
+    if _catalog_dir is not None:
+        try:
+            with open(_catalog_path(key[0]), 'r') as catalog_file:
+                catalog = _from_json(json.load(catalog_file))
+            if catalog.get('key') == key:
+                return catalog
+        except Exception:
+            pass
+    return {'key': key}
+
+
+def _save_catalog(catalog):
+    # The catalog is only a cache, so nothing is lost if it can't be saved
+    if _catalog_dir is None:
+        return
+    path = _catalog_path(catalog['key'][0])
+    temp_path = path + '.' + str(os.getpid()) + '.' + str(threading.get_ident())
+    try:
+        os.makedirs(_catalog_dir, exist_ok=True)
+        with open(temp_path, 'w') as catalog_file:
+            json.dump(_to_json(catalog), catalog_file)
+        # Replaced in one step, so a catalog being read is never half written
+        os.replace(temp_path, path)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def _prune_catalogs():
+    # Removes the saved catalogs that are too old, then the oldest until the rest fit in _CATALOG_MAX_BYTES
+    if _catalog_dir is None:
+        return
+    try:
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                         for entry in os.scandir(_catalog_dir) if entry.is_file())
+    except OSError:
+        return
+    total_bytes = sum(size for _, size, _ in entries)
+    oldest_kept = time.time() - _CATALOG_MAX_AGE
+    for mtime, size, path in entries:
+        if mtime >= oldest_kept and total_bytes <= _CATALOG_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total_bytes -= size
+
+
+def _add_to_table(output_table, var_name, records, nontime_varying_depends):
+    """
+    Adds the lists of records (of x, y, v, v1, etc) read for var_name to output_table.  The records
+    are only collected here, and joined by _join_records once all of the files are read, so that
+    every array is copied once instead of once per file.
+    """
+    # Check if the variable already exists in the output
+    if var_name not in output_table:
+        output_table[var_name] = (records, nontime_varying_depends)
+        return
+    # If it does, loop though the existing variable's x,y,v,v2,v3,etc
+    var_records = output_table[var_name][0]
+    for output_var in var_records:
+        if output_var not in nontime_varying_depends:
+            var_records[output_var] += records[output_var]
+
+
+def _join_records(records, nontime_varying):
+    """
+    Joins the list of records read from each file into one array.  The records are copied into an
+    array of the joined size one file at a time, and each is let go of once it is copied, so the
+    memory of the files is given back as the joined array fills up.
+    """
+    # Depends that don't vary in time come from the first file
+    if nontime_varying:
+        return _own_copy(records[0])
+    # Skip the files with nothing in them
+    filled = [record for record in records if not _is_empty(record)]
+    if len(filled) == 0:
+        return _own_copy(records[0])
+    if len(filled) == 1:
+        return _own_copy(filled[0])
+    if any(is_dask_array(record) for record in filled):
+        import dask.array as da
+        return da.concatenate(filled)
+    filled = [np.asarray(record) for record in filled]
+    records.clear()
+    joined = np.empty((sum(len(record) for record in filled),) + filled[0].shape[1:], dtype=np.result_type(*filled))
+    start = 0
+    filled.reverse()
+    while filled:
+        record = filled.pop()
+        joined[start:start + len(record)] = record
+        start += len(record)
+    return joined
+
+
+def _is_empty(value):
+    # Never converts a lazy array, that would read it in
+    if is_dask_array(value):
+        return False
+    return np.asarray(value).ndim == 0 and np.equal(value, None)
+
+
+def _lazy_varget(cdf_file, filename, var, var_properties, invalid, chunks, records=None):
+    """
+    Builds a dask array over the records of var (or the records [start, stop) in records), reading
+    blocks of chunks records from the file only when they are computed.
+    """
+    import dask
+    import dask.array as da
+
+    start, stop = records if records is not None else (0, var_properties['Last_Rec'] + 1)
+    first_record = np.asarray(cdf_file.varget(var, startrec=start, endrec=start))
+    if first_record.dtype.kind not in 'biuf':
+        return _varget(cdf_file, var, records)
+    record_shape = tuple(var_properties['Dim_Sizes']) if var_properties['Num_Dims'] > 0 else ()
+    dtype = _mask_invalid(first_record, *invalid).dtype if invalid is not None else first_record.dtype
+
+    blocks = []
+    for startrec in range(start, stop, chunks):
+        endrec = min(startrec + chunks, stop) - 1
+        block = dask.delayed(_read_records)(filename, var, startrec, endrec, dtype, record_shape, invalid)
+        blocks.append(da.from_delayed(block, shape=(endrec - startrec + 1,) + record_shape, dtype=dtype))
+    return da.concatenate(blocks)
+
+
+def _own_copy(values):
+    # The times from _epoch_cache are read-only and shared by every variable using them, so each
+    # variable returned to the caller gets its own writable copy
+    if isinstance(values, np.ndarray) and not values.flags.writeable:
+        return values.copy()
+    return values
+
+
+def _unix_times(cdf_file, x_axis_var, is_epoch, center_measurement, records):
+    """
+    Returns the times of the x axis variable x_axis_var (only the records [start, stop) in records,
+    if set) as unix times, centered by DELTA_PLUS_VAR/DELTA_MINUS_VAR if center_measurement is set.
+    The times are decoded once, and then shared from _epoch_cache until the file changes, so the
+    returned array is read-only; _join_records copies it before it leaves cdf_to_tplot.
+    Returns None if the variable can't be read.
+    """
+    key = cdf_file.catalog['key'] + (x_axis_var, center_measurement, records)
+    with _epoch_cache_lock:
+        if key in _epoch_cache:
+            _epoch_cache.move_to_end(key)
+            return _epoch_cache[key]
+
+    xdata = _decode_times(cdf_file, x_axis_var, is_epoch, center_measurement, records)
+    if xdata is None:
+        return None
+    xdata.setflags(write=False)
+    with _epoch_cache_lock:
+        _epoch_cache[key] = xdata
+        # Forget the least recently used times once the cache is too big, but keep this one
+        while len(_epoch_cache) > 1 and sum(times.nbytes for times in _epoch_cache.values()) > _EPOCH_CACHE_BYTES:
+            _epoch_cache.popitem(last=False)
+    return xdata
+
+
+def _decode_times(cdf_file, x_axis_var, is_epoch, center_measurement, records):
+    delta_plus_var = 0.0
+    delta_minus_var = 0.0
+    delta_time = 0.0
+
+    # Skip variables with ValueErrors.
+    try:
+        xdata = _varget(cdf_file, x_axis_var, records)
+        epoch_var_atts = cdf_file.varattsget(x_axis_var)
+    except ValueError:
+        return None
+
+    # check for DELTA_PLUS_VAR/DELTA_MINUS_VAR attributes
+    if center_measurement:
+        if 'DELTA_PLUS_VAR' in epoch_var_atts:
+            delta_plus_var = _varget(cdf_file, epoch_var_atts['DELTA_PLUS_VAR'], records)
+            delta_plus_var_att = cdf_file.varattsget(epoch_var_atts['DELTA_PLUS_VAR'])
+
+            # check if a conversion to seconds is required
+            if 'SI_CONVERSION' in delta_plus_var_att:
+                si_conv = delta_plus_var_att['SI_CONVERSION']
+                delta_plus_var = delta_plus_var.astype(float)*np.float(si_conv.split('>')[0])
+            elif 'SI_CONV' in delta_plus_var_att:
+                si_conv = delta_plus_var_att['SI_CONV']
+                delta_plus_var = delta_plus_var.astype(float)*np.float(si_conv.split('>')[0])
+
+        if 'DELTA_MINUS_VAR' in epoch_var_atts:
+            delta_minus_var = _varget(cdf_file, epoch_var_atts['DELTA_MINUS_VAR'], records)
+            delta_minus_var_att = cdf_file.varattsget(epoch_var_atts['DELTA_MINUS_VAR'])
+
+            # check if a conversion to seconds is required
+            if 'SI_CONVERSION' in delta_minus_var_att:
+                si_conv = delta_minus_var_att['SI_CONVERSION']
+                delta_minus_var = delta_minus_var.astype(float)*np.float(si_conv.split('>')[0])
+            elif 'SI_CONV' in delta_minus_var_att:
+                si_conv = delta_minus_var_att['SI_CONV']
+                delta_minus_var = delta_minus_var.astype(float)*np.float(si_conv.split('>')[0])
+
+        # sometimes these are specified as arrays
+        if isinstance(delta_plus_var, np.ndarray) and isinstance(delta_minus_var, np.ndarray):
+            delta_time = (delta_plus_var-delta_minus_var)/2.0
+        else: # and sometimes constants
+            if delta_plus_var != 0.0 or delta_minus_var != 0.0:
+                delta_time = (delta_plus_var-delta_minus_var)/2.0
+
+
+    if is_epoch:
+        return _epochs_to_unix(xdata) + delta_time
+    # Times that aren't CDF epochs are used as they are
+    return np.array(xdata)
+
+
+def _epochs_to_unix(epochs):
+    """
+    Converts CDF_EPOCH (float milliseconds), CDF_EPOCH16 (complex seconds and picoseconds) or
+    CDF_TIME_TT2000 (integer nanoseconds) values to unix times with array arithmetic, looking up the
+    leap seconds of TT2000 values in _LEAP_SECONDS.  Times inside a leap second (23:59:60) become the
+    start of the next day, since unix time has no leap seconds.  Values this can't convert (TT2000
+    values before 1972 or after 2262, and fill values) are left to cdflib.
+    """
+    epochs = np.asarray(epochs)
+    shape = epochs.shape
+    epochs = epochs.reshape(-1)
+    unix_times = np.empty(epochs.shape, dtype=np.float64)
+
+    if epochs.dtype.kind == 'c':
+        seconds = epochs.real
+        valid = (seconds >= 0) & (seconds < 315569520000)
+        unix_times[valid] = (seconds[valid] - _EPOCH_TO_UNIX) + epochs.imag[valid] * 1e-12
+    elif epochs.dtype.kind in 'iu':
+        epochs = epochs.astype(np.int64, copy=False)
+        valid = (epochs >= _LEAP_TT2000[0]) & (epochs <= _TT2000_MAX)
+        tt2000 = epochs[valid]
+        leap = np.searchsorted(_LEAP_TT2000, tt2000, side='right') - 1
+        unix_ns = tt2000 + _LEAP_TT2000_OFFSETS[leap]
+        # Inside a leap second the times would run on into the next day, so hold them at its start
+        next_day = np.append(_LEAP_UNIX_NS[1:], np.iinfo(np.int64).max)[leap]
+        np.minimum(unix_ns, next_day, out=unix_ns)
+        # Whole seconds and nanoseconds separately, since float64 can't hold all of the nanoseconds
+        unix_times[valid] = (unix_ns // 10**9) + (unix_ns % 10**9) * 1e-9
+    else:
+        milliseconds = epochs.astype(np.float64, copy=False)
+        valid = (milliseconds >= 0) & (milliseconds < 315569520000000)
+        unix_times[valid] = milliseconds[valid] / 1000.0 - _EPOCH_TO_UNIX
+
+    if not valid.all():
+        # As python numbers, since cdflib picks the conversion by their type
+        invalid = epochs[~valid].tolist()
+        try:
+            unix_times[~valid] = cdfepoch.unixtime(invalid)
+        except ValueError:
+            # cdflib can't convert TT2000 values from both before and after 1972 together
+            unix_times[~valid] = [cdfepoch.unixtime(epoch)[0] for epoch in invalid]
+    return unix_times.reshape(shape)
+
+
+def _varget(cdf_file, var, records):
+    # Reads all of var, or only the records [start, stop) if var varies by record
+    if records is None or not cdf_file.varinq(var)['Rec_Vary']:
+        return cdf_file.varget(var)
+    return cdf_file.varget(var, startrec=records[0], endrec=records[1] - 1)
+
+
+def _record_range(cdf_file, x_axis_var, is_epoch, trange):
+    """
+    Finds the records [start, stop) of x_axis_var that are inside trange.  If the first and last
+    records show that the file is outside of trange, nothing else is read.  Otherwise only the
+    records visited by a binary search are read and converted to unix times.
+    """
+    num_records = cdf_file.varinq(x_axis_var)['Last_Rec'] + 1
+    if num_records == 0:
+        return 0, 0
+
+    def to_unix(record):
+        value = cdf_file.varget(x_axis_var, startrec=record, endrec=record)
+        if is_epoch:
+            value = _epochs_to_unix(value)
+        return float(np.ravel(value)[0])
+
+    first, last = cdf_file.cached(('epoch_bounds', x_axis_var), lambda: (to_unix(0), to_unix(num_records - 1)))
+    if last < trange[0] or first > trange[1]:
+        return 0, 0
+
+    def first_record_after(time, inclusive):
+        low, high = 0, num_records
+        while low < high:
+            middle = (low + high) // 2
+            middle_time = to_unix(middle)
+            if middle_time < time or (middle_time == time and not inclusive):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    return first_record_after(trange[0], True), first_record_after(trange[1], False)
+
+
+def _read_records(filename, var, startrec, endrec, dtype, record_shape, invalid):
+    block = cdflib.CDF(filename).varget(var, startrec=startrec, endrec=endrec)
+    block = np.array(block, dtype=dtype).reshape((endrec - startrec + 1,) + record_shape)
+    if invalid is not None:
+        block = _mask_invalid(block, *invalid)
+    return block
+
+
+def _mask_invalid(values, fillval=None, validmin=None, validmax=None, block_size=65536):
+    """
+    Replaces the values equal to fillval, below validmin or above validmax with NaN, in one pass
+    over values.  This works in place, a block of records at a time, so that the only temporaries
+    are block sized masks.  Integer data is converted to float64 first (the only full size copy),
+    and data that isn't numeric is returned as it is.
+
+    validmin and validmax may also have a value per element of a record.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in 'biuf' or (fillval is None and validmin is None and validmax is None):
+        return values
+    if values.dtype.kind != 'f' or not values.flags.writeable:
+        values = values.astype(np.float64)
+
+    bounds = []
+    for bound in [fillval, validmin, validmax]:
+        # Compare in the data's own precision
+        bound = np.asarray(bound, dtype=values.dtype) if bound is not None else None
+        if bound is not None and bound.size == 1:
+            bound = bound.reshape(())
+        # A value per record element only works if it matches the shape of a record
+        elif bound is not None and bound.shape != values.shape[1:]:
+            bound = None
+        bounds.append(bound)
+    fillval, validmin, validmax = bounds
+
+    records = values.reshape(1) if values.ndim == 0 else values
+    rows = max(1, block_size // max(1, int(np.prod(records.shape[1:]))))
+    tests = [(np.equal, fillval), (np.less, validmin), (np.greater, validmax)]
+    tests = [(test, bound) for test, bound in tests if bound is not None]
+    # The masks are reused for every block
+    mask = np.empty((rows,) + records.shape[1:], dtype=bool)
+    test_mask = np.empty_like(mask)
+    for start in range(0, records.shape[0], rows):
+        block = records[start:start + rows]
+        block_mask = mask[:len(block)]
+        tests[0][0](block, tests[0][1], out=block_mask)
+        for test, bound in tests[1:]:
+            block_mask |= test(block, bound, out=test_mask[:len(block)])
+        np.copyto(block, np.nan, where=block_mask)
+    return values
@@ -1,7 +1,16 @@
 import numpy as np
-import xarray as xr
 from pytplot import tplot, data_quants, store_data
 import calendar
+import copy
+import re
+
+# The length of each time unit of netCDF "<units> since <date>" times, in seconds
+_TIME_UNITS = {'microseconds': 1e-6, 'microsecond': 1e-6, 'us': 1e-6,
+               'milliseconds': 1e-3, 'millisecond': 1e-3, 'ms': 1e-3,
+               'seconds': 1.0, 'second': 1.0, 'secs': 1.0, 'sec': 1.0, 's': 1.0,
+               'minutes': 60.0, 'minute': 60.0, 'mins': 60.0, 'min': 60.0,
+               'hours': 3600.0, 'hour': 3600.0, 'hrs': 3600.0, 'hr': 3600.0, 'h': 3600.0,
+               'days': 86400.0, 'day': 86400.0, 'd': 86400.0}
 
 
 def change_time_to_unix_time(time_var):
@@ -9,7 +18,19 @@ def change_time_to_unix_time(time_var):
     # A function that takes a variable with units of 'seconds/minutes/hours/etc. since YYYY-MM-DD:HH:MM:SS/etc
     # and converts the variable to seconds since epoch
     units = time_var.units
-    dates = num2date(time_var[:], units=units)
+    calendar_name = getattr(time_var, 'calendar', 'standard').lower()
+    time_var.set_auto_mask(False)
+    values = time_var[:]
+    match = re.match(r'\s*(\w+)\s+since\s+', units)
+    if match and match.group(1).lower() in _TIME_UNITS and calendar_name in ['standard', 'gregorian',
+                                                                            'proleptic_gregorian']:
+        # The times are a scale and an offset away from unix times, so only the reference date is decoded
+        reference = num2date(0, units=units, calendar=calendar_name)
+        offset = calendar.timegm(reference.timetuple()) + reference.microsecond / 1e6
+        return np.asarray(values, dtype=np.float64) * _TIME_UNITS[match.group(1).lower()] + offset
+
+    # Calendars without leap years etc. have to be decoded a date at a time
+    dates = num2date(values, units=units, calendar=calendar_name)
     unix_times = list()
     for date in dates:
         unix_time = calendar.timegm(date.timetuple())
@@ -17,7 +38,31 @@ def change_time_to_unix_time(time_var):
     return unix_times
 
 
-def netcdf_to_tplot(filenames, time ='', prefix='', suffix='', plot=False, merge=False):
+def _read_variable(variable):
+    """
+    Reads all of a netCDF variable, with the values netCDF4 masks (_FillValue, missing_value, valid_min,
+    valid_max and valid_range) as NaN.  A missing_value that netCDF4 can't use, like a string, is applied
+    to float variables too.  Integer variables with masked values are returned as floats.
+    """
+    values = variable[:]
+    if np.ma.is_masked(values):
+        # We want to force missing values to be nan so that plots don't look strange
+        if values.dtype.kind not in 'fc':
+            values = values.astype(np.float64)
+        values = np.ma.filled(values, np.nan)
+    else:
+        values = np.ma.getdata(values)
+    try:
+        missing_value = np.float64(getattr(variable, 'missing_value'))
+    except (AttributeError, TypeError, ValueError):
+        return values
+    if values.dtype.kind == 'f' and not np.isnan(missing_value).all():
+        values[values == np.float32(missing_value)] = np.nan
+    return values
+
+
+def netcdf_to_tplot(filenames, time ='', prefix='', suffix='', plot=False, merge=False, varnames=[],
+                    remove_duplicates=False):
     '''
     This function will automatically create tplot variables from CDF files.
 
@@ -25,7 +70,8 @@ def netcdf_to_tplot(filenames, time ='', prefix='', suffix='', plot=False, merge
         filenames : str/list of str
             The file names and full paths of netCDF files.
         time: str
-            The name of the netCDF file's time variable.
+            The name of the netCDF file's time variable.  By default, 'time_tag' or 'time' is used if the
+            file has one of them.  Otherwise, the variables of the file are printed and nothing is loaded.
         prefix: str
             The tplot variable names will be given this prefix.  By default,
             no prefix is added.
@@ -37,8 +83,14 @@ def netcdf_to_tplot(filenames, time ='', prefix='', suffix='', plot=False, merge
             variables generated from this function will be on the same plot.
             By default, a plot is not created.
         merge: bool
-            If True, then data from different netCDF files will be merged into
-            a single pytplot variable.
+            The records of all of the files are always put together, in time order, into a single
+            pytplot variable per netCDF variable.  If True, they are also merged with the data
+            already in the pytplot variables of the same names.
+        varnames: list
+            Load these variables only. If [] or ['*'], then load everything.
+        remove_duplicates: bool
+            If True, records with the same time as another record (for example from overlapping files)
+            are only kept once, from the file loaded last.  By default, all records are kept.
 
     Returns:
         List of tplot variables created.
@@ -61,6 +113,10 @@ def netcdf_to_tplot(filenames, time ='', prefix='', suffix='', plot=False, merge
     stored_variables = []
     global data_quants
 
+    if len(varnames) > 0:
+        if '*' in varnames:
+            varnames = []
+
     if isinstance(filenames, str):
         filenames = [filenames]
     elif isinstance(filenames, list):
@@ -69,82 +125,138 @@ def netcdf_to_tplot(filenames, time ='', prefix='', suffix='', plot=False, merge
         print("Invalid filenames input.")
         #return stored_variables
 
+    # Find the time variable, the number of records and the variables to store of each file without
+    # reading any data, so that each variable can then be read straight into an array of its final size
+    layouts = []
     for filename in filenames:
-
-        # Read in file
-        file = Dataset(filename, "r+")
-
-        # Creating dictionary that will contain variables and their attributes
-        vars_and_atts = {}
-        for name, variable in file.variables.items():
-            vars_and_atts[name] = {}
-            for attrname in variable.ncattrs():
-                vars_and_atts[name][attrname] = getattr(variable, attrname)
-
-        # Filling in missing values for each variable with np.nan (if values are not already nan)
-        # and saving the masked variables to a new dictionary
-        masked_vars = {}  # Dictionary containing properly masked variables
-        for var in vars_and_atts.keys():
-            reg_var = file.variables[var]
-            try:
-                var_fill_value = vars_and_atts[var]['missing_value']
-                if np.isnan(var_fill_value) != True:
-                    # We want to force missing values to be nan so that plots don't look strange
-                    var_mask = np.ma.masked_where(reg_var == np.float32(var_fill_value), reg_var)
-                    var_filled = np.ma.filled(var_mask, np.nan)
-                    masked_vars[var] = var_filled
-                elif np.isnan(var_fill_value) == True:
-                    # missing values are already np.nan, don't need to do anything
-                    var_filled = reg_var
-                    masked_vars[var] = var_filled
-            except:  # continue # Go to next iteration, this variable doesn't have data to mask (probably just a descriptor variable (i.e., 'base_time')
-                var_filled = reg_var
-                masked_vars[var] = var_filled
-
-        # Most files are from GOES data, which seems to usually have 'time_tag' in them that contain time information.
-        # There is an exception filter below that will allow a user to pick a different time variable if time_tag doesn't exist.
-        if time != '':
-            time_var = file[time]
-            unix_times = change_time_to_unix_time(time_var)
-
-        elif time == '':
-            time = input('Please enter time variable name. \nVariable list: {l}'.format(l=vars_and_atts.keys()))
-            while True:
-                if time not in vars_and_atts.keys():
-                    # Making sure we input a valid response (i.e., the variable exists in the dataset), and also avoiding
-                    # plotting a time variable against time.... because I don't even know what that would mean and uncover.
-                    print('Not a valid variable name, please try again.')
+        with Dataset(filename, "r") as file:
+            # Most files are from GOES data, which seems to usually have 'time_tag' in them that contain time information.
+            time_name = time
+            if time_name == '':
+                time_name = next((name for name in ['time_tag', 'time'] if name in file.variables), '')
+            if time_name not in file.variables:
+                print('Time variable ' + repr(time_name) + ' not found in ' + filename + '. Set time to one of: ' +
+                      ', '.join(file.variables.keys()))
+                continue
+            num_records = len(file[time_name])
+            variables = {}
+            for var in file.variables:
+                if len(varnames) > 0 and var not in varnames:
                     continue
-                elif time in vars_and_atts.keys():
-                    time_var = time
-                    unix_times = change_time_to_unix_time(time_var)
-
-        for i,var in enumerate(file.variables):
-            # Here, we are making sure that the variables are time-based, otherwise we don't want to store them as tplot variables!
-            if 'record' in file[var].dimensions[0] or 'time' in file[var].dimensions[0]:
-                # Store the data now, as well as merge variables if that's desired
-                var_name = prefix + var + suffix
-                to_merge = False
-                if (var_name in data_quants.keys() and (merge == True)):
-                    prev_data_quant = data_quants[var_name].values
-                    to_merge = True
-
-                tplot_data = {'x': unix_times, 'y': masked_vars[var]}
-                store_data(var_name, tplot_data)
-                if var_name not in stored_variables:
-                    stored_variables.append(var_name)
-
-                if to_merge == True:
-                    cur_data_quant = data_quants[var_name].values
-                    merged_data = [prev_data_quant, cur_data_quant]
-                    data_quants[var_name].values = xr.concat(merged_data).values
-
-                # If we are interested in seeing a quick plot of the variables, do it
-                if plot:
-                    tplot(stored_variables)
+                # Here, we are making sure that the variables are time-based, otherwise we don't want to store
+                # them as tplot variables!
+                dimensions = file[var].dimensions
+                if len(dimensions) > 0 and ('record' in dimensions[0] or 'time' in dimensions[0]) and \
+                        file[var].shape[0] == num_records:
+                    # The type of the values after scale_factor and add_offset are applied, not the packed type
+                    variables[var] = (file[var].shape[1:], file[var][:1].dtype)
+            layouts.append((filename, time_name, num_records, variables))
+
+    # The rows of each file, after the rows of the tplot variables being merged into
+    starts = np.cumsum([0] + [layout[2] for layout in layouts])
+    fields = {}
+    for _, _, _, variables in layouts:
+        for var, (record_shape, dtype) in variables.items():
+            fields.setdefault(var, (record_shape, dtype))
+    arrays = {}
+    merged_times = {}
+    merged_attrs = {}
+    for var, (record_shape, dtype) in fields.items():
+        var_name = prefix + var + suffix
+        # Rows of files without the variable are filled with NaN
+        if dtype.kind not in 'fc' and not all(var in variables and variables[var] == (record_shape, dtype)
+                                             for _, _, _, variables in layouts):
+            dtype = np.float64
+        prev_records = 0
+        if var_name in data_quants.keys() and merge:
+            prev_data_quant = data_quants[var_name]
+            if prev_data_quant.shape[1:] == record_shape:
+                prev_records = len(prev_data_quant)
+                merged_times[var] = prev_data_quant.coords['time'].values
+                merged_attrs[var] = prev_data_quant.attrs
+                dtype = np.result_type(prev_data_quant.dtype, dtype)
             else:
-                # If the variable isn't time-bound, we're going to look at the next variable
-                continue
+                print("Cannot merge " + var_name + ", the shape of its records has changed.")
+        arrays[var] = np.empty((prev_records + starts[-1],) + record_shape, dtype=dtype)
+        if prev_records > 0:
+            arrays[var][:prev_records] = prev_data_quant.values
+
+    unix_times = np.empty(starts[-1])
+    for f, (filename, time_name, num_records, variables) in enumerate(layouts):
+        # Read in file.  The variables are only read into their rows of the arrays.
+        with Dataset(filename, "r") as file:
+            unix_times[starts[f]:starts[f + 1]] = change_time_to_unix_time(file[time_name])
+            for var, array in arrays.items():
+                first = len(array) - starts[-1]
+                rows = array[first + starts[f]:first + starts[f + 1]]
+                if var in variables and variables[var][0] == rows.shape[1:]:
+                    values = _read_variable(file[var])
+                    if values.dtype.kind == 'f' and array.dtype.kind not in 'fc':
+                        # Masked values turned integers into floats, so the whole variable has to be
+                        arrays[var] = array = array.astype(np.float64)
+                        rows = array[first + starts[f]:first + starts[f + 1]]
+                    rows[...] = values
+                else:
+                    rows[...] = np.nan
+
+    # The order of the times shared by all of the variables that aren't merged
+    order = _record_order(unix_times, remove_duplicates)
+    for var, array in arrays.items():
+        var_name = prefix + var + suffix
+        if var in merged_times:
+            times = np.concatenate((merged_times[var], unix_times))
+            var_order = _record_order(times, remove_duplicates)
+        else:
+            times = unix_times
+            var_order = order
+        if var_order is not None:
+            times = times[var_order]
+            array = array[var_order]
+
+        # Store the data now, as well as merge variables if that's desired
+        tplot_data = {'x': times, 'y': array}
+        # The arrays were only just made, so the tplot variable can take them over
+        store_data(var_name, tplot_data, copy=array.dtype.kind not in 'biuf')
+        if var in merged_attrs:
+            # Keep the plot options of the variable that was merged into
+            data_quants[var_name].attrs = _merged_attrs(merged_attrs[var], data_quants[var_name].attrs)
+        if var_name not in stored_variables:
+            stored_variables.append(var_name)
+
+    # If we are interested in seeing a quick plot of the variables, do it
+    if plot:
+        tplot(stored_variables)
+
+    return stored_variables
+
+
+def _merged_attrs(prev_attrs, attrs):
+    """
+    Returns the attributes of a merged tplot variable: those of the variable merged into (prev_attrs),
+    with the plot options that depend on the data (the time range and the order of the bins) from the
+    attributes the merged variable was stored with (attrs).  A y range that was set automatically is
+    dropped, so that it is found again from all of the data.
+    """
+    merged = copy.deepcopy(prev_attrs)
+    plot_options = merged['plot_options']
+    for key in ['trange', 'spec_bins_ascending', 'spec_bins_monotonic']:
+        plot_options[key] = attrs['plot_options'][key]
+    if plot_options['yaxis_opt'].pop('auto_y_range', False):
+        plot_options['yaxis_opt'].pop('y_range', None)
+    return merged
 
-        return stored_variables
 
+def _record_order(times, remove_duplicates):
+    """
+    Returns the indices that sort the records by time (keeping the order that records with the same
+    time were loaded in), and only the last loaded of each time if remove_duplicates is set.
+    Returns None if the records are already in order (and there are no duplicates to remove).
+    """
+    in_order = np.all(times[1:] > times[:-1]) if remove_duplicates else np.all(times[1:] >= times[:-1])
+    if in_order:
+        return None
+    order = np.argsort(times, kind='stable')
+    if remove_duplicates:
+        sorted_times = times[order]
+        order = order[np.append(sorted_times[1:] != sorted_times[:-1], True)]
+    return order
@@ -4,14 +4,28 @@
 # Verify current version before use at: https://github.com/MAVENSDC/Pydivide
 
 import os
-import datetime
+import re
+import hashlib
 import numpy as np
 import xarray as xr
 import pytplot
 import copy
-import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-def sts_to_tplot(sts_file=None, read_only=False, prefix='', suffix='', merge=True, notplot=False):
+# The column and vector names of the STS headers parsed so far, by the length and the hash of the text
+# from the start of the RECORD object to the start of the data.  Files with the same text there have the
+# same layout, and their data starts the same number of bytes after their RECORD object, whatever the
+# rest of their headers say.
+_layout_cache = {}
+# The line that starts the RECORD object, and how much of a file is searched for it
+_RECORD_START = re.compile(rb'^[ \t]*OBJECT[ \t]+=[ \t]+RECORD[ \t]*\r?$', re.MULTILINE)
+_HEAD_BYTES = 2**16
+# The columns of the TIME vector that the record times are made from, in the order _sts_times takes them
+_TIME_COLUMNS = ['TIME_YEAR', 'TIME_DOY', 'TIME_HOUR', 'TIME_MIN', 'TIME_SEC', 'TIME_MSEC']
+
+
+def sts_to_tplot(sts_file=None, read_only=False, prefix='', suffix='', merge=True, notplot=False, workers=1,
+                 use_processes=False):
     """
     Read in a given filename in situ file into a dictionary object
     Optional keywords maybe used to downselect instruments returned
@@ -21,21 +35,30 @@ def sts_to_tplot(sts_file=None, read_only=False, prefix='', suffix='', merge=Tru
         filename: str/list of str
             The file names and full paths of STS files to be read and parsed.
         read_only: boolean
-            If True, just reads data into dict and returns the dict.
+            If True, just reads data into dict and returns the dict.  Each column is a float array, and
+            the times are in the 'time_unix' array as unix seconds.  (Before pytplot read the columns into
+            numpy arrays, they were lists of strings, and 'time_unix' was a list of datetime objects.)
             If False, loads data into dict and loads data in the dict into tplot variables.
         prefix: str
             The tplot variable names will be given this prefix.  By default,
-            no prefix is added.
+            no prefix is added.  Vector variables keep their names from the header.
         suffix: str
             The tplot variable names will be given this suffix.  By default,
-            no suffix is added.
+            no suffix is added.  Vector variables keep their names from the header.
+        merge: boolean
+            If True, the data is merged into existing tplot variables of the same names.
+        workers: int
+            The number of files to read at the same time.  The records of each file are put into the
+            arrays of the tplot variables as soon as they are read, in the order of the files.  By default, 1.
+        use_processes: boolean
+            If True, the files are read in a pool of worker processes instead of threads.  This avoids
+            python's global interpreter lock, but the records have to be copied back from each process.
     Output:
         Either a dictionary (data structure) containing up to all of the columns included
         in a STS data file, or tplot variable names.
     """
 
     # Create a dictionary and list in which we'll store STS variable data and variable names, respectively
-    start_t = time.time()
     sts_dict = {}
     stored_variables = []
 
@@ -48,84 +71,80 @@ def sts_to_tplot(sts_file=None, read_only=False, prefix='', suffix='', merge=Tru
         print("Invalid filenames input.")
         return stored_variables
     sts_file.sort()
-    for s_file in sts_file:
-        column_names, vec_names = read_column_names(s_file)
-        headers = [item for sublist in column_names for item in sublist]
-        with open(s_file, 'r') as f:
-            lines = f.readlines()
-        # In STS files, the beginning of the data starts after the last time 'END_OBJECT' is found
-        end_objects = [l for l, line in enumerate(lines) if 'END_OBJECT' in line]
-        end_headers = end_objects[-1]
-        data = lines[end_headers+1:]
-        data = [d.strip().split() for d in data]  # Remove extra spaces, then split on whitespaces
-        # Create the STS dictionary
-        for h, head in enumerate(headers):
-            data_column = [d[h] for d in data]
-            if head not in sts_dict:
-                sts_dict[head] = data_column
-            else:
-                sts_dict[head].extend(data_column)
-
-    # We need to create datetime objects from the sts_dict's year, doy, hour, min, sec, and msec data
-    year = sts_dict['TIME_YEAR']
-    doy = sts_dict['TIME_DOY']
-    hour = sts_dict['TIME_HOUR']
-    min = sts_dict['TIME_MIN']
-    sec = sts_dict['TIME_SEC']
-    msec = sts_dict['TIME_MSEC']
-
-    dtimes = [datetime.datetime(int(yr),1,1,int(hr),int(mn),int(s),int(ms), tzinfo=datetime.timezone.utc) + datetime.timedelta(int(dy)-1)
-              for yr, dy, hr, mn, s, ms in zip(year, doy, hour, min, sec, msec)]
-    sts_dict['time_unix'] = dtimes
-    # These keys are no longer necessary, nix them
-    remove_time_keys = ['TIME_YEAR', 'TIME_DOY', 'TIME_HOUR', 'TIME_MIN', 'TIME_SEC', 'TIME_MSEC']
-    for key in remove_time_keys:
-        try:
-            sts_dict.pop(key)
-        except KeyError:
-            print('Key {} was not found'.format(key))
+
+    # Read the headers first, to know the fields of all of the files
+    layouts = [_read_sts_layout(s_file) for s_file in sts_file]
+    fields = {}
+    for column_names, vec_names, _ in layouts:
+        for cn, vn in zip(column_names, vec_names):
+            if vn != 'TIME':
+                fields.setdefault(vn if vn is not None else cn[0], (cn, vn is not None))
+    offsets = [layout[2] for layout in layouts]
+    num_columns = [sum(len(cn) for cn in layout[0]) for layout in layouts]
+
+    if workers > 1 and len(sts_file) > 1 and use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    elif workers > 1 and len(sts_file) > 1:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = None
+
+    # The records of each file are put into arrays that are made bigger when they fill up.  They start
+    # out big enough for as many records as the first file has in every file.
+    size = 0
+    time_unix = np.empty(0)
+    arrays = {name: np.empty((0, len(cn)) if is_vector else 0) for name, (cn, is_vector) in fields.items()}
+    try:
+        records = (executor.map if executor is not None else map)(_read_sts_records, sts_file, offsets, num_columns)
+        for f, data in enumerate(records):
+            if size + len(data) > len(time_unix):
+                capacity = max(size + len(data), 2 * len(time_unix), len(data) * len(sts_file))
+                time_unix = _grow(time_unix, size, capacity)
+                arrays = {name: _grow(array, size, capacity) for name, array in arrays.items()}
+            _store_sts_records(data, layouts[f], arrays, time_unix, size)
+            size += len(data)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    time_unix = time_unix[:size]
+    arrays = {name: array[:size] for name, array in arrays.items()}
+
+    # The columns of the vectors are views of the vector arrays
+    for name, (cn, is_vector) in fields.items():
+        if is_vector:
+            for c, column_name in enumerate(cn):
+                sts_dict[column_name] = arrays[name][:, c]
+        else:
+            sts_dict[name] = arrays[name]
+    sts_dict['time_unix'] = time_unix
 
     # Don't create tplot vars if that's not what's desired
     if read_only:
         return sts_dict
 
-    for var_name in sts_dict.keys():
+    for name, (_, is_vector) in fields.items():
+        # create variable name, vectors are named as in the header
+        obs_specific = name if is_vector else prefix + name + suffix
+        # if all values are NaN, continue
+        if np.all(np.isnan(arrays[name])):
+            continue
         to_merge = False
-        if var_name in pytplot.data_quants.keys() and merge:
-            prev_data_quant = pytplot.data_quants[var_name]
+        if obs_specific in pytplot.data_quants.keys() and merge:
+            prev_data_quant = pytplot.data_quants[obs_specific]
             to_merge = True
-        # create variable name
-        obs_specific = prefix + var_name + suffix
-        # if all values are NaN, continue
-        if all(v is None for v in sts_dict[var_name]):
+        # store data in tplot variable, which takes over the array instead of copying it.  Each
+        # variable gets its own times, so that changing the times of one doesn't change the others.
+        try:
+            pytplot.store_data(obs_specific, data={'x': time_unix.copy(), 'y': arrays[name]}, copy=False)
+        except ValueError:
             continue
-        # store data in tplot variable
-        if var_name != 'time_unix':
-            try:
-                pytplot.store_data(
-                    obs_specific, data={'x': sts_dict['time_unix'], 'y': [np.float(val) for val in sts_dict[var_name]]})
-            except ValueError:
-                continue
+        stored_variables.append(obs_specific)
 
         if to_merge is True:
-            cur_data_quant = pytplot.data_quants[var_name]
-            plot_options = copy.deepcopy(pytplot.data_quants[var_name].attrs)
-            pytplot.data_quants[var_name] = xr.concat([prev_data_quant, cur_data_quant], dim='time').sortby('time')
-            pytplot.data_quants[var_name].attrs = plot_options
-
-    # Now merge vectors
-    for cn,vn in zip(column_names, vec_names):
-        if vn == 'TIME':
-            continue
-        if vn is not None:
-            names_to_join = []
-            for c in cn:
-                names_to_join.append(prefix+c+suffix)
-            pytplot.join_vec(names_to_join, vn, merge=True)
-            stored_variables.append(vn)
-            pytplot.del_data(names_to_join)
-        else:
-            stored_variables.append(prefix+cn[0]+suffix)
+            cur_data_quant = pytplot.data_quants[obs_specific]
+            plot_options = copy.deepcopy(pytplot.data_quants[obs_specific].attrs)
+            pytplot.data_quants[obs_specific] = xr.concat([prev_data_quant, cur_data_quant], dim='time').sortby('time')
+            pytplot.data_quants[obs_specific].attrs = plot_options
 
     if notplot:
         return sts_dict
@@ -134,6 +153,94 @@ def sts_to_tplot(sts_file=None, read_only=False, prefix='', suffix='', merge=Tru
 
 
 def read_column_names(sts_file):
+    with open(sts_file, 'rb') as f:
+        return _read_sts_header(f)
+
+
+def _read_sts_layout(s_file):
+    """
+    Reads the column names and vector names from the header of the STS file s_file, and returns
+    them with the offset of its data block in the file.  The header is only parsed if the text from
+    its RECORD object to its data isn't in _layout_cache.
+    """
+    with open(s_file, 'rb') as f:
+        head = f.read(_HEAD_BYTES)
+        record = _RECORD_START.search(head)
+        if record is not None:
+            start = record.start()
+            for length in {length for length, _ in _layout_cache if start + length <= len(head)}:
+                key = (length, hashlib.sha1(head[start:start + length]).hexdigest())
+                # The data has to start where the cached layout says, and not just with the same text
+                if key in _layout_cache and _starts_with_record(head[start + length:]):
+                    names = _layout_cache[key]
+                    return names[0], names[1], start + length
+
+        f.seek(0)
+        names = _read_sts_header(f)
+        _skip_to_data(f)
+        offset = f.tell()
+    if record is not None and offset <= len(head):
+        _layout_cache[(offset - start, hashlib.sha1(head[start:offset]).hexdigest())] = names
+    return names[0], names[1], offset
+
+
+def _starts_with_record(text):
+    # Whether the first line of text that isn't blank is a record, or there are no more lines
+    for line in text.splitlines():
+        words = line.split()
+        if words:
+            try:
+                float(words[0])
+                return True
+            except ValueError:
+                return False
+    return True
+
+
+def _read_sts_records(s_file, offset, num_columns):
+    # Streams the data block of s_file, from offset in the file, into one float array
+    with open(s_file, 'rb') as f:
+        f.seek(offset)
+        data = np.loadtxt(f, dtype=np.float64, ndmin=2)
+    if data.size == 0:
+        data = data.reshape((0, num_columns))
+    return data
+
+
+def _grow(array, size, capacity):
+    # A bigger array for capacity rows, with the first size rows of array
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+
+def _store_sts_records(data, layout, arrays, time_unix, start):
+    """
+    Copies the columns of the records of one file (data) into the rows of arrays from start on, which
+    have a vector shaped array for each vector of the header and a 1D array for each scalar, and
+    puts their times into time_unix.  Fields this file doesn't have are filled with NaN.
+    """
+    column_names, vec_names = layout[:2]
+    columns = {}
+    c = 0
+    for cn, vn in zip(column_names, vec_names):
+        columns[vn if vn is not None else cn[0]] = slice(c, c + len(cn))
+        c += len(cn)
+    column_index = {name: i for i, name in enumerate(name for cn in column_names for name in cn)}
+    end = start + len(data)
+    time_unix[start:end] = _sts_times(*(data[:, column_index[name]] for name in _TIME_COLUMNS))
+    for name, array in arrays.items():
+        if name in columns and columns[name].stop - columns[name].start == int(np.prod(array.shape[1:])):
+            array[start:end] = data[:, columns[name]].reshape((len(data),) + array.shape[1:])
+        else:
+            array[start:end] = np.nan
+
+
+def _read_sts_header(f):
+    """
+    Reads the column names and vector names of the RECORD object in the header of the open (binary)
+    STS file f.  This stops at the END_OBJECT of the RECORD, where the data starts.
+    """
     column_names = []
     vec_names = []
     record_object = False
@@ -141,41 +248,67 @@ def read_column_names(sts_file):
     in_vector_object = False
     in_scalar_object = False
 
-    with open(sts_file, 'r') as f:
-        for line in f:
-            line = line.split()
-            if line == ["OBJECT","=","RECORD"]:
-                record_object = True
-            if record_object:
-                if line == ["OBJECT", "=", "VECTOR"]:
-                    in_vector_object = True
-                    vec_column_names = []
-                if line == ["OBJECT", "=", "SCALAR"]:
-                    if in_vector_object:
-                        in_scalar_and_vector_object = True
-                    else:
-                        in_scalar_object = True
-                if line == ["END_OBJECT"]:
-                    if in_scalar_and_vector_object:
-                        in_scalar_and_vector_object = False
-                    elif in_vector_object:
-                        in_vector_object = False
-                        column_names.append(vec_column_names)
-                    elif in_scalar_object:
-                        in_scalar_object = False
-                    else:
-                        # This is where we exit
-                        return column_names, vec_names
-                if line[0] == "NAME":
-                    if in_vector_object and not in_scalar_and_vector_object:
-                        vec_name = line[-1]
-                        vec_names.append(vec_name)
-                    if in_scalar_and_vector_object:
-                        column_name = vec_name+"_"+line[-1]
-                        vec_column_names.append(column_name)
-                    if in_scalar_object:
-                        column_name = line[-1]
-                        column_names.append([column_name])
-                        vec_names.append(None)
+    for line in iter(f.readline, b''):
+        line = line.decode('latin-1').split()
+        if line == ["OBJECT","=","RECORD"]:
+            record_object = True
+        if record_object:
+            if line == ["OBJECT", "=", "VECTOR"]:
+                in_vector_object = True
+                vec_column_names = []
+            if line == ["OBJECT", "=", "SCALAR"]:
+                if in_vector_object:
+                    in_scalar_and_vector_object = True
+                else:
+                    in_scalar_object = True
+            if line == ["END_OBJECT"]:
+                if in_scalar_and_vector_object:
+                    in_scalar_and_vector_object = False
+                elif in_vector_object:
+                    in_vector_object = False
+                    column_names.append(vec_column_names)
+                elif in_scalar_object:
+                    in_scalar_object = False
+                else:
+                    # This is where we exit
+                    return column_names, vec_names
+            if line and line[0] == "NAME":
+                if in_vector_object and not in_scalar_and_vector_object:
+                    vec_name = line[-1]
+                    vec_names.append(vec_name)
+                if in_scalar_and_vector_object:
+                    column_name = vec_name+"_"+line[-1]
+                    vec_column_names.append(column_name)
+                if in_scalar_object:
+                    column_name = line[-1]
+                    column_names.append([column_name])
+                    vec_names.append(None)
+    return column_names, vec_names
+
+
+def _skip_to_data(f):
+    """
+    Moves the open (binary) STS file f from the END_OBJECT of the RECORD to the start of the data, which is
+    after the last END_OBJECT of the header, since the RECORD can be inside of other objects.
+    """
+    data_start = f.tell()
+    for line in iter(f.readline, b''):
+        words = line.split()
+        if not words:
+            continue
+        if b'END_OBJECT' in line:
+            data_start = f.tell()
+            continue
+        try:
+            float(words[0])
+            # The first record
+            break
+        except ValueError:
+            pass
+    f.seek(data_start)
 
 
+def _sts_times(year, doy, hour, minute, sec, msec):
+    # The days from 1970 to the first of January of each year
+    new_year = (year.astype(np.int64) - 1970).astype('M8[Y]').astype('M8[D]').astype(np.int64)
+    return (new_year + doy - 1) * 86400.0 + hour * 3600.0 + minute * 60.0 + sec + msec / 1000.0
@@ -6,16 +6,21 @@
 import os
 import pickle
 import numpy as np
+import xarray as xr
 from pytplot import data_quants, tplot_opt_glob
+from pytplot.tplot_utilities import attrs_from_json, time_to_unix
 from pytplot.options import options
 from pytplot.store_data import store_data
 from pytplot.tplot_options import tplot_options
 from scipy.io import readsav
 
 
-def tplot_restore(filename):
+def tplot_restore(filename, varnames=None, trange=None, allow_pickle=False):
     """
     This function will restore tplot variables that have been saved with the "tplot_save" command.
+    The saved arrays are memory mapped rather than read, so restoring is fast no matter how large
+    the variables are, and only the parts of the data that are used get read from disk.  The
+    restored data is read-only; copy it to change it.
     
     .. note::
         This function is compatible with the IDL tplot_save routine.  
@@ -24,7 +29,14 @@ def tplot_restore(filename):
     
     Parameters:
         filename : str
-            The file name and full path generated by the "tplot_save" command.  
+            The directory and full path generated by the "tplot_save" command.  
+        varnames : str/list of str, optional
+            Restore only these variables.  By default, all saved variables are restored.
+        trange : list, optional
+            Restore only the data between these two times (unix seconds or time strings).
+        allow_pickle : bool, optional
+            Files saved by older versions of pytplot are python pickles, which can run arbitrary code
+            when they are loaded.  Set this to True to restore them anyway, only for files you trust.
             
     Returns:
         None
@@ -37,6 +49,9 @@ def tplot_restore(filename):
     """
     
     #Error check
+    if os.path.isdir(filename):
+        _restore_directory(filename, varnames, trange)
+        return
     if not (os.path.isfile(filename)):
         print("Not a valid file name")
         return
@@ -104,10 +119,75 @@ def tplot_restore(filename):
             #temp_tplot['tv'][0][1]['Y'][0] is y axis options
         ####################################################################
     else:
+        if not allow_pickle:
+            print(filename + " was saved by an older pytplot as a pickle.  If you trust this file, restore it "
+                  "with allow_pickle=True, and then save it again with tplot_save.")
+            return
         temp = pickle.load(open(filename,"rb"))
         num_data_quants = temp[0]
         for i in range(0, num_data_quants):
             data_quants[temp[i+1].name] = temp[i+1]
-        tplot_opt_glob = temp[num_data_quants+1]
+        tplot_opt_glob.update(temp[num_data_quants+1])
     
-    return
\ No newline at end of file
+    return
+
+
+def _restore_directory(filename, varnames, trange):
+    if not os.path.isfile(os.path.join(filename, 'tplot.json')):
+        print("Not a valid pytplot save directory")
+        return
+    with open(os.path.join(filename, 'tplot.json'), 'r') as f:
+        saved = attrs_from_json(f.read())
+
+    if isinstance(varnames, str):
+        varnames = [varnames]
+    if trange is not None:
+        trange = time_to_unix(list(trange))
+
+    for variable in saved['variables']:
+        if varnames is not None and variable['name'] not in varnames:
+            continue
+        arrays = {}
+        for key, layout in variable['arrays'].items():
+            arrays[key] = _map_array(os.path.join(filename, variable['file']), layout)
+
+        if trange is not None and 'time' in arrays:
+            # The times are sorted, so the range is a slice of every time varying array
+            start = np.searchsorted(arrays['time'], trange[0], side='left')
+            stop = np.searchsorted(arrays['time'], trange[1], side='right')
+            for key, layout in variable['arrays'].items():
+                if len(layout['dims']) > 0 and layout['dims'][0] == 'time':
+                    arrays[key] = arrays[key][start:stop]
+            _restrict_plot_options(variable['attrs'].get('plot_options'), arrays['time'], start, stop)
+
+        coords = {key: (variable['arrays'][key]['dims'], arrays[key]) for key in arrays if key != 'data'}
+        data_quants[variable['name']] = xr.DataArray(arrays['data'], dims=variable['arrays']['data']['dims'],
+                                                     coords=coords, name=variable['name'],
+                                                     attrs=variable['attrs'])
+
+    tplot_opt_glob.update(saved['tplot_opt_glob'])
+    return
+
+
+def _restrict_plot_options(plot_options, times, start, stop):
+    # The plot options that describe all of the saved records, updated for only records [start, stop)
+    if plot_options is None:
+        return
+    if len(times) > 0:
+        plot_options['trange'] = [float(np.nanmin(times)), float(np.nanmax(times))]
+    if np.ndim(plot_options.get('spec_bins_monotonic')) == 1:
+        plot_options['spec_bins_monotonic'] = np.asarray(plot_options['spec_bins_monotonic'])[start:stop]
+    # An automatic y range is computed again for the restored data, one set by the user is kept
+    if plot_options['yaxis_opt'].pop('auto_y_range', False):
+        plot_options['yaxis_opt'].pop('y_range', None)
+
+
+def _map_array(path, layout):
+    shape = tuple(layout['shape'])
+    if np.prod(shape) == 0:
+        empty = np.empty(shape, dtype=layout['dtype'])
+        empty.flags.writeable = False
+        return empty
+    # Read-only, so that the saved file is never changed, and the data statistics can be cached
+    return np.memmap(path, dtype=layout['dtype'], mode='r', offset=layout['offset'], shape=shape)
+
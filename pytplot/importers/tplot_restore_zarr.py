@@ -0,0 +1,66 @@
+# Copyright 2018 Regents of the University of Colorado. All Rights Reserved.
+# Released under the MIT license.
+# This software was developed at the University of Colorado's Laboratory for Atmospheric and Space Physics.
+# Verify current version before use at: https://github.com/MAVENSDC/PyTplot
+
+import os
+import xarray as xr
+from pytplot import data_quants, tplot_opt_glob
+from pytplot.tplot_utilities import attrs_from_json
+
+
+def tplot_restore_zarr(filename, varnames=None, chunks=None):
+    """
+    This function will restore tplot variables that have been saved with the "tplot_save_zarr" command.
+
+    .. note::
+        This requires the zarr package.
+
+    Parameters:
+        filename : str
+            The directory of the zarr store.
+        varnames : str/list of str, optional
+            Restore only these variables.  By default, all variables in the store are restored.
+        chunks : int, optional
+            If set, the data is not read into memory.  Instead the restored variables are backed by
+            dask arrays with this many records in each chunk.  By default, the data is read in.
+
+    Returns:
+        List of tplot variables restored.
+
+    Examples:
+        >>> # Restore the variables saved in the tplot_save_zarr example
+        >>> import pytplot
+        >>> pytplot.tplot_restore_zarr('C:/temp/variables.zarr')
+
+    """
+    try:
+        import zarr
+    except ImportError:
+        print("zarr must be installed to use tplot_restore_zarr.")
+        return []
+
+    if not os.path.isdir(filename):
+        print("Not a valid file name")
+        return []
+    root = zarr.open_group(filename, mode='r')
+    if 'variables' not in root.attrs:
+        print("Not a zarr store written by tplot_save_zarr")
+        return []
+
+    if isinstance(varnames, str):
+        varnames = [varnames]
+    restored = []
+    for name, group in root.attrs['variables']:
+        if varnames is not None and name not in varnames:
+            continue
+        dataset = xr.open_zarr(filename, group=group, chunks={'time': chunks} if chunks is not None else None)
+        tvar = dataset['data'].rename(name)
+        if chunks is None:
+            tvar = tvar.load()
+        tvar.attrs = attrs_from_json(dataset.attrs['tplot_attrs'])
+        data_quants[name] = tvar
+        restored.append(name)
+
+    tplot_opt_glob.update(attrs_from_json(root.attrs['tplot_opt_glob']))
+    return restored
@@ -6,7 +6,6 @@
 from pytplot import data_quants
 import pytplot
 import numpy as np
-from pytplot import tplot_utilities as utilities
 from copy import deepcopy
 
 def options(name, option=None, value=None, opt_dict=None):
@@ -48,6 +47,10 @@ def options(name, option=None, value=None, opt_dict=None):
         basemap             str          Full path and name of a background image for "Map" plots.
         alpha               flt          Number between [0,1], gives the transparancy of the plot lines.
         thick               flt          Sets plot line width.
+        decimate            str/bool     How lines with more than about 4 points per pixel are reduced before
+                                         being sent to the browser by bokeh.  'minmax' (the default) keeps the
+                                         first, last, smallest and largest point in each pixel, 'lttb' uses the
+                                         Largest Triangle Three Buckets algorithm, and False plots every point.
         yrange              flt list     Two numbers that give the y axis range of the plot.
         zrange              flt list     Two numbers that give the z axis range of the plot.
         xrange_slice        flt list     Two numbers that give the x axis range of spectrogram slicing plots.
@@ -57,7 +60,8 @@ def options(name, option=None, value=None, opt_dict=None):
         ysubtitle           str          Subtitle shown on the y axis.
         zsubtitle           str          Subtitle shown on the z axis.  Spec plots only.
         plotter             str          Allows a user to implement their own plotting script in place of the ones
-                                         herein.
+                                         herein.  'bkTVarFigureSpecImage' draws a spectrogram as a single image
+                                         with bokeh, sized to the window instead of to the data.
         crosshair_x         str          Title for x-axis crosshair.
         crosshair_y         str          Title for y-axis crosshair.
         crosshair_z         str          Title for z-axis crosshair.
@@ -133,11 +137,11 @@ def options(name, option=None, value=None, opt_dict=None):
                         print(f"{i} does not contain coordinates for spectrogram plotting.  Continuing...")
                     else:
                         data_quants[i].attrs['plot_options']['extras']['spec'] = value
-                        data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = utilities.get_y_range(data_quants[i])
+                        data_quants[i].attrs['plot_options']['yaxis_opt'].pop('y_range', None)
 
                 else:
                     data_quants[i].attrs['plot_options']['extras']['spec'] = value
-                    data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = utilities.get_y_range(data_quants[i])
+                    data_quants[i].attrs['plot_options']['yaxis_opt'].pop('y_range', None)
 
             if option == 'alt':
                 _reset_plots(i)
@@ -225,8 +229,17 @@ def options(name, option=None, value=None, opt_dict=None):
             if option == 'thick':
                 data_quants[i].attrs['plot_options']['line_opt']['line_width'] = value
 
+            if option == 'decimate':
+                if value is True:
+                    value = 'minmax'
+                if value and value not in ['minmax', 'lttb']:
+                    print("Invalid value. Should be 'minmax', 'lttb' or False")
+                    return
+                data_quants[i].attrs['plot_options']['extras']['decimate'] = value
+
             if option == 'yrange' or option == 'y_range':
                 data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = [value[0], value[1]]
+                data_quants[i].attrs['plot_options']['yaxis_opt'].pop('auto_y_range', None)
 
             if option == 'zrange' or option == 'z_range':
                 data_quants[i].attrs['plot_options']['zaxis_opt']['z_range'] = [value[0], value[1]]
@@ -304,7 +317,7 @@ def options(name, option=None, value=None, opt_dict=None):
                     data_dict['v' + str(value)] = v2_values
                     pytplot.store_data(i, data=data_dict)
                     data_quants[i].attrs = attr_dict
-                    data_quants[i].attrs['plot_options']['yaxis_opt']['y_range'] = utilities.get_y_range(data_quants[i])
+                    data_quants[i].attrs['plot_options']['yaxis_opt'].pop('y_range', None)
 
 
     return
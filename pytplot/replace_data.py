@@ -39,15 +39,18 @@ def replace_data(tplot_name, new_data):
         print(f"{tplot_name} is currently not in pytplot")
         return
 
-    new_data_np = np.asarray(new_data)
-    shape_old = pytplot.data_quants[tplot_name].values.shape
-    shape_new = new_data_np.shape
+    # Chunked (dask) data is kept lazy rather than being converted to a numpy array
+    if not utilities.is_dask_array(new_data):
+        new_data = np.asarray(new_data)
+    shape_old = pytplot.data_quants[tplot_name].shape
+    shape_new = new_data.shape
     if shape_old != shape_new:
         print(f"Dimensions do not match for replace data. {shape_new} does not equal {shape_old}.  Returning...")
         return
 
-    pytplot.data_quants[tplot_name].values = new_data_np
+    pytplot.data_quants[tplot_name].data = new_data
 
-    pytplot.data_quants[tplot_name].attrs['plot_options']['yaxis_opt']['y_range'] = utilities.get_y_range(pytplot.data_quants[tplot_name])
+    # Recompute the y range the next time the variable is plotted
+    pytplot.data_quants[tplot_name].attrs['plot_options']['yaxis_opt'].pop('y_range', None)
 
     return
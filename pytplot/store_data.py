@@ -12,11 +12,11 @@ from .del_data import del_data
 import pytplot
 import xarray as xr
 from pytplot import tplot_utilities as utilities
-import copy
+from copy import deepcopy
 tplot_num = 1
 
 
-def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
+def store_data(name, data=None, delete=False, newname=None, attr_dict={}, copy=True, chunks=None):
     
     """
     This function creates a "Tplot Variable" based on the inputs, and
@@ -30,8 +30,9 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
             A python dictionary object.  
             
             'x' should be a 1-dimensional array that represents the data's x axis.  Typically this data is time,
-            represented in seconds since epoch (January 1st 1970)
-            
+            represented in seconds since epoch (January 1st 1970).  numpy datetime64 arrays, pandas DatetimeIndex
+            objects, and lists of datetime objects or datetime strings are also accepted and converted in bulk.
+
             'y' should be the data values. This can be 2 dimensions if multiple lines or a spectrogram are desired.
             
             'v' is optional, and is only used for spectrogram plots.  This will be a list of bins to be used.  If this
@@ -48,6 +49,16 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
             Renames TVar to new name
         attr_dict: dict
             A dictionary object of attributes (these do not affect routines in pytplot, this is merely to keep metadata alongside the file)
+        copy: bool, optional
+            If False, numpy arrays given for 'y', 'v' and 'v1/v2/v3' are wrapped directly in the tplot variable
+            instead of being copied, so the variable shares memory with the caller's arrays.  Only the shapes and
+            dtypes are checked.  A copy is still made when an input is not already a numpy array (e.g. a list or a
+            pandas DataFrame with mixed dtypes), when 'x' has to be converted from datetimes or strings, and, for
+            non-float64 times, when xarray builds the pandas index for the time coordinate.  Default is True.
+        chunks: int, optional
+            If set, the data is stored as a dask array split into chunks of this many time records, and is only
+            computed when needed (plotting computes just the plotted time range).  Requires dask.  A dask array
+            given for 'y' is always kept lazy, with its own chunks unless this is set.
         
     .. note::
         If you want to combine multiple tplot variables into one, simply supply the list of tplot variables to the
@@ -104,29 +115,32 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
         base_data = _get_base_tplot_vars(data)
         # Copying the first variable to use all of its plot options
         # However, we probably want each overplot to retain its original plot option
-        data_quants[name] = copy.deepcopy(data_quants[base_data[0]])
-        data_quants[name].attrs = copy.deepcopy(data_quants[base_data[0]].attrs)
+        data_quants[name] = deepcopy(data_quants[base_data[0]])
+        data_quants[name].attrs = deepcopy(data_quants[base_data[0]].attrs)
         data_quants[name].name = name
         data_quants[name].attrs['plot_options']['overplots'] = base_data[1:]
         return True
 
     times = data.pop('x')
-    values = np.array(data.pop('y'))
+    values = data.pop('y')
+    if utilities.is_dask_array(values):
+        # Chunked data stays lazy, it is neither copied nor loaded into memory here
+        pass
+    elif copy:
+        values = np.array(values)
+    else:
+        values = np.asarray(values)
+        if values.ndim == 0 or values.dtype.kind not in 'biufc':
+            print("y must be a numeric array of at least 1 dimension when copy=False.")
+            return False
 
-    # If given a list of datetime objects, convert times to seconds since epoch.
-    if any(isinstance(t, datetime.datetime) for t in times):
-        for tt, time in enumerate(times):
-            times[tt] = (time-datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)).total_seconds()
-    # If given a list of datetime string, convert times to seconds since epoch
-    elif any(isinstance(t, str) for t in times):
-        for tt, time in enumerate(times):
-            times[tt] = pytplot.tplot_utilities.str_to_int(time)
+    # If given datetime objects, datetime64 values or datetime strings, convert times to seconds since epoch.
+    times = utilities.time_to_unix(times)
 
     if len(times) != len(values):
         print("The lengths of x and y do not match!")
         return False
 
-    times = np.array(times)
     trange = [np.nanmin(times), np.nanmax(times)]
 
     # Figure out the 'v' data
@@ -142,26 +156,32 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
             spec_bins = data['v2']
             spec_bins_dimension = 'v2'
 
-        if type(spec_bins) is not pd.DataFrame:
-            try:
-                spec_bins = pd.DataFrame(spec_bins)
-            except:
-                if spec_bins_dimension=='v':
-                    spec_bins = np.arange(1, len(values[0])+1)
-                else:
-                    spec_bins = np.arange(1, len(values[0][0]) + 1)
-                spec_bins = pd.DataFrame(spec_bins)
-
-
-        if len(spec_bins.columns) != 1:
-            # The spec_bins are time varying
-            spec_bins_time_varying = True
-            if len(spec_bins) != len(times):
-                print("Length of v and x do not match.  Cannot create tplot variable.")
+        if not copy:
+            spec_bins, spec_bins_time_varying = _adopt_coordinate(spec_bins, len(times))
+            if spec_bins is None:
+                print("Shape of", spec_bins_dimension, "does not match x.  Cannot create tplot variable.")
                 return
         else:
-            spec_bins = spec_bins.transpose()
-            spec_bins_time_varying = False
+            if type(spec_bins) is not pd.DataFrame:
+                try:
+                    spec_bins = pd.DataFrame(spec_bins)
+                except:
+                    if spec_bins_dimension=='v':
+                        spec_bins = np.arange(1, len(values[0])+1)
+                    else:
+                        spec_bins = np.arange(1, len(values[0][0]) + 1)
+                    spec_bins = pd.DataFrame(spec_bins)
+
+            if len(spec_bins.columns) != 1:
+                # The spec_bins are time varying
+                spec_bins_time_varying = True
+                if len(spec_bins) != len(times):
+                    print("Length of v and x do not match.  Cannot create tplot variable.")
+                    return
+                spec_bins = spec_bins.values
+            else:
+                spec_bins = np.squeeze(spec_bins.transpose().values)
+                spec_bins_time_varying = False
     else:
         spec_bins = None
         # Provide another dimension if values are more than 1 dimension
@@ -177,15 +197,30 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
     dimension_list = [d + '_dim' for d in coordinate_list]
     temp = xr.DataArray(values, dims=['time']+dimension_list,
                         coords={'time': ('time', times)})
+    if chunks is not None:
+        temp = temp.chunk({'time': chunks})
     if spec_bins_exist:
         if spec_bins_time_varying:
-            temp.coords['spec_bins'] = (('time', spec_bins_dimension+'_dim'), spec_bins.values)
+            temp.coords['spec_bins'] = (('time', spec_bins_dimension+'_dim'), spec_bins)
         else:
-            temp.coords['spec_bins'] = (spec_bins_dimension+'_dim', np.squeeze(spec_bins.values))
+            temp.coords['spec_bins'] = (spec_bins_dimension+'_dim', spec_bins)
 
     for d in coordinate_list:
         if data[d] is None:
             continue
+        if not copy:
+            if spec_bins_exist and d == spec_bins_dimension:
+                # Share the spec_bins array rather than wrapping the input a second time
+                d_dimension, d_time_varying = spec_bins, spec_bins_time_varying
+            else:
+                d_dimension, d_time_varying = _adopt_coordinate(data[d], len(times))
+            if d_dimension is None:
+                print("Could not create coordinate", d+'_dim', "for variable", name)
+            elif d_time_varying:
+                temp.coords[d] = (('time', d+'_dim'), d_dimension)
+            else:
+                temp.coords[d] = (d+'_dim', d_dimension)
+            continue
         try:
             d_dimension = pd.DataFrame(data[d])
             if len(d_dimension.columns) != 1:
@@ -227,15 +262,16 @@ def store_data(name, data=None, delete=False, newname=None, attr_dict={}):
     temp.attrs['plot_options']['extras'] = extras
     temp.attrs['plot_options']['create_time'] = create_time
     temp.attrs['plot_options']['links'] = links
-    temp.attrs['plot_options']['spec_bins_ascending'] = _check_spec_bins_ordering(times, spec_bins)
+    temp.attrs['plot_options']['spec_bins_ascending'], temp.attrs['plot_options']['spec_bins_monotonic'] = \
+        _check_spec_bins_ordering(times, spec_bins)
     temp.attrs['plot_options']['overplots'] = []
     temp.attrs['plot_options']['interactive_xaxis_opt'] = {}
     temp.attrs['plot_options']['interactive_yaxis_opt'] = {}
 
+    # The y range is computed lazily, the first time the variable is plotted (or its range is
+    # asked for with tplot_utilities.set_default_y_range)
     data_quants[name] = temp
 
-    data_quants[name].attrs['plot_options']['yaxis_opt']['y_range'] = utilities.get_y_range(temp)
-
     return True
 
 
@@ -254,25 +290,50 @@ def _get_base_tplot_vars(data):
 def _check_spec_bins_ordering(times, spec_bins):
     """
     This is a private function, this is run during
-    object creation to check if spec_bins are ascending or descending
+    object creation to check if spec_bins are ascending or descending.
+
+    The direction is taken from the first pair of adjacent finite bins.  Also
+    returns whether each record's finite bins are strictly ordered in that
+    direction (an array with one entry per time for time varying bins, a
+    single bool otherwise), so renderers can skip re-sorting bins.
     """
     if spec_bins is None:
-        return
-    if len(spec_bins) == len(times):
-        break_top_loop = False
-        for index, row in spec_bins.iterrows():
-            if row.isnull().values.all():
-                continue
-            else:
-                for i in row.index:
-                    if np.isfinite(row[i]) and np.isfinite(row[i + 1]):
-                        ascending = row[i] < row[i + 1]
-                        break_top_loop = True
-                        break
-                    else:
-                        continue
-                if break_top_loop:
-                    break
+        return None, None
+    bins = np.atleast_2d(spec_bins)
+    finite = np.isfinite(bins)
+    finite_pairs = finite[:, :-1] & finite[:, 1:]
+    if finite_pairs.any():
+        row, col = np.unravel_index(np.argmax(finite_pairs), finite_pairs.shape)
+        ascending = bool(bins[row, col] < bins[row, col + 1])
     else:
-        ascending = spec_bins[0].iloc[0] < spec_bins[1].iloc[0]
-    return ascending
\ No newline at end of file
+        ascending = True
+
+    with np.errstate(invalid='ignore'):
+        if ascending:
+            ordered = bins[:, 1:] > bins[:, :-1]
+        else:
+            ordered = bins[:, 1:] < bins[:, :-1]
+    monotonic = np.all(ordered | ~finite_pairs, axis=1)
+    if np.ndim(spec_bins) < 2:
+        monotonic = bool(monotonic[0])
+    return ascending, monotonic
+
+
+def _adopt_coordinate(coordinate, num_times):
+    """
+    This is a private function, used by store_data when copy=False.
+    It wraps a coordinate in a numpy array without copying it, and returns
+    the array (1D if static, 2D if it varies in time) along with whether it
+    is time varying.  The array is None if the shape does not fit the data.
+    """
+    coordinate = np.asarray(coordinate)
+    if coordinate.dtype.kind not in 'biuf':
+        return None, False
+    if coordinate.ndim == 2 and coordinate.shape[1] != 1:
+        if coordinate.shape[0] != num_times:
+            return None, True
+        return coordinate, True
+    if coordinate.ndim > 2:
+        return None, False
+    # reshape only returns a copy if the column is not contiguous
+    return coordinate.reshape(-1), False
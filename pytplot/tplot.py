@@ -60,7 +60,9 @@ def tplot(name,
           pos_3d=False,
           exec_qt=True,
           window_name='Plot',
-          interactive=False):
+          interactive=False,
+          server=False,
+          port=5006):
     """
     This is the function used to display the tplot variables stored in memory.
     The default output is to show the plots stacked on top of one another inside of a qt window
@@ -110,6 +112,12 @@ def tplot(name,
             so we can avoid it in a headless server environment.
         testing: bool, optional
             If True, doesn't run the '(hasattr(sys, 'ps1'))' line that makes plots interactive - i.e., avoiding issues
+        server : bool, optional
+            If True (with bokeh=True), the plots are shown by a local bokeh server, which redraws them from the
+            data at the resolution of the visible time range whenever it is zoomed or panned.  This blocks until
+            the server is stopped.
+        port : int, optional
+            The port of the bokeh server, when server=True.
 
     Returns:
         None
@@ -139,6 +147,9 @@ def tplot(name,
         >>> #Plot all 3 tplot variables, sending the output to an HTML file
         >>> pytplot.tplot(["Variable1", "Variable2", "Variable3"], save_file='C:/temp/pytplot_example.html')
 
+        >>> #Plot all 3 tplot variables with a bokeh server, to zoom into the full resolution data
+        >>> pytplot.tplot(["Variable1", "Variable2", "Variable3"], bokeh=True, server=True)
+
         >>> #Plot all 3 tplot variables, sending the HTML output to a pair of strings
         >>> div, component = pytplot.tplot(["Variable1", "Variable2", "Variable3"], gui=True)
     """
@@ -146,7 +157,7 @@ def tplot(name,
     if interactive:
         slice=True
 
-    if not pytplot.using_graphics and save_file is None:
+    if not pytplot.using_graphics and save_file is None and not (bokeh and server):
         print("Qt was not successfully imported.  Specify save_file to save the file as a .html file.")
         return
     # Check a bunch of things
@@ -172,7 +183,16 @@ def tplot(name,
         else:
             vert_spacing = 25 # Just a default that looks ok
 
-    if bokeh:
+    if bokeh and server:
+        if testing:
+            from bokeh.document import Document
+            HTMLPlotter.server.build_document(Document(), name, var_label=var_label, combine_axes=combine_axes,
+                                              slice=slice)
+            return
+        HTMLPlotter.serve_stack(name, var_label=var_label, combine_axes=combine_axes, slice=slice, port=port,
+                                show=display)
+        return
+    elif bokeh:
         layout = HTMLPlotter.generate_stack(name, var_label=var_label, combine_axes=combine_axes,
                                             slice=slice)
         # Output types
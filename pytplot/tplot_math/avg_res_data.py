@@ -32,10 +32,10 @@ def avg_res_data(tvar,res,new_tvar=None):
         pytplot.data_quants[tvar] = tvar_new
     else:
         if 'spec_bins' in pytplot.data_quants[tvar].coords:
-            pytplot.store_data(new_tvar, data={'x': tvar_new.coords['time'].values, 'y': tvar_new.values,
+            pytplot.store_data(new_tvar, data={'x': tvar_new.coords['time'].values, 'y': tvar_new.data,
                                                'v': tvar_new.coords['spec_bins'].values})
         else:
-            pytplot.store_data(new_tvar, data={'x': tvar_new.coords['time'].values, 'y': tvar_new.values})
+            pytplot.store_data(new_tvar, data={'x': tvar_new.coords['time'].values, 'y': tvar_new.data})
 
         pytplot.data_quants[new_tvar].attrs = copy.deepcopy(pytplot.data_quants[tvar].attrs)
 
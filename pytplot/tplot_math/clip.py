@@ -38,10 +38,10 @@ def clip(tvar,ymin,ymax,new_tvar=None):
         pytplot.data_quants[tvar] = a
     else:
         if 'spec_bins' in a.coords:
-            pytplot.store_data(new_tvar, data={'x': a.coords['time'], 'y': a.values, 'v': a.coords['spec_bins']})
+            pytplot.store_data(new_tvar, data={'x': a.coords['time'], 'y': a.data, 'v': a.coords['spec_bins']})
             pytplot.data_quants[new_tvar].attrs = copy.deepcopy(pytplot.data_quants[tvar].attrs)
         else:
-            pytplot.store_data(new_tvar, data={'x': a.coords['time'], 'y': a.values})
+            pytplot.store_data(new_tvar, data={'x': a.coords['time'], 'y': a.data})
             pytplot.data_quants[new_tvar].attrs = copy.deepcopy(pytplot.data_quants[tvar].attrs)
 
     return
@@ -32,7 +32,7 @@ def derive(tvar,new_tvar=None):
         a.attrs = copy.deepcopy(pytplot.data_quants[tvar].attrs)
         pytplot.data_quants[tvar] = a
     else:
-        data = {'x':a.coords['time'], 'y':a.values}
+        data = {'x':a.coords['time'], 'y':a.data}
         for coord in a.coords:
             if coord != 'time' and coord != 'spec_bins':
                 data[coord] = a.coords[coord].values
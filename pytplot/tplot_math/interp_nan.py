@@ -5,6 +5,8 @@
 
 import pytplot
 import copy
+import xarray as xr
+from pytplot import tplot_utilities
 
 def interp_nan(tvar, new_tvar=None, s_limit=None):
     """
@@ -13,6 +15,11 @@ def interp_nan(tvar, new_tvar=None, s_limit=None):
     .. note::
         This analysis routine assumes the data is no more than 2 dimensions.  If there are more, they may become flattened!
 
+    .. note::
+        For chunked (dask backed) variables, each chunk is interpolated with s_limit+1 records of its neighbours.
+        Without s_limit a gap can be any length, so the variable is instead rechunked to hold the whole time axis
+        of one column per chunk.
+
     Parameters:
         tvar : str
             Name of tplot variable.
@@ -31,7 +38,11 @@ def interp_nan(tvar, new_tvar=None, s_limit=None):
         >>> print(pytplot.data_quants['e_nonan'].values)
     """
 
-    x = pytplot.data_quants[tvar].interpolate_na(dim='time', limit=s_limit)
+    if tplot_utilities.is_dask_array(pytplot.data_quants[tvar].data) and \
+            len(pytplot.data_quants[tvar].data.chunks[0]) > 1:
+        x = _interp_nan_chunked(pytplot.data_quants[tvar], s_limit)
+    else:
+        x = pytplot.data_quants[tvar].interpolate_na(dim='time', limit=s_limit)
     x.attrs = copy.deepcopy(pytplot.data_quants[tvar].attrs)
 
     if new_tvar is None:
@@ -42,3 +53,29 @@ def interp_nan(tvar, new_tvar=None, s_limit=None):
         pytplot.data_quants[new_tvar].name = new_tvar
 
 
+def _interp_nan_chunked(tvar, s_limit):
+    # interpolate_na needs the whole time axis in one chunk, so instead interpolate
+    # each chunk with enough overlap from its neighbours, without loading everything
+    import dask.array as da
+
+    values = tvar.data
+    time_chunks = values.chunks[0]
+    if s_limit is None:
+        # Any gap could cross a chunk boundary, so give each column its whole time axis
+        whole_time = tvar.chunk({dim: (-1 if dim == 'time' else 1) for dim in tvar.dims})
+        interpolated = whole_time.interpolate_na(dim='time')
+        return interpolated.chunk({dim: tvar.chunksizes[dim] for dim in tvar.dims})
+
+    depth = {axis: 0 for axis in range(values.ndim)}
+    depth[0] = s_limit + 1
+    times = tvar.coords['time'].values.reshape((-1,) + (1,) * (values.ndim - 1))
+    times = da.from_array(times, chunks=(time_chunks,) + (1,) * (values.ndim - 1))
+
+    def interp_block(block, block_times):
+        block = xr.DataArray(block, dims=tvar.dims, coords={'time': block_times.ravel()})
+        return block.interpolate_na(dim='time', limit=s_limit).values
+
+    interpolated = da.map_overlap(interp_block, values, times, depth=depth, boundary='none',
+                                  align_arrays=True, dtype=values.dtype)
+    return tvar.copy(data=interpolated)
+
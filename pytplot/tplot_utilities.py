@@ -5,11 +5,15 @@
 
 from __future__ import division
 import os
+import sys
 import datetime
+import json
 import math
+import weakref
 import numpy as np
 import pytz
 import pytplot
+from contextlib import contextmanager
 from platform import system
 
 
@@ -157,6 +161,45 @@ def str_to_int(time_str):
     return time_int
 
 
+def time_to_unix(times):
+    """
+    Convert an array of times into float64 seconds since 1970-01-01 UTC in a single
+    vectorized pass.  Accepted inputs are numbers (returned unchanged), numpy datetime64
+    arrays, pandas DatetimeIndex/Series, and lists or arrays of datetime objects or
+    ISO 8601 strings.  Naive datetimes and strings are assumed to be in UTC, and
+    NaT/unparseable entries become NaN.
+    """
+    import pandas as pd
+
+    if isinstance(times, pd.Series):
+        times = times.values
+    if isinstance(times, pd.DatetimeIndex):
+        if times.tz is not None:
+            times = times.tz_convert(None)
+        return _datetime64_to_unix(times.values)
+
+    if isinstance(times, (list, tuple)) and len(times) > 0 and isinstance(times[0], (datetime.datetime, str)):
+        # numpy's dtype discovery on a list of datetime objects is very slow, so skip it
+        times = np.fromiter(times, dtype=object, count=len(times))
+    else:
+        times = np.asarray(times)
+    if times.dtype.kind in 'biuf':
+        return times
+    if times.dtype.kind == 'M':
+        return _datetime64_to_unix(times)
+
+    # Strings and datetime objects are parsed in bulk by pandas
+    times = pd.to_datetime(times.ravel(), utc=True, errors='coerce').tz_convert(None)
+    return _datetime64_to_unix(times.values)
+
+
+def _datetime64_to_unix(times):
+    times = times.astype('datetime64[ns]', copy=False)
+    unix_times = times.view(np.int64) / 1e9
+    unix_times[np.isnat(times)] = np.nan
+    return unix_times
+
+
 def int_to_str(time_int):
     if math.isnan(time_int):
         return "NaN"
@@ -209,32 +252,72 @@ def rgb_to_hex(rgb):
     return '#%02x%02x%02x' % (red, green, blue)
 
 
-def get_heatmap_color(color_map, min_val, max_val, values, zscale='log'):
-    colors = []
-    if not isinstance(values, list):
-        values = [values]
-    for value in values:
-        if np.isfinite(value):
-            if value > max_val:
-                value = max_val
-            if value < min_val:
-                colors.append("#%02x%02x%02x" % (255, 255, 255))
-                continue
-            if zscale == 'log':
-                log_min = np.log10(min_val)
-                log_max = np.log10(max_val)
-                log_val = np.log10(value)
-                if np.isfinite(np.log10(value)):
-                    cm_index = int((((log_val-log_min) / (log_max-log_min)) * (len(color_map)-1)))
-                    colors.append(color_map[cm_index])
-                else:
-                    colors.append(("#%02x%02x%02x" % (255, 255, 255)))
-            else:
-                cm_index = int((((value-min_val) / (max_val-min_val)) * (len(color_map)-1)))
-                colors.append(color_map[cm_index])
+def get_heatmap_indices(values, min_val, max_val, num_colors, zscale='log'):
+    """
+    Returns the index of each value in a colormap of num_colors colors, computed for the whole array at once.
+    Values above max_val get the index num_colors, values below min_val get num_colors + 1, and values that are
+    not finite (or not positive with a log scale) get num_colors + 2, so the result can index the colormap
+    returned by get_heatmap_palette directly.
+    """
+    values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if zscale == 'log':
+            scaled = np.log10(values)
+            low, high = np.log10(min_val), np.log10(max_val)
         else:
-            colors.append("#%02x%02x%02x" % (255, 255, 255))
-    return colors
+            scaled = values
+            low, high = min_val, max_val
+        fraction = (scaled - low) / (high - low)
+        indices = np.nan_to_num(fraction * (num_colors - 1), nan=0, posinf=0, neginf=0)
+    indices = np.clip(indices, 0, num_colors - 1).astype(np.intp)
+    indices[~np.isfinite(scaled)] = num_colors + 2
+    indices[values < min_val] = num_colors + 1
+    indices[values > max_val] = num_colors
+    indices[~np.isfinite(values)] = num_colors + 2
+    return indices
+
+
+def get_heatmap_palette(color_map, under_color='#ffffff', over_color=None, bad_color='#ffffff'):
+    """
+    Returns color_map followed by the colors of values above, below and outside of the colormap, in the order
+    of the indices of get_heatmap_indices.  By default values above the range get the top color of the colormap.
+    """
+    if over_color is None:
+        over_color = color_map[-1]
+    return list(color_map) + [over_color, under_color, bad_color]
+
+
+def get_heatmap_color(color_map, min_val, max_val, values, zscale='log', under_color='#ffffff', over_color=None,
+                      bad_color='#ffffff'):
+    """
+    Returns the color of each of the values in color_map, between min_val and max_val on a log or linear
+    zscale.  Values below the range get under_color, values above it over_color (the top color by default),
+    and NaNs and values that can't be put on the scale get bad_color.
+    """
+    palette = np.empty(len(color_map) + 3, dtype=object)
+    palette[:] = get_heatmap_palette(color_map, under_color, over_color, bad_color)
+    return palette[get_heatmap_indices(values, min_val, max_val, len(color_map), zscale)].tolist()
+
+
+def get_heatmap_rgba(color_map, min_val, max_val, values, zscale='log', under_color='#ffffff', over_color=None,
+                     bad_color='#ffffff'):
+    """
+    The same as get_heatmap_color, but returns the colors as an array of packed RGBA uint32 values, which is
+    what bokeh's image_rgba takes.  The colors can be hex strings or names, or (r, g, b[, a]) in 0-255.
+    """
+    palette = np.array([_color_to_rgba(color) for color in
+                        get_heatmap_palette(color_map, under_color, over_color, bad_color)], dtype=np.uint32)
+    return palette[get_heatmap_indices(values, min_val, max_val, len(color_map), zscale)]
+
+
+def _color_to_rgba(color):
+    # Packs a color into a uint32 whose bytes are red, green, blue and alpha in memory order
+    if isinstance(color, str):
+        from matplotlib.colors import to_rgba
+        rgba = [int(round(c * 255)) for c in to_rgba(color)]
+    else:
+        rgba = [int(c) for c in color] + [255] * (4 - len(color))
+    return np.frombuffer(bytes(rgba[:4]), dtype=np.uint32)[0]
 
 
 def timebar_delete(t, varname=None, dim='height'):
@@ -591,38 +674,362 @@ def return_interpolated_link_dict(dataset, types):
     return ret_dict
 
 
-def get_y_range(dataset):
-    # This is for the numpy RuntimeWarning: All-NaN axis encountered
-    # with np.nanmin below
+# Cached data statistics of each tplot variable, keyed by name.  Only data that can't change in place is
+# cached: dask arrays, identified by the name of their task graph, and read-only numpy arrays (like memory
+# mapped saves), held by a weak reference so replaced data is never served stale stats.
+_data_stats_cache = {}
+
+
+def get_data_stats(dataset):
+    """
+    Returns a dictionary of statistics of a tplot variable's data: the finite minimum ('min'),
+    the finite maximum ('max'), the smallest positive finite value ('min_positive', used for
+    log axes) and the number of finite values ('finite_count').
 
+    The statistics of chunked and read-only data are cached alongside the variable, and dropped
+    automatically when the variable's data is replaced.  Writable data is always read again, since
+    it can be changed in place.
+    """
+    data = dataset.data
+    cached = _data_stats_cache.get(dataset.name)
+    if cached is not None and _same_data(cached[0], data):
+        return cached[1]
+
+    stats = dict(zip(('min', 'max', 'min_positive', 'finite_count'), finite_min_max(data)))
+
+    if is_dask_array(data):
+        # Dask arrays are named after their task graph, so the name identifies the data
+        _data_stats_cache[dataset.name] = (data.name, stats)
+    elif _is_read_only(data):
+        _data_stats_cache[dataset.name] = (weakref.ref(data), stats)
+    else:
+        _data_stats_cache.pop(dataset.name, None)
+    return stats
+
+
+def _same_data(identity, data):
+    if isinstance(identity, str):
+        return is_dask_array(data) and data.name == identity
+    return identity() is data and _is_read_only(data)
+
+
+def _is_read_only(data):
+    # A numpy array that can't be written to through itself or any array it is a view of
+    while isinstance(data, np.ndarray):
+        if data.flags.writeable:
+            return False
+        data = data.base
+    return True
+
+
+def is_dask_array(values):
+    """
+    Returns True if values is a dask array, i.e. the data of a chunked tplot variable.
+    """
+    # dask is optional; if it has not been imported, nothing can be a dask array
+    dask_array = sys.modules.get('dask.array')
+    return dask_array is not None and isinstance(values, dask_array.Array)
+
+
+def finite_min_max(values, block_size=65536):
+    """
+    Returns the finite minimum, finite maximum, smallest positive finite value and
+    number of finite values of an array, ignoring NaN and +/-inf.  Values that do not
+    exist (for instance, the minimum of an all-NaN array) are returned as NaN.
+
+    The data is reduced in a single pass of cache-sized blocks, so no full-size
+    temporary copies of the array are made.  Dask arrays are reduced chunk by chunk
+    without being loaded into memory all at once.
+    """
+    if is_dask_array(values):
+        import dask
+        chunk_results = dask.compute(*[dask.delayed(finite_min_max)(chunk, block_size)
+                                       for chunk in values.to_delayed().ravel()])
+        return _combine_min_max(chunk_results)
+
+    flat = np.asarray(values).reshape(-1)
+    vmin = np.inf
+    vmax = -np.inf
+    min_positive = np.inf
+    finite_count = 0
+    for start in range(0, flat.size, block_size):
+        block = flat[start:start + block_size]
+        if block.dtype.kind != 'f':
+            block = block.astype(np.float64)
+        finite = np.isfinite(block)
+        block_count = np.count_nonzero(finite)
+        if block_count == 0:
+            continue
+        finite_count += block_count
+        block_min = np.min(block, where=finite, initial=np.inf)
+        block_max = np.max(block, where=finite, initial=-np.inf)
+        vmin = min(vmin, block_min)
+        vmax = max(vmax, block_max)
+        if block_min > 0:
+            min_positive = min(min_positive, block_min)
+        elif block_max > 0:
+            min_positive = min(min_positive, np.min(block, where=finite & (block > 0), initial=np.inf))
+
+    if finite_count == 0:
+        return np.nan, np.nan, np.nan, 0
+    if min_positive == np.inf:
+        min_positive = np.nan
+    return vmin, vmax, min_positive, finite_count
+
+
+def _combine_min_max(results):
+    # Merges the finite_min_max results of several chunks of an array
+    results = [r for r in results if r[3] > 0]
+    if len(results) == 0:
+        return np.nan, np.nan, np.nan, 0
+    min_positives = [r[2] for r in results if not np.isnan(r[2])]
+    return (min(r[0] for r in results),
+            max(r[1] for r in results),
+            min(min_positives) if len(min_positives) > 0 else np.nan,
+            sum(r[3] for r in results))
+
+
+def times_to_str(times):
+    """
+    The same as int_to_str for an array of unix times, returning a list of strings.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    finite = np.isfinite(times)
+    seconds = np.where(finite, np.round(times), 0).astype('M8[s]')
+    strings = np.char.replace(np.datetime_as_string(seconds, unit='s'), 'T', ' ')
+    return np.where(finite, strings, 'NaN').tolist()
+
+
+def decimate_minmax(times, values, num_bins):
+    """
+    Returns the indices of the points of a line to keep when drawing it num_bins pixels wide.  The times are
+    split into num_bins equal intervals, and the first, last, smallest and largest point of each are kept, so
+    the line looks the same as with all of its points.  The first NaN of an interval is kept as well, so that
+    gaps in the line stay gaps.  The times must be increasing.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    num_points = len(values)
+    if num_points == 0:
+        return np.arange(0)
+    edges = np.linspace(times[0], times[-1], num_bins + 1)
+    bins = np.clip(np.searchsorted(edges, times, side='right') - 1, 0, num_bins - 1)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], num_points]
+    segments = np.repeat(np.arange(len(starts)), ends - starts)
+
+    keep = [starts, ends - 1]
+    with np.errstate(invalid='ignore'):
+        for extreme in [np.fmin.reduceat(values, starts), np.fmax.reduceat(values, starts)]:
+            keep.append(_first_in_segments(values == extreme[segments], segments))
+    keep.append(_first_in_segments(np.isnan(values), segments))
+    return np.unique(np.concatenate(keep))
+
+
+def _first_in_segments(mask, segments):
+    # The index of the first True of each segment that has one
+    indices = np.flatnonzero(mask)
+    return indices[np.unique(segments[indices], return_index=True)[1]]
+
+
+def decimate_lttb(times, values, num_points):
+    """
+    Returns the indices of num_points points of a line picked with the Largest Triangle Three Buckets algorithm,
+    which keeps the points that change the shape of the line the most.  NaNs are left out, so gaps in the line
+    are bridged.
+    """
+    finite = np.flatnonzero(np.isfinite(values))
+    if num_points >= len(finite) or num_points < 3:
+        return finite
+    x = np.asarray(times, dtype=np.float64)[finite]
+    y = np.asarray(values, dtype=np.float64)[finite]
+    # The first and the last point are always kept, the points between them are split into buckets
+    edges = np.linspace(1, len(x) - 1, num_points - 1).astype(np.intp)
+    edges = np.r_[edges, len(x)]
+    keep = np.empty(num_points, dtype=np.intp)
+    keep[0] = 0
+    keep[-1] = len(x) - 1
+    previous = 0
+    for i in range(num_points - 2):
+        # The point of the bucket making the largest triangle with the previous point and the next bucket's mean
+        next_x = x[edges[i + 1]:edges[i + 2]].mean()
+        next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        bucket_x = x[edges[i]:edges[i + 1]]
+        bucket_y = y[edges[i]:edges[i + 1]]
+        areas = np.abs((x[previous] - next_x) * (bucket_y - y[previous])
+                       - (x[previous] - bucket_x) * (next_y - y[previous]))
+        previous = edges[i] + np.argmax(areas)
+        keep[i + 1] = previous
+    return finite[keep]
+
+
+def spec_bins_monotonic(dataset):
+    """
+    Returns whether the finite spec_bins of each record of a tplot variable are strictly ordered (in the
+    direction of spec_bins_ascending), as one bool per record.  This is worked out by store_data; it is
+    only checked again if the variable's records no longer match (a time slice of it, for instance).
+    """
+    num_records = len(dataset.coords['time'])
+    if 'spec_bins' not in dataset.coords:
+        return np.ones(num_records, dtype=bool)
+    monotonic = dataset.attrs['plot_options'].get('spec_bins_monotonic')
+    bins = dataset.coords['spec_bins']
+    if monotonic is None or (bins.ndim > 1 and np.ndim(monotonic) != 1) or \
+            (np.ndim(monotonic) == 1 and len(monotonic) != num_records):
+        from pytplot.store_data import _check_spec_bins_ordering
+        monotonic = _check_spec_bins_ordering(dataset.coords['time'].values, bins.values)[1]
+    return np.broadcast_to(np.asarray(monotonic, dtype=bool), (num_records,))
+
+
+def get_y_range(dataset):
     # This takes the data and sets the minimum and maximum range of the data values.
     # If the data type later gets set to 'spec', then we'll change the ymin and ymax
-    import warnings
-    warnings.filterwarnings("error")
 
     # Special rule if 'spec' is True
     if 'spec' in dataset.attrs['plot_options']['extras']:
-        if dataset.attrs['plot_options']['extras']['spec']:
-            try:
-                ymin = np.nanmin(dataset.coords['spec_bins'].values)
-                ymax = np.nanmax(dataset.coords['spec_bins'].values)
-                return [ymin, ymax]
-            except Exception as e:
-                #continue on to the code below
-                pass
-
-    dataset_temp = dataset.where(dataset != np.inf)
-    dataset_temp = dataset_temp.where(dataset != -np.inf)
-    try:
-        y_min = np.nanmin(dataset_temp.values)
-        y_max = np.nanmax(dataset_temp.values)
-    except RuntimeWarning:
-        y_min = np.nan
-        y_max = np.nan
+        if dataset.attrs['plot_options']['extras']['spec'] and 'spec_bins' in dataset.coords:
+            spec_bins = dataset.coords['spec_bins'].values
+            if not np.isnan(spec_bins).all():
+                return [np.nanmin(spec_bins), np.nanmax(spec_bins)]
+            # otherwise continue on to the code below
+
+    stats = get_data_stats(dataset)
+    y_min = stats['min']
+    y_max = stats['max']
 
     if y_min == y_max:
         # Show 10% and 10% below the straight line
         y_min = y_min - (.1 * np.abs(y_min))
         y_max = y_max + (.1 * np.abs(y_max))
-    warnings.resetwarnings()
     return [y_min, y_max]
+
+
+def set_default_y_range(name):
+    """
+    Fills in the automatic y range of a tplot variable, unless it has already been
+    computed or was set by the user (with ylim, for instance), and returns the y range.
+    This is called just before plotting, so variables that are never plotted never
+    compute it.  Code that needs yaxis_opt['y_range'] before the variable is plotted
+    should call this instead of reading it.
+
+    Parameters:
+        name : str
+            The name of the tplot variable.
+
+    Returns:
+        The y range, [ymin, ymax].
+    """
+    yaxis_opt = pytplot.data_quants[name].attrs['plot_options']['yaxis_opt']
+    if 'y_range' not in yaxis_opt:
+        yaxis_opt['y_range'] = get_y_range(pytplot.data_quants[name])
+        # Marks the range as automatic (ylim and options clear this), so it can be dropped when the data changes
+        yaxis_opt['auto_y_range'] = True
+    return yaxis_opt['y_range']
+
+
+@contextmanager
+def loaded_time_window(names, var_label=None, x_range=None):
+    """
+    Temporarily replaces chunked (dask backed) tplot variables with the in-memory data of
+    the visible time range, x_range (by default tplot_opt_glob['x_range']), so that plotting
+    only computes the part of the data that is drawn.  If no range is set, the whole variable is reduced chunk by chunk
+    to the minimum and maximum of each of about as many blocks of records as the window is
+    wide, so it is never loaded into memory all at once.  Overplotted, linked and var_label
+    variables are included.  The chunked variables are put back on exit.
+    """
+    if not isinstance(names, list):
+        names = [names]
+    if var_label is None:
+        var_label = []
+    elif not isinstance(var_label, list):
+        var_label = [var_label]
+
+    if x_range is None:
+        x_range = pytplot.tplot_opt_glob.get('x_range')
+
+    lazy_vars = {}
+    for name in _get_plotted_vars(names + var_label):
+        if is_dask_array(pytplot.data_quants[name].data):
+            lazy_vars[name] = pytplot.data_quants[name]
+
+    computed_y_range = {}
+    try:
+        for name, lazy_var in lazy_vars.items():
+            computed_y_range[name] = 'y_range' not in lazy_var.attrs['plot_options']['yaxis_opt']
+            if x_range is not None:
+                window = lazy_var.sel(time=slice(x_range[0], x_range[1])).compute()
+            else:
+                window = _min_max_records(lazy_var, 2 * pytplot.tplot_opt_glob['window_size'][0])
+            pytplot.data_quants[name] = window
+        yield
+    finally:
+        for name, lazy_var in lazy_vars.items():
+            # An automatic y range only describes the window that was plotted, so don't keep it
+            if computed_y_range.get(name):
+                lazy_var.attrs['plot_options']['yaxis_opt'].pop('y_range', None)
+                lazy_var.attrs['plot_options']['yaxis_opt'].pop('auto_y_range', None)
+            pytplot.data_quants[name] = lazy_var
+
+
+def _min_max_records(tvar, num_blocks):
+    # Splits the records of a chunked variable into num_blocks blocks, and returns the minimum of each block
+    # at its first time and the maximum at its last time, computed together in one pass over the chunks
+    import dask
+    import xarray as xr
+    block_size = int(math.ceil(len(tvar.time) / num_blocks))
+    if block_size <= 2:
+        return tvar.compute()
+    minimums = tvar.coarsen(time=block_size, boundary='pad', coord_func={'time': 'min'}).min()
+    maximums = tvar.coarsen(time=block_size, boundary='pad', coord_func={'time': 'max'}).max()
+    minimums, maximums = dask.compute(minimums, maximums)
+    reduced = xr.concat([minimums, maximums], dim='time').sortby('time')
+    reduced.attrs = tvar.attrs
+    return reduced
+
+
+def _get_plotted_vars(names):
+    plotted_vars = []
+    to_visit = list(names)
+    while len(to_visit) > 0:
+        name = to_visit.pop(0)
+        if name not in pytplot.data_quants or name in plotted_vars:
+            continue
+        plotted_vars.append(name)
+        plot_options = pytplot.data_quants[name].attrs['plot_options']
+        to_visit += list(plot_options['overplots']) + list(plot_options['links'].values())
+    return plotted_vars
+
+
+def attrs_to_json(attrs, indent=None):
+    """
+    Encodes a tplot variable's attrs (plot options and file metadata), or anything containing them, as JSON.
+    Numpy arrays/scalars and datetimes are tagged so that attrs_from_json can rebuild them,
+    and anything else that JSON can't represent is stored as its string.
+    """
+    return json.dumps(attrs, default=_json_default, indent=indent)
+
+
+def attrs_from_json(text):
+    """
+    Decodes the JSON written by attrs_to_json.  Unlike pickle, this never runs code from the file.
+    """
+    return json.loads(text, object_hook=_json_object_hook)
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return {'__ndarray__': obj.tolist(), 'dtype': obj.dtype.str}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, datetime.datetime):
+        return {'__datetime__': obj.isoformat()}
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    return str(obj)
+
+
+def _json_object_hook(obj):
+    if '__ndarray__' in obj:
+        return np.array(obj['__ndarray__'], dtype=np.dtype(obj['dtype']))
+    if '__datetime__' in obj:
+        return datetime.datetime.fromisoformat(obj['__datetime__'])
+    return obj
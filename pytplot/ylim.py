@@ -34,5 +34,6 @@ def ylim(name, min, max):
         return
 
     data_quants[name].attrs['plot_options']['yaxis_opt']['y_range'] = [min, max]
+    data_quants[name].attrs['plot_options']['yaxis_opt'].pop('auto_y_range', None)
     
     return
\ No newline at end of file
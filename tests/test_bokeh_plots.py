@@ -0,0 +1,171 @@
+import pytplot
+import numpy as np
+from bokeh.models import GlyphRenderer
+
+
+def _figure(name, width=800, plotter='bkTVarFigureSpec'):
+    # Builds the bokeh figure of the variable name, the way tplot does
+    pytplot.tplot_utilities.set_default_y_range(name)
+    figure = pytplot.bokeh_plotters[plotter](name, auto_color=True)
+    figure.setsize(width=width, height=200)
+    figure.buildfigure()
+    return figure
+
+
+def _glyph_data(figure):
+    return [r for r in figure.fig.renderers if isinstance(r, GlyphRenderer)][0].data_source.data
+
+
+def test_spec_quads():
+    times = 1.5e9 + np.arange(100) * 4.
+    values = np.random.rand(100, 8) + 0.01
+    bins = np.tile(np.logspace(3, 0, 8), (100, 1))
+    bins[50:] *= 2
+    pytplot.store_data('spec_quads', data={'x': times, 'y': values, 'v': bins})
+    pytplot.options('spec_quads', 'spec', 1)
+    pytplot.ylim('spec_quads', 1, 2000)
+    pytplot.xlim(times[0], times[-1])
+
+    data = _glyph_data(_figure('spec_quads'))
+    assert all(isinstance(data[key], np.ndarray) for key in ['x', 'right', 'y', 'top', 'value'])
+    # The bins are descending, so each quad goes from a bin to the one before it, starting at the last bin
+    assert len(data['x']) == 99 * 7
+    assert np.array_equal(data['x'][:99], times[:99] * 1000.0)
+    assert np.array_equal(data['right'][:99], times[1:] * 1000.0)
+    assert np.array_equal(data['value'][:99], values[:99, 7])
+    assert np.array_equal(data['y'][:99], bins[:99, 7]) and np.array_equal(data['top'][:99], bins[:99, 6])
+    pytplot.tplot('spec_quads', bokeh=True, testing=True)
+
+
+def test_spec_image():
+    times = 1.5e9 + np.arange(1000) * 4.
+    values = np.random.rand(1000, 8) + 0.01
+    bins = np.tile(np.logspace(3, 0, 8), (1000, 1))
+    bins[500:] *= 2
+    pytplot.store_data('spec_image', data={'x': times, 'y': values, 'v': bins})
+    pytplot.options('spec_image', 'spec', 1)
+    pytplot.options('spec_image', 'plotter', 'bkTVarFigureSpecImage')
+    pytplot.options('spec_image', 'ylog', 1)
+    pytplot.ylim('spec_image', 1, 2000)
+    pytplot.xlim(times[0], times[0] + 8000)
+
+    figure = _figure('spec_image', width=400, plotter='bkTVarFigureSpecImage')
+    image = _glyph_data(figure)['image'][0]
+    assert image.shape == (200, 400)
+    # Each column of pixels covers 20 seconds, and rows are evenly spaced in log(y) from 1 to 2000
+    y_pixels = 10 ** ((np.arange(200) + 0.5) * np.log10(2000) / 200)
+    for column in [0, 100, 150, 199]:
+        record = int((column + 0.5) * 20 / 4)
+        for row in [10, 100, 190]:
+            # The bins are descending, so the value of a bin goes up to the bin before it
+            below = np.nonzero(bins[record] <= y_pixels[row])[0]
+            if len(below) == 0 or below[0] == 0:
+                assert np.isnan(image[row, column])
+            else:
+                assert image[row, column] == np.float32(values[record, below[0]])
+    # The time range goes past the last record
+    assert np.isnan(image[:, 200:]).all() and not np.isnan(image[:, :199]).all(axis=0).any()
+    pytplot.tplot('spec_image', bokeh=True, testing=True)
+
+
+def test_spec_image_slice(capsys, monkeypatch):
+    import importlib
+    spec_image = importlib.import_module('pytplot.HTMLPlotter.TVarFigureSpecImage')
+    monkeypatch.setattr(spec_image, '_slice_warned', False)
+    pytplot.store_data('spec_slice', data={'x': 1.5e9 + np.arange(10) * 4., 'y': np.random.rand(10, 4),
+                                           'v': np.arange(1, 5)})
+    pytplot.options('spec_slice', 'spec', 1)
+    pytplot.xlim(1.5e9, 1.5e9 + 40)
+    pytplot.tplot_utilities.set_default_y_range('spec_slice')
+    # With a slice plot, the rectangles are drawn, and that is only printed the first time
+    for i in range(2):
+        figure = spec_image.TVarFigureSpecImage('spec_slice', auto_color=True, slice=True)
+        figure.setsize(width=400, height=200)
+        figure.buildfigure()
+        assert 'image' not in _glyph_data(figure) and len(_glyph_data(figure)['x']) == 9 * 3
+    assert capsys.readouterr().out.count('drawn with rectangles') == 1
+
+
+def test_spec_image_unsorted_bins():
+    from pytplot.HTMLPlotter.TVarFigureSpecImage import _spec_image
+    times = np.arange(11.)
+    values = np.random.rand(11, 4)
+    bins = np.tile([1., 2., 4., 8.], (11, 1))
+    bins[3] = [1., 4., 2., 8.]
+    pytplot.store_data('unsorted_bins', data={'x': times, 'y': values, 'v': bins})
+    monotonic = pytplot.tplot_utilities.spec_bins_monotonic(pytplot.data_quants['unsorted_bins'])
+    assert np.flatnonzero(~monotonic).tolist() == [3]
+    window = pytplot.data_quants['unsorted_bins'].isel(time=slice(2, 5))
+    assert pytplot.tplot_utilities.spec_bins_monotonic(window).tolist() == [True, False, True]
+
+    # Only the record out of order is sorted, which draws it the same as sorted bins
+    sorted_values = values.copy()
+    sorted_values[3] = values[3, [0, 2, 1, 3]]
+    expected = _spec_image(times, sorted_values, np.sort(bins, axis=1), True, [0, 10], [1, 8], False, 20, 16)
+    image = _spec_image(times, values, bins, True, [0, 10], [1, 8], False, 20, 16, monotonic)
+    assert np.array_equal(image, expected, equal_nan=True)
+    assert not np.array_equal(_spec_image(times, values, bins, True, [0, 10], [1, 8], False, 20, 16),
+                              expected, equal_nan=True)
+
+def test_line_decimation():
+    times = np.arange(100000.)
+    values = np.sin(times / 1000.)
+    values[12345] = 5.
+    values[50000:50010] = np.nan
+    keep = pytplot.tplot_utilities.decimate_minmax(times, values, 100)
+    assert len(keep) <= 500 and keep[0] == 0 and keep[-1] == 99999
+    assert 12345 in keep and 50000 in keep and np.isnan(values[keep]).sum() == 1
+    keep = pytplot.tplot_utilities.decimate_lttb(times, values, 400)
+    assert len(keep) == 400 and 12345 in keep and not np.isnan(values[keep]).any()
+    assert pytplot.tplot_utilities.times_to_str([1.5e9 + 0.4, 1.5e9 + 59.5, np.nan]) == \
+        [pytplot.tplot_utilities.int_to_str(t) for t in [1.5e9 + 0.4, 1.5e9 + 59.5, np.nan]]
+
+    pytplot.store_data('line_decimation', data={'x': 1.5e9 + times, 'y': np.column_stack((values, -values))})
+    pytplot.xlim(1.5e9 + 20000, 1.5e9 + 60000)
+    data = _glyph_data(_figure('line_decimation', width=200, plotter='bkTVarFigure1D'))
+    # 200 pixels before, in and after the x range, with at most 5 points in each
+    assert 3 * 200 * 2 < len(data['x']) <= 3 * 200 * 5
+    assert data['y'].max() == 5. and np.isnan(data['y']).any()
+    assert data['corrected_time'][0] == '2017-07-14 02:40:00'
+    pytplot.options('line_decimation', 'decimate', 'lttb')
+    assert len(_glyph_data(_figure('line_decimation', width=200, plotter='bkTVarFigure1D'))['x']) == 3 * 800
+    pytplot.options('line_decimation', 'decimate', False)
+    assert len(_glyph_data(_figure('line_decimation', width=200, plotter='bkTVarFigure1D'))['x']) == 100000
+    pytplot.tplot('line_decimation', bokeh=True, testing=True)
+
+
+def test_bokeh_server_document():
+    from bokeh.document import Document
+    from pytplot.HTMLPlotter.server import build_document, update_figures, _copy_glyph_data
+    times = 1.5e9 + np.arange(1000000) * 0.01
+    pytplot.store_data('server_line', data={'x': times, 'y': np.sin(times)})
+    pytplot.store_data('server_spec', data={'x': times[::100], 'y': np.random.rand(10000, 16) + 0.01,
+                                            'v': np.logspace(0, 3, 16)})
+    pytplot.options('server_spec', 'spec', 1)
+    pytplot.options('server_spec', 'plotter', 'bkTVarFigureSpecImage')
+    pytplot.xlim(times[0], times[-1])
+
+    doc = Document()
+    figures = build_document(doc, ['server_line', 'server_spec'], delay=10)
+    line, spec = [_glyph_data(figure) for figure in figures]
+    assert len(line['x']) <= 3 * 800 * 5
+    spec_image = spec['image'][0]
+
+    # Zooming in schedules a redraw, which shows the data of the window at full resolution
+    figures[-1].fig.x_range.start = (times[0] + 100) * 1000.0
+    figures[-1].fig.x_range.end = (times[0] + 110) * 1000.0
+    assert len(doc.session_callbacks) == 1
+    lim_info = dict(pytplot.lim_info)
+    update_figures(figures, [times[0] + 100, times[0] + 110], ['server_line', 'server_spec'])
+    line, spec = [_glyph_data(figure) for figure in figures]
+    in_window = (line['x'] >= (times[0] + 100) * 1000.0) & (line['x'] < (times[0] + 110) * 1000.0)
+    assert np.count_nonzero(in_window) == 1000 and len(line['x']) <= 1000 + 2 * 800 * 5
+    assert spec['image'][0].shape == spec_image.shape and not np.array_equal(spec['image'][0], spec_image)
+    assert [r.glyph.dw for r in figures[1].fig.renderers if hasattr(r, 'glyph')][0] == 10000.0
+    assert pytplot.tplot_opt_glob['x_range'] == [times[0], times[-1]]
+    assert pytplot.lim_info == lim_info
+
+    # Glyphs that don't match are left alone
+    _copy_glyph_data(figures[1].fig, figures[0].fig)
+    assert _glyph_data(figures[0]) is line
+    pytplot.tplot(['server_line', 'server_spec'], bokeh=True, server=True, testing=True)
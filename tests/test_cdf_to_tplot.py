@@ -1,8 +1,21 @@
 import pytplot
 import os
+import cdflib
+import time
+import numpy as np
+import pytest
 
 current_directory = os.path.dirname(os.path.realpath(__file__))
 
+
+@pytest.fixture(autouse=True)
+def catalog_dir(tmp_path, monkeypatch):
+    # Saved catalogs go to a temporary directory, never to the one set in PYTPLOT_CATALOG_DIR
+    from pytplot.importers import cdf_to_tplot
+    monkeypatch.setattr(cdf_to_tplot, '_catalog_dir', str(tmp_path / 'catalog'))
+    return tmp_path / 'catalog'
+
+
 def test_cdf_euv_read():
 
     pytplot.cdf_to_tplot(current_directory + "/testfiles/mvn_euv_l2_bands_20170619_v09_r03.cdf")
@@ -21,4 +34,189 @@ def test_cdf_swe_read():
     pytplot.options('diff_en_fluxes', 'ylog', 1)
     pytplot.options('diff_en_fluxes', 'zlog', 1)
     pytplot.tplot('diff_en_fluxes', testing=True)
-    pytplot.tplot('data', testing=True, bokeh=True)
\ No newline at end of file
+    pytplot.tplot('data', testing=True, bokeh=True)
+
+def _write_test_cdf(filename, first_record, num_records=300, num_bins=32):
+    # A small ISTP-like file with a spectrogram and a vector, one record per second
+    from cdflib.cdfwrite import CDF as CDFWriter
+    cdf_file = CDFWriter(filename, delete=True)
+    cdf_file.write_globalattrs({'Project': {0: 'pytplot tests'}})
+    epoch = cdflib.cdfepoch.compute_tt2000([2017, 6, 19, 0, 0, 0, 0, 0, 0]) + \
+        (first_record + np.arange(num_records)) * 1000000000
+    cdf_file.write_var({'Variable': 'Epoch', 'Data_Type': 33, 'Num_Elements': 1, 'Rec_Vary': True, 'Dim_Sizes': []},
+                       var_attrs={'VAR_TYPE': 'support_data'}, var_data=epoch.astype(np.int64))
+    cdf_file.write_var({'Variable': 'energy', 'Data_Type': 45, 'Num_Elements': 1, 'Rec_Vary': False,
+                        'Dim_Sizes': [num_bins]},
+                       var_attrs={'VAR_TYPE': 'support_data'}, var_data=np.logspace(0, 4, num_bins))
+    flux = np.random.rand(num_records, num_bins)
+    flux[3, 2] = -1e31
+    cdf_file.write_var({'Variable': 'flux', 'Data_Type': 45, 'Num_Elements': 1, 'Rec_Vary': True,
+                        'Dim_Sizes': [num_bins]},
+                       var_attrs={'VAR_TYPE': 'data', 'DEPEND_0': 'Epoch', 'DEPEND_1': 'energy', 'FILLVAL': -1e31,
+                                  'DISPLAY_TYPE': 'spectrogram'}, var_data=flux)
+    cdf_file.write_var({'Variable': 'bfield', 'Data_Type': 44, 'Num_Elements': 1, 'Rec_Vary': True, 'Dim_Sizes': [3]},
+                       var_attrs={'VAR_TYPE': 'data', 'DEPEND_0': 'Epoch'},
+                       var_data=np.random.rand(num_records, 3).astype(np.float32))
+    cdf_file.close()
+
+
+def _write_test_cdfs(directory, num_files, num_records=300):
+    filenames = [os.path.join(str(directory), 'test_' + str(i).zfill(3) + '.cdf') for i in range(num_files)]
+    for i, filename in enumerate(filenames):
+        _write_test_cdf(filename, i * num_records, num_records)
+    return filenames
+
+
+def test_cdf_workers(tmp_path):
+    filenames = _write_test_cdfs(tmp_path, 4)
+    assert pytplot.cdf_to_tplot(list(filenames)) == ['flux', 'bfield']
+    serial = {name: pytplot.data_quants[name].copy() for name in ['flux', 'bfield']}
+    assert np.isnan(serial['flux'].values).sum() == 4
+    for kwargs in [{'workers': 4}, {'workers': 2, 'use_processes': True}]:
+        pytplot.cdf_to_tplot(list(filenames), **kwargs)
+        for name in serial:
+            assert pytplot.data_quants[name].equals(serial[name])
+
+
+def test_cdf_trange(tmp_path):
+    filenames = _write_test_cdfs(tmp_path, 4)
+    pytplot.cdf_to_tplot(list(filenames))
+    flux = pytplot.data_quants['flux'].copy()
+    start = flux.time.values[0]
+    for trange in [[start + 250, start + 650.5], [start + 299, start + 299], [start - 100, start + 5000]]:
+        for kwargs in [{}, {'chunks': 100}]:
+            pytplot.cdf_to_tplot(list(filenames), trange=trange, **kwargs)
+            assert pytplot.data_quants['flux'].equals(flux.sel(time=slice(trange[0], trange[1])))
+    assert pytplot.cdf_to_tplot(list(filenames), trange=['2017-06-20', '2017-06-21']) == []
+
+
+def test_cdf_catalog(tmp_path):
+    filenames = _write_test_cdfs(tmp_path, 2)
+    pytplot.cdf_to_tplot(list(filenames))
+    catalog = pytplot.importers.cdf_to_tplot._catalog_cache[os.path.abspath(filenames[0])]
+    assert 'flux' in catalog['cdf_info']['zVariables'] and ('varattsget', 'flux') in catalog
+    assert pytplot.cdf_to_tplot(list(filenames), trange=['2017-06-20', '2017-06-21']) == []
+
+    # Rewriting a file replaces its catalog entry
+    _write_test_cdf(filenames[0], 0, num_records=200)
+    pytplot.cdf_to_tplot(list(filenames))
+    assert len(pytplot.data_quants['flux'].time) == 500
+
+
+def test_cdf_catalog_saved(tmp_path, monkeypatch, catalog_dir):
+    from pytplot.importers import cdf_to_tplot
+    filename = str(tmp_path / 'test.cdf')
+    _write_test_cdf(filename, 0)
+    pytplot.cdf_to_tplot(filename)
+    flux = pytplot.data_quants['flux'].copy()
+    assert [path.suffix for path in catalog_dir.iterdir()] == ['.json']
+
+    # A new session reads the catalog back instead of opening the file for it
+    monkeypatch.setattr(cdf_to_tplot, '_catalog_cache', {})
+    cdf_file = cdf_to_tplot._CatalogedCDF(filename)
+    assert 'flux' in cdf_file.cdf_info()['zVariables'] and cdf_file.varattsget('flux')['DEPEND_0'] == 'Epoch'
+    assert cdf_file._cdf is None
+    pytplot.cdf_to_tplot(filename)
+    assert pytplot.data_quants['flux'].equals(flux)
+
+    # The saved catalog isn't used once the file changes
+    _write_test_cdf(filename, 0, num_records=200)
+    monkeypatch.setattr(cdf_to_tplot, '_catalog_cache', {})
+    assert 'cdf_info' not in cdf_to_tplot._CatalogedCDF(filename).catalog
+    pytplot.cdf_to_tplot(filename)
+    assert len(pytplot.data_quants['flux'].time) == 200
+
+
+def test_cdf_catalog_pruned(tmp_path, monkeypatch, catalog_dir):
+    from pytplot.importers import cdf_to_tplot
+    filenames = _write_test_cdfs(tmp_path, 3)
+    pytplot.cdf_to_tplot(list(filenames))
+    catalogs = sorted(catalog_dir.iterdir())
+    assert len(catalogs) == 3
+    os.utime(str(catalogs[0]), (0, 0))
+    cdf_to_tplot._prune_catalogs()
+    assert sorted(catalog_dir.iterdir()) == catalogs[1:]
+
+    # Then the least recently saved go, until the rest fit
+    monkeypatch.setattr(cdf_to_tplot, '_CATALOG_MAX_BYTES', catalogs[2].stat().st_size)
+    os.utime(str(catalogs[1]), (time.time() - 60,) * 2)
+    cdf_to_tplot._prune_catalogs()
+    assert sorted(catalog_dir.iterdir()) == catalogs[2:]
+
+
+def test_cdf_mask_invalid(tmp_path):
+    from cdflib.cdfwrite import CDF as CDFWriter
+    filename = str(tmp_path / 'counts.cdf')
+    cdf_file = CDFWriter(filename, delete=True)
+    epoch = cdflib.cdfepoch.compute_tt2000([2017, 6, 19, 0, 0, 0, 0, 0, 0]) + np.arange(4) * 1000000000
+    cdf_file.write_var({'Variable': 'Epoch', 'Data_Type': 33, 'Num_Elements': 1, 'Rec_Vary': True, 'Dim_Sizes': []},
+                       var_attrs={'VAR_TYPE': 'support_data'}, var_data=epoch.astype(np.int64))
+    counts = np.array([[1, 2], [-1, 4], [5, 2000], [7, -2147483648]], dtype=np.int32)
+    cdf_file.write_var({'Variable': 'counts', 'Data_Type': 4, 'Num_Elements': 1, 'Rec_Vary': True, 'Dim_Sizes': [2]},
+                       var_attrs={'VAR_TYPE': 'data', 'DEPEND_0': 'Epoch', 'FILLVAL': [-2147483648, 'CDF_INT4'],
+                                  'VALIDMIN': [0, 'CDF_INT4'], 'VALIDMAX': [1000, 'CDF_INT4']}, var_data=counts)
+    cdf_file.close()
+
+    pytplot.cdf_to_tplot(filename)
+    assert np.array_equal(pytplot.data_quants['counts'].values, counts)
+    for mask_invalid in [True, ['counts']]:
+        pytplot.cdf_to_tplot(filename, mask_invalid=mask_invalid)
+        assert np.array_equal(pytplot.data_quants['counts'].values,
+                              [[1, 2], [np.nan, 4], [5, np.nan], [7, np.nan]], equal_nan=True)
+
+
+def test_cdf_epoch_cache(tmp_path):
+    from pytplot.importers.cdf_to_tplot import _epoch_cache
+    filenames = _write_test_cdfs(tmp_path, 2)
+    pytplot.cdf_to_tplot(list(filenames), varformat='flux')
+    pytplot.cdf_to_tplot(list(filenames), varformat='bfield')
+    pytplot.cdf_to_tplot(list(filenames), center_measurement=True)
+    keys = [key for key in _epoch_cache if key[0].startswith(str(tmp_path))]
+    # One decode per file for each centering mode, shared by both variables
+    assert len(keys) == 4
+    assert sorted(key[-2] for key in keys) == [False, False, True, True]
+
+
+def test_cdf_epoch_cache_copies(tmp_path):
+    filename = str(tmp_path / 'test.cdf')
+    _write_test_cdf(filename, 0)
+    table = pytplot.cdf_to_tplot(filename, notplot=True)
+    # The cached times are not shared with, or changed through, the returned variables
+    table['flux']['x'][0] = 0.0
+    assert table['bfield']['x'][0] != 0.0
+    assert not np.shares_memory(table['flux']['x'], table['bfield']['x'])
+    pytplot.cdf_to_tplot(filename)
+    times = pytplot.data_quants['flux'].time.values
+    assert times.flags.writeable
+    assert pytplot.cdf_to_tplot(filename, notplot=True)['flux']['x'][0] != 0.0
+
+
+def test_cdf_join_records():
+    from pytplot.importers.cdf_to_tplot import _join_records
+    records = [np.arange(6, dtype=np.int16).reshape(3, 2), np.array(None), np.full((2, 2), 0.5)]
+    joined = _join_records(records, False)
+    # The blocks are copied into one array of the common type, and let go of
+    assert joined.dtype == np.float64 and records == []
+    assert np.array_equal(joined, [[0, 1], [2, 3], [4, 5], [0.5, 0.5], [0.5, 0.5]])
+
+
+def test_cdf_epoch_conversion():
+    from cdflib.epochs import CDFepoch
+    from pytplot.importers.cdf_to_tplot import _epochs_to_unix
+    # Around each leap second, and through the years between them
+    dates = [[year, month, day, hour, 59, 59, 999, 999, 999] for year in range(1972, 2030) for month, day, hour
+             in [(6, 30, 23), (7, 1, 0), (12, 31, 23)]] + [[2017, 1, 1, 0, 0, 0, 0, 0, 1], [2030, 5, 5, 1, 2, 3, 4, 5, 6]]
+    tt2000 = np.array([CDFepoch.compute_tt2000(date) for date in dates], dtype=np.int64)
+    epoch = np.array([CDFepoch.compute_epoch(date[:7]) for date in dates])
+    epoch16 = np.array([CDFepoch.compute_epoch16(date + [0]) for date in dates])
+    for epochs in [tt2000, epoch, epoch16]:
+        expected = [CDFepoch.unixtime(value)[0] for value in epochs]
+        assert np.allclose(_epochs_to_unix(epochs), expected, rtol=0, atol=1e-5)
+
+    # 23:59:60 has no unix time, so it is held at the start of the next day
+    new_year = CDFepoch.compute_tt2000([2017, 1, 1, 0, 0, 0, 0, 0, 0])
+    leap_second = new_year - 10**9 + np.arange(0, 10**9, 10**8)
+    assert np.all(_epochs_to_unix(leap_second) == 1483228800.0)
+    # Fill values and times before 1972 are left to cdflib
+    old = np.array([CDFepoch.compute_tt2000([1960, 1, 1, 0, 0, 0, 0, 0, 0]), new_year])
+    assert np.allclose(_epochs_to_unix(old), [-315619200.0, 1483228800.0])
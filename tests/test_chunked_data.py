@@ -0,0 +1,108 @@
+import pytplot
+import numpy as np
+import pytest
+
+da = pytest.importorskip('dask.array')
+from dask.callbacks import Callback
+
+
+class _CountTasks(Callback):
+    # Counts the dask tasks that are run, i.e. how much data is actually computed
+    def __init__(self):
+        super().__init__()
+        self.tasks = 0
+
+    def _pretask(self, key, dsk, state):
+        self.tasks += 1
+
+
+def test_store_data_chunks():
+    values = np.random.rand(1000, 4)
+    values[100:104, 1] = np.nan
+    pytplot.store_data('chunked', data={'x': np.arange(1000.), 'y': values}, chunks=100)
+    tvar = pytplot.data_quants['chunked']
+    assert isinstance(tvar.data, da.Array)
+    assert tvar.data.chunks[0] == (100,) * 10
+    assert isinstance(pytplot.get_data('chunked')[1], da.Array)
+
+    stats = pytplot.tplot_utilities.get_data_stats(tvar)
+    assert stats['max'] == np.nanmax(values) and stats['finite_count'] == values.size - 4
+
+    pytplot.store_data('chunked_lazy', data={'x': np.arange(1000.), 'y': da.from_array(values, chunks=250)})
+    assert pytplot.data_quants['chunked_lazy'].data.chunks[0] == (250,) * 4
+
+
+def test_tplot_math_chunked():
+    values = np.random.rand(1000, 3)
+    values[95:105, 0] = np.nan
+    pytplot.store_data('in_memory', data={'x': np.arange(1000.), 'y': values})
+    pytplot.store_data('chunked', data={'x': np.arange(1000.), 'y': values}, chunks=100)
+
+    pytplot.clip('chunked', 0.1, 0.9, 'chunked_clip')
+    pytplot.deflag('chunked', 0.5, 'chunked_deflag')
+    pytplot.derive('chunked', 'chunked_derive')
+    pytplot.avg_res_data('chunked', 10, 'chunked_avg')
+    pytplot.interp_nan('chunked', 'chunked_interp', s_limit=12)
+    pytplot.interp_nan('in_memory', 'in_memory_interp', s_limit=12)
+    for name in ['chunked_clip', 'chunked_deflag', 'chunked_derive', 'chunked_avg', 'chunked_interp']:
+        assert isinstance(pytplot.data_quants[name].data, da.Array)
+    assert np.allclose(pytplot.data_quants['chunked_interp'].values,
+                       pytplot.data_quants['in_memory_interp'].values)
+
+
+def test_chunked_stays_lazy():
+    values = np.random.rand(1000, 3)
+    values[95:105, 0] = np.nan
+    with _CountTasks() as counter:
+        pytplot.store_data('chunked', data={'x': np.arange(1000.), 'y': values}, chunks=100)
+        pytplot.store_data('chunked_spec', data={'x': np.arange(1000.), 'y': values, 'v': [1, 2, 3]}, chunks=100)
+        pytplot.get_data('chunked')
+        pytplot.clip('chunked', 0.1, 0.9, 'chunked_clip')
+        pytplot.deflag('chunked', 0.5, 'chunked_deflag')
+        pytplot.derive('chunked', 'chunked_derive')
+        pytplot.avg_res_data('chunked', 10, 'chunked_avg')
+        pytplot.interp_nan('chunked', 'chunked_interp', s_limit=12)
+        pytplot.interp_nan('chunked', 'chunked_interp_all')
+        assert counter.tasks == 0
+
+        pytplot.data_quants['chunked'].sum().values
+        assert counter.tasks > 0
+
+
+def test_interp_nan_chunk_boundary():
+    values = np.random.rand(1000, 3)
+    values[180:215, 0] = np.nan
+    values[:5, 1] = np.nan
+    pytplot.store_data('in_memory', data={'x': np.arange(1000.), 'y': values})
+    pytplot.store_data('chunked', data={'x': np.arange(1000.), 'y': values}, chunks=100)
+    pytplot.interp_nan('in_memory', 'in_memory_interp')
+    pytplot.interp_nan('chunked', 'chunked_interp')
+    assert isinstance(pytplot.data_quants['chunked_interp'].data, da.Array)
+    assert pytplot.data_quants['chunked_interp'].data.chunks[0] == (100,) * 10
+    interpolated = pytplot.data_quants['chunked_interp'].values
+    assert not np.isnan(interpolated[180:215, 0]).any()
+    assert np.allclose(interpolated, pytplot.data_quants['in_memory_interp'].values, equal_nan=True)
+
+
+def test_plot_chunked_window():
+    pytplot.store_data('chunked', data={'x': np.arange(1000.), 'y': np.random.rand(1000)}, chunks=100)
+    pytplot.xlim(100, 200)
+    with pytplot.tplot_utilities.loaded_time_window('chunked'):
+        assert isinstance(pytplot.data_quants['chunked'].data, np.ndarray)
+        assert len(pytplot.data_quants['chunked'].time) == 101
+    assert isinstance(pytplot.data_quants['chunked'].data, da.Array)
+
+
+def test_plot_chunked_no_window():
+    values = np.random.rand(100000)
+    values[54321] = 5.0
+    pytplot.store_data('chunked_all', data={'x': np.arange(100000.), 'y': values}, chunks=10000)
+    pytplot.tplot_opt_glob.pop('x_range', None)
+    with pytplot.tplot_utilities.loaded_time_window('chunked_all'):
+        window = pytplot.data_quants['chunked_all']
+        assert isinstance(window.data, np.ndarray)
+        assert len(window.time) <= 4 * pytplot.tplot_opt_glob['window_size'][0]
+        assert window.max() == 5.0
+        assert window.time[0] == 0 and window.time[-1] == 99999
+        assert 'plot_options' in window.attrs
+    assert isinstance(pytplot.data_quants['chunked_all'].data, da.Array)
@@ -1,5 +1,6 @@
 import pytplot
 import os
+import numpy as np
 
 current_directory = os.path.dirname(os.path.realpath(__file__))
 
@@ -12,4 +13,101 @@ def test_goes_read():
     pytplot.timebar('2017-06-19 03:30:00', "B_COUNT", color='g')
     pytplot.options("B_COUNT", 'ylog', 1)
     pytplot.store_data("BCOUNTFLUX", data=["B_COUNT", "B_FLUX"])
-    pytplot.tplot([1, 2, 3, 4, 5, 7], var_label=6, testing=True)
\ No newline at end of file
+    pytplot.tplot([1, 2, 3, 4, 5, 7], var_label=6, testing=True)
+
+def _write_test_netcdf(filename, num_records=100, units='hours since 2017-06-19 00:00:00', time_name='time', first=0,
+                       step=0.25):
+    from netCDF4 import Dataset
+    with Dataset(filename, 'w') as file:
+        file.createDimension('record', num_records)
+        file.createDimension('orbit', 1)
+        time_var = file.createVariable(time_name, 'f8', ('record',))
+        time_var.units = units
+        time_var[:] = first + np.arange(num_records) * step
+        flux = file.createVariable('flux', 'f4', ('record',))
+        flux.missing_value = '-99999'
+        values = np.arange(num_records, dtype=np.float32)
+        values[::10] = -99999
+        flux[:] = values
+        counts = file.createVariable('counts', 'i4', ('record',))
+        counts[:] = np.arange(num_records)
+        longitude = file.createVariable('longitude', 'f4', ('orbit',))
+        longitude[:] = 75.
+
+
+def test_netcdf_time_units(tmp_path):
+    filename = str(tmp_path / 'hours.nc')
+    _write_test_netcdf(filename)
+    assert pytplot.netcdf_to_tplot(filename) == ['time', 'flux', 'counts']
+    times = pytplot.data_quants['flux'].time.values
+    assert np.allclose(times, 1497830400. + np.arange(100) * 900.)
+    flux = pytplot.data_quants['flux'].values
+    assert np.isnan(flux[::10]).all() and not np.isnan(flux[1::10]).any()
+    assert pytplot.netcdf_to_tplot(filename, varnames=['counts'], prefix='nc_') == ['nc_counts']
+
+    _write_test_netcdf(filename, units='days since 2017-06-19T12:00:00', time_name='epoch')
+    # Without a time variable nothing is loaded, instead of asking for one
+    assert pytplot.netcdf_to_tplot(filename) == []
+    pytplot.netcdf_to_tplot(filename, time='epoch')
+    assert np.allclose(pytplot.data_quants['flux'].time.values, 1497873600. + np.arange(100) * 21600.)
+
+
+def test_netcdf_merge(tmp_path):
+    filenames = [str(tmp_path / ('day' + str(i) + '.nc')) for i in range(3)]
+    # 25 hours of records each, so that each file overlaps the next by an hour
+    for i, filename in enumerate(filenames):
+        _write_test_netcdf(filename, num_records=100, first=24 * i)
+    # The files are read in the order given, and the records sorted by time
+    pytplot.netcdf_to_tplot(filenames[::-1], varnames=['flux'])
+    times = pytplot.data_quants['flux'].time.values
+    assert len(times) == 300 and np.all(np.diff(times) >= 0)
+
+    pytplot.netcdf_to_tplot(filenames[:2], varnames=['flux'], remove_duplicates=True)
+    pytplot.netcdf_to_tplot(filenames[2], varnames=['flux'], merge=True, remove_duplicates=True)
+    times = pytplot.data_quants['flux'].time.values
+    assert np.allclose(times, 1497830400. + np.arange(292) * 900.)
+    # The record loaded last is kept
+    assert pytplot.data_quants['flux'].values[96 * 2 + 1] == 1
+
+    # The plot options of the variable merged into are kept, and the time range covers all of the records
+    pytplot.netcdf_to_tplot(filenames[0], varnames=['flux'])
+    pytplot.options('flux', 'ytitle', 'Flux')
+    pytplot.tplot_utilities.set_default_y_range('flux')
+    pytplot.netcdf_to_tplot(filenames[1:], varnames=['flux'], merge=True)
+    plot_options = pytplot.data_quants['flux'].attrs['plot_options']
+    assert plot_options['yaxis_opt']['axis_label'] == 'Flux' and 'y_range' not in plot_options['yaxis_opt']
+    assert plot_options['trange'] == [times[0], times[-1]]
+
+
+def test_netcdf_masked(tmp_path):
+    from netCDF4 import Dataset
+    filename = str(tmp_path / 'masked.nc')
+    _write_test_netcdf(filename, num_records=5)
+    with Dataset(filename, 'a') as file:
+        filled = file.createVariable('filled', 'f4', ('record',), fill_value=-1.)
+        filled[:] = [1., -1., 3., 4., 5.]
+        valid = file.createVariable('valid', 'i2', ('record',))
+        valid.valid_range = np.array([0, 100], dtype=np.int16)
+        valid[:] = [1, 200, 3, -5, 5]
+    pytplot.netcdf_to_tplot(filename, varnames=['filled', 'valid', 'counts'])
+    assert np.array_equal(pytplot.data_quants['filled'].values, [1., np.nan, 3., 4., 5.], equal_nan=True)
+    assert np.array_equal(pytplot.data_quants['valid'].values, [1., np.nan, 3., np.nan, 5.], equal_nan=True)
+    assert pytplot.data_quants['counts'].dtype.kind == 'i'
+
+
+def test_netcdf_packed(tmp_path):
+    from netCDF4 import Dataset
+    filename = str(tmp_path / 'packed.nc')
+    _write_test_netcdf(filename, num_records=5)
+    with Dataset(filename, 'a') as file:
+        packed = file.createVariable('packed', 'i2', ('record',))
+        packed.scale_factor = 0.01
+        packed[:] = [1.23, 2.35, 3.46, 4.5, 5.6]
+    pytplot.netcdf_to_tplot(filename, varnames=['packed'])
+    assert pytplot.data_quants['packed'].dtype.kind == 'f'
+    assert np.allclose(pytplot.data_quants['packed'].values, [1.23, 2.35, 3.46, 4.5, 5.6])
+
+    # Float data with NaNs merged with integer data stays float
+    pytplot.store_data('counts', data={'x': [0., 1.], 'y': [np.nan, 0.5]})
+    pytplot.netcdf_to_tplot(filename, varnames=['counts'], merge=True)
+    assert np.array_equal(pytplot.data_quants['counts'].values, [np.nan, 0.5, 0, 1, 2, 3, 4], equal_nan=True)
@@ -0,0 +1,84 @@
+import pytplot
+import datetime
+import time
+import numpy as np
+import pandas as pd
+
+
+def test_store_data_time_inputs():
+    start = datetime.datetime(2017, 6, 19, tzinfo=datetime.timezone.utc)
+    expected = start.timestamp() + np.arange(5) * 60.
+    datetimes = [start + datetime.timedelta(minutes=i) for i in range(5)]
+    inputs = {'datetime64': np.array([d.replace(tzinfo=None) for d in datetimes], dtype='datetime64[ns]'),
+              'DatetimeIndex': pd.DatetimeIndex(datetimes),
+              'datetime': datetimes,
+              'string': [d.strftime('%Y-%m-%dT%H:%M:%S') for d in datetimes]}
+    for kind, times in inputs.items():
+        pytplot.store_data('time_' + kind, data={'x': times, 'y': np.arange(5)})
+        assert np.array_equal(pytplot.get_data('time_' + kind)[0], expected)
+
+
+def test_store_data_without_copy():
+    times = np.arange(100, dtype=np.float64)
+    values = np.random.rand(100, 16, 4)
+    v1 = np.logspace(0, 3, 16)
+    v2 = np.tile(np.arange(4.), (100, 1))
+    pytplot.store_data('no_copy', data={'x': times, 'y': values, 'v1': v1, 'v2': v2}, copy=False)
+    tvar = pytplot.data_quants['no_copy']
+    assert np.shares_memory(tvar.values, values)
+    assert np.shares_memory(tvar.coords['v1'].values, v1)
+    assert np.shares_memory(tvar.coords['spec_bins'].values, v2)
+    assert tvar.attrs['plot_options']['spec_bins_ascending']
+
+    pytplot.store_data('copy', data={'x': times, 'y': values, 'v1': v1, 'v2': v2})
+    assert not np.shares_memory(pytplot.data_quants['copy'].values, values)
+    assert pytplot.data_quants['copy'].equals(tvar)
+
+
+def test_spec_bins_ordering():
+    bins = np.tile(np.logspace(3, 0, 8), (6, 1))
+    bins[0, :] = np.nan
+    bins[1, :3] = np.nan
+    bins[2, 4] = np.inf
+    bins[3, 5] = bins[3, 2]
+    pytplot.store_data('varying_bins', data={'x': np.arange(6), 'y': np.ones((6, 8)), 'v': bins})
+    plot_options = pytplot.data_quants['varying_bins'].attrs['plot_options']
+    assert not plot_options['spec_bins_ascending']
+    assert plot_options['spec_bins_monotonic'].tolist() == [True, True, True, False, True, True]
+
+
+def test_spec_bins_ordering_large():
+    # Checked with whole array operations, so 10^5 records of time varying bins take milliseconds
+    from pytplot.store_data import _check_spec_bins_ordering
+    bins = np.tile(np.logspace(0, 4, 64), (100000, 1))
+    bins[:50000, :16] = np.nan
+    bins[::1000, 40] = bins[::1000, 39]
+    t0 = time.perf_counter()
+    ascending, monotonic = _check_spec_bins_ordering(np.arange(100000), bins)
+    elapsed = time.perf_counter() - t0
+    assert ascending
+    assert np.array_equal(np.flatnonzero(~monotonic), np.arange(0, 100000, 1000))
+    assert elapsed < 2.0
+
+
+def test_data_stats():
+    y = np.array([[-np.inf, 0., 2.], [np.nan, 0.5, np.inf]])
+    pytplot.store_data('stats', data={'x': [1, 2], 'y': y})
+    # The y range is only computed when it is first needed
+    assert 'y_range' not in pytplot.data_quants['stats'].attrs['plot_options']['yaxis_opt']
+    assert pytplot.tplot_utilities.set_default_y_range('stats') == [0., 2.]
+    stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['stats'])
+    assert (stats['min'], stats['max'], stats['min_positive'], stats['finite_count']) == (0., 2., 0.5, 3)
+
+    # Writable data can be changed in place, so its statistics are not cached
+    pytplot.data_quants['stats'].data[0, 2] = 4.
+    assert pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['stats'])['max'] == 4.
+    pytplot.data_quants['stats'].data.flags.writeable = False
+    stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['stats'])
+    assert pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['stats']) is stats
+
+    pytplot.replace_data('stats', y * 10)
+    assert 'y_range' not in pytplot.data_quants['stats'].attrs['plot_options']['yaxis_opt']
+    assert pytplot.tplot_utilities.set_default_y_range('stats') == [0., 20.]
+    stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['stats'])
+    assert (stats['min'], stats['max'], stats['min_positive']) == (0., 20., 5.)
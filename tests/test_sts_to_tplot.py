@@ -0,0 +1,202 @@
+import pytplot
+import datetime
+import os
+import numpy as np
+
+_STS_HEADER = """  KERNEL_LIST = maven_v01.tf
+  OBJECT = FILE
+    FILE_NAME = {name}
+  END_OBJECT
+  OBJECT = RECORD
+    OBJECT = VECTOR
+      NAME = TIME
+      OBJECT = SCALAR
+        NAME = YEAR
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = DOY
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = HOUR
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = MIN
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = SEC
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = MSEC
+      END_OBJECT
+    END_OBJECT
+    OBJECT = SCALAR
+      NAME = DDAY
+    END_OBJECT
+    OBJECT = VECTOR
+      NAME = OB_B
+      OBJECT = SCALAR
+        NAME = X
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = Y
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = Z
+      END_OBJECT
+    END_OBJECT
+    OBJECT = SCALAR
+      NAME = OB_B_RANGE
+    END_OBJECT
+    OBJECT = VECTOR
+      NAME = POSN
+      OBJECT = SCALAR
+        NAME = X
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = Y
+      END_OBJECT
+      OBJECT = SCALAR
+        NAME = Z
+      END_OBJECT
+    END_OBJECT
+  END_OBJECT
+"""
+
+
+def _write_test_sts(filename, first_time, num_records=300):
+    """
+    Writes a MAVEN MAG like STS file of num_records 1 second records from the unix time first_time.
+    """
+    times = first_time + np.arange(num_records)
+    dates = np.array(times * 1e3, dtype='M8[ms]')
+    year = dates.astype('M8[Y]')
+    doy = (dates.astype('M8[D]') - year).astype(np.int64) + 1
+    day_ms = (dates - dates.astype('M8[D]')).astype(np.int64)
+    columns = [year.astype(np.int64) + 1970, doy, day_ms // 3600000, day_ms // 60000 % 60, day_ms // 1000 % 60,
+               day_ms % 1000, doy + day_ms / 86400000.,
+               np.sin(times / 100.), np.cos(times / 100.), times % 7, np.full(num_records, 3),
+               times % 3000., times % 5000., times % 7000.]
+    with open(filename, 'w') as f:
+        f.write(_STS_HEADER.format(name=os.path.basename(filename)))
+        np.savetxt(f, np.column_stack(columns), fmt=['%5d', '%4d', '%3d', '%3d', '%3d', '%4d', '%14.8f'] +
+                   ['%10.4f'] * 3 + ['%2d'] + ['%12.3f'] * 3)
+
+
+def test_sts_read(tmp_path):
+    directory = str(tmp_path)
+    first_time = datetime.datetime(2017, 6, 19, tzinfo=datetime.timezone.utc).timestamp()
+    _write_test_sts(os.path.join(directory, 'day1.sts'), first_time + 0.25)
+    _write_test_sts(os.path.join(directory, 'day2.sts'), first_time + 86400.25)
+
+    names = pytplot.sts_to_tplot([os.path.join(directory, 'day2.sts'), os.path.join(directory, 'day1.sts')])
+    assert names == ['DDAY', 'OB_B', 'OB_B_RANGE', 'POSN']
+    times = first_time + 0.25 + np.concatenate((np.arange(300), 86400 + np.arange(300)))
+    assert np.allclose(pytplot.data_quants['OB_B'].time.values, times, rtol=0, atol=1e-6)
+    assert pytplot.data_quants['OB_B'].shape == (600, 3)
+    assert np.allclose(pytplot.data_quants['OB_B'].values[:, 0], np.round(np.sin(times / 100.), 4))
+
+    sts_dict = pytplot.sts_to_tplot(os.path.join(directory, 'day1.sts'), read_only=True)
+    assert sorted(sts_dict) == ['DDAY', 'OB_B_RANGE', 'OB_B_X', 'OB_B_Y', 'OB_B_Z',
+                                'POSN_X', 'POSN_Y', 'POSN_Z', 'time_unix']
+    assert np.allclose(sts_dict['time_unix'], times[:300], rtol=0, atol=1e-6)
+
+
+def test_sts_nested_header(tmp_path):
+    # The RECORD object inside of an outer object, whose END_OBJECT ends the header
+    filename = str(tmp_path / 'nested.sts')
+    _write_test_sts(filename, 1497830400.0)
+    with open(filename) as f:
+        text = f.read()
+    text = text.replace('  OBJECT = RECORD\n', 'OBJECT = DATA\n  OBJECT = RECORD\n', 1)
+    lines = text.splitlines(True)
+    last = max(i for i, line in enumerate(lines) if 'END_OBJECT' in line)
+    lines.insert(last + 1, 'END_OBJECT\n')
+    with open(filename, 'w') as f:
+        f.writelines(lines)
+    # Once with the header parsed, and once with its RECORD from the layout cache
+    for _ in range(2):
+        sts_dict = pytplot.sts_to_tplot(filename, read_only=True)
+        assert len(sts_dict['time_unix']) == 300
+        assert np.allclose(sts_dict['time_unix'], 1497830400.0 + np.arange(300), rtol=0, atol=1e-6)
+
+
+def test_sts_workers(tmp_path):
+    directory = str(tmp_path)
+    filenames = [os.path.join(directory, 'day' + str(i) + '.sts') for i in range(4)]
+    for i, filename in enumerate(filenames):
+        _write_test_sts(filename, 1497830400.0 + 86400 * i)
+    # A blank line at the end of a file, and a file without POSN
+    with open(filenames[1], 'a') as f:
+        f.write('\n')
+    with open(filenames[3]) as f:
+        lines = f.readlines()
+    start = lines.index('      NAME = POSN\n') - 1
+    lines = lines[:start] + lines[start + 12:]
+    lines[start + 1:] = [' '.join(line.split()[:-3]) + '\n' for line in lines[start + 1:]]
+    with open(filenames[3], 'w') as f:
+        f.writelines(lines)
+
+    expected = pytplot.sts_to_tplot(list(filenames), read_only=True)
+    assert len(expected['time_unix']) == 1200
+    assert np.isnan(expected['POSN_X'][900:]).all() and not np.isnan(expected['POSN_X'][:900]).any()
+    for use_processes in [False, True]:
+        sts_dict = pytplot.sts_to_tplot(list(filenames), read_only=True, workers=3, use_processes=use_processes)
+        for key in expected:
+            assert np.array_equal(sts_dict[key], expected[key], equal_nan=True)
+
+    # Vectors are named as in the header, without the prefix
+    names = pytplot.sts_to_tplot(list(filenames), prefix='mvn_', merge=False, workers=2)
+    assert names == ['mvn_DDAY', 'OB_B', 'mvn_OB_B_RANGE', 'POSN']
+    assert np.array_equal(pytplot.data_quants['OB_B'].values[:, 2], expected['OB_B_Z'])
+    assert not np.shares_memory(pytplot.data_quants['OB_B'].time.values, pytplot.data_quants['POSN'].time.values)
+
+
+def test_sts_layout_cache(tmp_path):
+    from pytplot.importers import sts_to_tplot as sts_module
+    directory = str(tmp_path)
+    filenames = [os.path.join(directory, 'day' + str(i) + '.sts') for i in range(3)]
+    for i, filename in enumerate(filenames):
+        _write_test_sts(filename, 1497830400.0 + 86400 * i)
+    # The headers only differ outside of the RECORD object
+    layout = sts_module._read_sts_layout(filenames[0])
+    cached = len(sts_module._layout_cache)
+    for filename in filenames[1:]:
+        assert sts_module._read_sts_layout(filename) == layout
+    assert len(sts_module._layout_cache) == cached
+
+    # A different RECORD object is parsed and cached
+    with open(filenames[2]) as f:
+        text = f.read()
+    with open(filenames[2], 'w') as f:
+        f.write(text.replace('NAME = OB_B_RANGE', 'NAME = OB_B_RNG'))
+    column_names, _, offset = sts_module._read_sts_layout(filenames[2])
+    assert ['OB_B_RNG'] in column_names and offset == layout[2] - 2
+    assert len(sts_module._layout_cache) == cached + 1
+
+    # The cached offset is only used if the data starts there
+    with open(filenames[1]) as f:
+        text = f.read()
+    with open(filenames[1], 'w') as f:
+        f.write(text[:layout[2]] + '  END_OBJECT\n' + text[layout[2]:])
+    assert sts_module._read_sts_layout(filenames[1])[2] == layout[2] + len('  END_OBJECT\n')
+    sts_dict = pytplot.sts_to_tplot(filenames, read_only=True)
+    assert len(sts_dict['time_unix']) == 900 and np.all(np.diff(sts_dict['time_unix']) > 0)
+
+
+def test_sts_time_columns(tmp_path):
+    # The TIME columns are found by their names, not by their order
+    filename = str(tmp_path / 'reordered.sts')
+    _write_test_sts(filename, 1497830400.5)
+    with open(filename) as f:
+        lines = f.readlines()
+    year = lines.index('        NAME = YEAR\n') - 1
+    lines[year:year + 3], lines[year + 15:year + 18] = lines[year + 15:year + 18], lines[year:year + 3]
+    data = lines.index('  END_OBJECT\n', year + 40) + 1
+    for i in range(data, len(lines)):
+        columns = lines[i].split()
+        columns[0], columns[5] = columns[5], columns[0]
+        lines[i] = ' '.join(columns) + '\n'
+    with open(filename, 'w') as f:
+        f.writelines(lines)
+    sts_dict = pytplot.sts_to_tplot(filename, read_only=True)
+    assert np.allclose(sts_dict['time_unix'], 1497830400.5 + np.arange(300), rtol=0, atol=1e-6)
@@ -0,0 +1,56 @@
+import pytplot
+import os
+import pickle
+import numpy as np
+
+
+def test_tplot_save_restore(tmp_path):
+    directory = str(tmp_path)
+    pytplot.store_data('saved_spec', data={'x': np.arange(100.), 'y': np.random.rand(100, 8), 'v': np.arange(8.)})
+    pytplot.store_data('saved_line', data={'x': np.arange(100.), 'y': np.random.rand(100)})
+    pytplot.options('saved_spec', 'spec', 1)
+    pytplot.ylim('saved_spec', 1, 5)
+    spec = pytplot.data_quants['saved_spec'].copy()
+    pytplot.tplot_save(['saved_spec', 'saved_line'], filename=os.path.join(directory, 'session.pytplot'))
+
+    pytplot.del_data(['saved_spec', 'saved_line'])
+    pytplot.tplot_restore(os.path.join(directory, 'session.pytplot'))
+    assert pytplot.data_quants['saved_spec'].equals(spec)
+    assert pytplot.data_quants['saved_spec'].attrs['plot_options'] == spec.attrs['plot_options']
+
+    pytplot.del_data(['saved_spec', 'saved_line'])
+    pytplot.tplot_restore(os.path.join(directory, 'session.pytplot'), varnames='saved_spec', trange=[10, 19])
+    assert 'saved_line' not in pytplot.data_quants
+    assert pytplot.data_quants['saved_spec'].equals(spec.sel(time=slice(10, 19)))
+
+    # Old pickle files are only restored when allowed
+    with open(os.path.join(directory, 'old.pytplot'), 'wb') as f:
+        pickle.dump([1, spec.rename('pickled'), {}], f)
+    pytplot.tplot_restore(os.path.join(directory, 'old.pytplot'))
+    assert 'pickled' not in pytplot.data_quants
+    pytplot.tplot_restore(os.path.join(directory, 'old.pytplot'), allow_pickle=True)
+    assert pytplot.data_quants['pickled'].equals(spec)
+
+
+def test_tplot_restore_trange_varying_bins(tmp_path):
+    filename = os.path.join(str(tmp_path), 'varying.pytplot')
+    bins = np.tile(np.arange(1., 9.), (100, 1)) * (1 + np.arange(100.)[:, np.newaxis])
+    bins[12, 3] = bins[12, 2]
+    pytplot.store_data('varying', data={'x': np.arange(100.), 'y': np.arange(800.).reshape(100, 8), 'v': bins})
+    pytplot.store_data('limited', data={'x': np.arange(100.), 'y': np.arange(100.)})
+    pytplot.options('varying', 'spec', 1)
+    pytplot.tplot_utilities.set_default_y_range('varying')
+    pytplot.ylim('limited', -1, 1)
+    pytplot.tplot_save(['varying', 'limited'], filename=filename)
+
+    pytplot.tplot_restore(filename, trange=[10, 19])
+    plot_options = pytplot.data_quants['varying'].attrs['plot_options']
+    assert plot_options['trange'] == [10., 19.]
+    assert np.asarray(plot_options['spec_bins_monotonic']).tolist() == [True] * 2 + [False] + [True] * 7
+    assert pytplot.tplot_utilities.set_default_y_range('varying') == [11., 160.]
+    assert pytplot.data_quants['limited'].attrs['plot_options']['yaxis_opt']['y_range'] == [-1, 1]
+
+    # The restored data is read-only, so its statistics are kept
+    assert not pytplot.data_quants['varying'].data.flags.writeable
+    stats = pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['varying'])
+    assert pytplot.tplot_utilities.get_data_stats(pytplot.data_quants['varying']) is stats
@@ -0,0 +1,33 @@
+import pytplot
+import numpy as np
+import xarray as xr
+import pytest
+
+zarr = pytest.importorskip('zarr')
+
+
+def test_tplot_save_zarr(tmp_path):
+    store = str(tmp_path / 'variables.zarr')
+    pytplot.store_data('zarr_spec', data={'x': np.arange(100.), 'y': np.random.rand(100, 8), 'v': np.random.rand(100, 8)})
+    pytplot.store_data('zarr_3d', data={'x': np.arange(100.), 'y': np.random.rand(100, 4, 2),
+                                        'v1': np.arange(4.), 'v2': np.random.rand(100, 2)})
+    pytplot.options('zarr_spec', 'spec', 1)
+    spec = pytplot.data_quants['zarr_spec'].copy()
+    three_d = pytplot.data_quants['zarr_3d'].copy()
+    pytplot.tplot_save_zarr(['zarr_spec', 'zarr_3d'], store, chunks=30)
+
+    pytplot.store_data('zarr_spec', data={'x': np.arange(100., 150.), 'y': np.random.rand(50, 8),
+                                          'v': np.random.rand(50, 8)})
+    appended = pytplot.data_quants['zarr_spec'].copy()
+    pytplot.tplot_save_zarr('zarr_spec', store, append=True)
+
+    pytplot.del_data(['zarr_spec', 'zarr_3d'])
+    assert pytplot.tplot_restore_zarr(store) == ['zarr_spec', 'zarr_3d']
+    assert pytplot.data_quants['zarr_3d'].equals(three_d)
+    assert pytplot.data_quants['zarr_spec'].equals(xr.concat([spec, appended], dim='time'))
+    plot_options = pytplot.data_quants['zarr_spec'].attrs['plot_options']
+    assert plot_options['extras']['spec'] == 1 and plot_options['trange'] == [0., 149.]
+    assert len(plot_options['spec_bins_monotonic']) == 150
+
+    pytplot.tplot_restore_zarr(store, varnames='zarr_3d', chunks=25)
+    assert pytplot.data_quants['zarr_3d'].data.chunks[0] == (25, 25, 25, 25)
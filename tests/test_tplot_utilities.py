@@ -0,0 +1,77 @@
+import pytplot
+import numpy as np
+import pandas as pd
+import xarray as xr
+from pytplot.tplot_utilities import finite_min_max, get_heatmap_color, get_heatmap_rgba
+
+
+def test_finite_min_max():
+    values = np.array([[np.nan, -np.inf, -3.], [0., 0.25, np.inf], [7., np.nan, 2.]])
+    assert finite_min_max(values) == (-3., 7., 0.25, 5)
+    assert finite_min_max(values, block_size=2) == (-3., 7., 0.25, 5)
+    assert finite_min_max(np.arange(-2, 3)) == (-2., 2., 1., 5)
+    vmin, vmax, min_positive, finite_count = finite_min_max(np.full(4, np.nan))
+    assert np.isnan([vmin, vmax, min_positive]).all() and finite_count == 0
+
+
+def _masked_min_max(dataset):
+    # The z range computation the figures used before finite_min_max
+    dataset_temp = dataset.where(dataset != np.inf)
+    dataset_temp = dataset_temp.where(dataset != -np.inf)
+    zmax = float(dataset_temp.max(skipna=True).values)
+    zmin = float(dataset_temp.min(skipna=True).values)
+    df = pd.DataFrame(dataset.values)
+    zmin_list = []
+    for column in df.columns:
+        series = df[column]
+        zmin_list.append(series.iloc[series.to_numpy().nonzero()[0]].min())
+    return zmin, zmax, min(zmin_list)
+
+
+def test_finite_min_max_masked():
+    values = np.random.lognormal(size=(1000, 16))
+    values[::7, ::5] = np.nan
+    values[::11, ::3] = np.inf
+    vmin, vmax, min_positive, _ = finite_min_max(values)
+    assert np.allclose(_masked_min_max(xr.DataArray(values, dims=['time', 'v_dim'])), [vmin, vmax, min_positive])
+
+
+def _heatmap_color_loop(color_map, min_val, max_val, values, zscale='log'):
+    # The colors of the values the way get_heatmap_color used to pick them, one value at a time
+    colors = []
+    for value in values:
+        if np.isfinite(value):
+            if value > max_val:
+                value = max_val
+            if value < min_val:
+                colors.append("#ffffff")
+                continue
+            if zscale == 'log':
+                log_val = np.log10(value)
+                if np.isfinite(log_val):
+                    colors.append(color_map[int((log_val - np.log10(min_val)) / (np.log10(max_val) - np.log10(min_val))
+                                                * (len(color_map) - 1))])
+                else:
+                    colors.append("#ffffff")
+            else:
+                colors.append(color_map[int((value - min_val) / (max_val - min_val) * (len(color_map) - 1))])
+        else:
+            colors.append("#ffffff")
+    return colors
+
+
+def test_heatmap_color():
+    color_map = ['#%02x0000' % i for i in range(256)]
+    values = np.concatenate((np.random.lognormal(size=1000), [np.nan, np.inf, -np.inf, 0., -1., 0.1, 10., 20.]))
+    for zscale in ['log', 'linear']:
+        assert get_heatmap_color(color_map, 0.1, 10., values, zscale) == \
+            _heatmap_color_loop(color_map, 0.1, 10., values, zscale)
+    assert get_heatmap_color(color_map, 0.1, 10., 5.) == _heatmap_color_loop(color_map, 0.1, 10., [5.])
+
+    colors = get_heatmap_color(color_map, 0.1, 10., [np.nan, 0.01, 100.], under_color='blue', over_color='red',
+                               bad_color='black')
+    assert colors == ['black', 'blue', 'red']
+    rgba = get_heatmap_rgba(color_map, 0.1, 10., [np.nan, 0.01, 100., 10.], over_color=(0, 255, 0))
+    assert rgba.dtype == np.uint32
+    assert rgba.view(np.uint8).reshape(4, 4).tolist() == [[255, 255, 255, 255], [255, 255, 255, 255],
+                                                          [0, 255, 0, 255], [255, 0, 0, 255]]